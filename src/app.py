@@ -6,9 +6,10 @@ Description:
 
 Author: Qianni Wang
 Created: 2023-09-24
-Last Modified: 2024-04-04
+Last Modified: 2026-10-19
 """
 
+import atexit
 import os
 import boto3
 import ast
@@ -20,21 +21,40 @@ from flask import (
 
 # Importing blueprints for different application modules
 from profile_page import profile_blueprint
-from course_page import courses_blueprint
+from course_page import courses_blueprint, process_syllabus
 from forum_page import forum_blueprint
 from feedback_page import feedback_blueprint
 from pomodoro_page import pomodoro_blueprint
 from tasks_page import tasks_blueprint
 from app_grid import grid_blueprint
+from user_directory import UserDirectory
+from topic_index import TopicIndex
+from presigned_urls import PresignedUrlCache
+from image_store import ImageStore
+from pdf_text import PdfTextExtractor
+from llm_executor import LLMExecutor
+from llm_cache import LLMCache
+from job_queue import JobQueue
+from course_catalog import CourseCatalog
+from syllabus_manifest import SyllabusManifest
+from focus_log import FocusSessionLog
+from focus_analytics import FocusAnalytics
+from pomodoro_tracker import PomodoroTracker
+from feedback_store import FeedbackStore
+from user_kv import UserKeyValueStore
+from transcript_gpa import TranscriptGpaParser
+import metrics
+from metrics import InstrumentedS3Client, metrics_blueprint
+from local_storage import LocalS3Client, local_storage_blueprint
 
 # Attempt to import utility function for S3 operations
 try:
     from src.util import (
-        get_df_from_csv_in_s3,
+        get_user_profiles_from_s3,
     )
 except ImportError:
     from .util import (
-        get_df_from_csv_in_s3,
+        get_user_profiles_from_s3,
     )
 
 app = Flask(__name__)
@@ -49,6 +69,12 @@ app.register_blueprint(feedback_blueprint, url_prefix="/feedback")
 app.register_blueprint(pomodoro_blueprint, url_prefix="/pomodoro")
 app.register_blueprint(tasks_blueprint, url_prefix="/tasks")
 app.register_blueprint(grid_blueprint, url_prefix="/grid")
+app.register_blueprint(local_storage_blueprint, url_prefix="/local-storage")
+app.register_blueprint(metrics_blueprint)
+
+# Per-route latency, storage and LLM metrics, exposed at /metrics
+app.config["METRICS"] = metrics.REGISTRY
+metrics.init_app(app, app.config["METRICS"])
 
 # Loading configs/global variables
 app.config.from_pyfile("config.py")
@@ -60,8 +86,6 @@ topic_data_file = app.config["TOPIC_DATA_NAME"]
 comment_data_file = app.config["COMMENT_DATA_NAME"]
 model_file_path = app.config["PRIORITY_MODEL_PATH"]
 mock_tasks_data_file = app.config["MOCK_DATA_POC_TASKS"]
-Transcript_path = app.config["UPLOAD_FOLDER"]
-tomato_data_key = app.config["TOMATO_DATA_KEY"]
 icon_order_path = app.config["ICON_ORDER_PATH"]
 
 # Setting global variables
@@ -70,17 +94,153 @@ app.config["userId"] = 1
 app.config["courses"] = []
 app.config["model"] = None
 app.config["current_page"] = "home"
-app.config["cGPA"] = "None (Please upload your transcript)"
 
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-    region_name=app.config["REGION_NAME"],
+storage_backend = os.environ.get(
+    "STORAGE_BACKEND", app.config["STORAGE_BACKEND"]
 )
+if storage_backend == "local":
+    # Directory backed stand-in for S3 to develop and test offline
+    s3 = LocalS3Client(
+        app.config["LOCAL_STORAGE_PATH"],
+        os.environ.get("LOCAL_STORAGE_SECRET", app.secret_key),
+    )
+else:
+    s3 = boto3.client(
+        "s3",
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+        region_name=app.config["REGION_NAME"],
+    )
 
+# Every storage call of the app is counted and timed
+s3 = InstrumentedS3Client(s3, app.config["METRICS"])
 app.config["S3_CLIENT"] = s3
 
+# Shared id <-> username directory, loaded lazily and refreshed by ETag
+app.config["USER_DIRECTORY"] = UserDirectory(
+    s3,
+    bucket_name,
+    user_data_file,
+    refresh_interval=app.config["USER_DIRECTORY_REFRESH_SECONDS"],
+)
+
+# Tag partitioned forum topic index with per-topic comment counts
+app.config["TOPIC_INDEX"] = TopicIndex(
+    s3,
+    bucket_name,
+    topic_data_file,
+    comment_data_file,
+    refresh_interval=app.config["TOPIC_INDEX_REFRESH_SECONDS"],
+)
+
+# Presigned image URLs are issued at render time and cached until expiry
+app.config["PRESIGNED_URL_CACHE"] = PresignedUrlCache(
+    s3,
+    bucket_name,
+    expiration=app.config["PRESIGNED_URL_EXPIRATION"],
+    refresh_margin=app.config["PRESIGNED_URL_REFRESH_MARGIN"],
+)
+
+# PDF text extraction shared by syllabus and transcript uploads
+app.config["PDF_EXTRACTOR"] = PdfTextExtractor(
+    max_workers=app.config["PDF_EXTRACTION_WORKERS"],
+    parallel_threshold=app.config["PDF_PARALLEL_PAGE_THRESHOLD"],
+    cache_size=app.config["PDF_TEXT_CACHE_SIZE"],
+)
+
+# Content-addressed forum image storage with background display variants
+app.config["IMAGE_STORE"] = ImageStore(
+    s3,
+    bucket_name,
+    max_workers=app.config["IMAGE_WORKERS"],
+    display_size=app.config["IMAGE_DISPLAY_SIZE"],
+)
+
+# Rate limited, concurrent OpenAI calls for syllabus segments
+app.config["LLM_EXECUTOR"] = LLMExecutor(
+    max_workers=app.config["LLM_MAX_WORKERS"],
+    requests_per_minute=app.config["LLM_REQUESTS_PER_MINUTE"],
+    tokens_per_minute=app.config["LLM_TOKENS_PER_MINUTE"],
+    max_retries=app.config["LLM_MAX_RETRIES"],
+)
+
+# Responses to syllabus prompts persisted across uploads and restarts
+app.config["LLM_CACHE"] = LLMCache(
+    os.path.join(app.root_path, app.config["LLM_CACHE_PATH"]),
+    ttl=app.config["LLM_CACHE_TTL_SECONDS"],
+    max_entries=app.config["LLM_CACHE_MAX_ENTRIES"],
+)
+
+# Course id to syllabus index replacing a HEAD request per course
+app.config["SYLLABUS_MANIFEST"] = SyllabusManifest(
+    s3,
+    bucket_name,
+    manifest_key=app.config["SYLLABUS_MANIFEST_KEY"],
+    refresh_interval=app.config["SYLLABUS_MANIFEST_REFRESH_SECONDS"],
+)
+
+# Course information and extracted course works indexed by course id
+app.config["COURSE_CATALOG"] = CourseCatalog(
+    app.config["MOCK_COURSE_INFO_CSV"],
+    app.config["COURSE_WORK_EXTRACTED_INFO"],
+)
+
+# Syllabus analysis runs in the background, jobs survive restarts
+app.config["SYLLABUS_JOBS"] = JobQueue(
+    os.path.join(app.root_path, app.config["JOB_QUEUE_PATH"]),
+    process_syllabus,
+    app=app,
+    max_workers=app.config["JOB_WORKERS"],
+    max_attempts=app.config["JOB_MAX_ATTEMPTS"],
+    lease_seconds=app.config["JOB_LEASE_SECONDS"],
+)
+app.config["SYLLABUS_JOBS"].start()
+
+# Focus session history with rollups, flushed to S3 in batches
+app.config["FOCUS_LOG"] = FocusSessionLog(
+    s3,
+    bucket_name,
+    app.config["FOCUS_LOG_PREFIX"],
+    os.path.join(app.root_path, app.config["FOCUS_LOG_WAL_PATH"]),
+    flush_interval=app.config["FOCUS_LOG_FLUSH_SECONDS"],
+)
+app.config["FOCUS_LOG"].start()
+atexit.register(app.config["FOCUS_LOG"].shutdown)
+
+# Focus sessions joined with tasks, cached per user until new sessions
+app.config["FOCUS_ANALYTICS"] = FocusAnalytics(
+    app.config["FOCUS_LOG"], s3, bucket_name, mock_tasks_data_file
+)
+
+# Feedback records sharded by user with a per-user status index
+app.config["FEEDBACK_STORE"] = FeedbackStore(
+    s3, bucket_name, prefix=app.config["FEEDBACK_STORE_PREFIX"]
+)
+# Developers triage feedback with this token, disabled when it is not set
+app.config["FEEDBACK_TRIAGE_TOKEN"] = os.environ.get("FEEDBACK_TRIAGE_TOKEN")
+
+# Small per-user values like the icon order, with coalesced writes
+app.config["USER_KV"] = UserKeyValueStore(
+    s3,
+    bucket_name,
+    prefix=app.config["USER_KV_PREFIX"],
+    write_delay=app.config["USER_KV_WRITE_DELAY_SECONDS"],
+)
+atexit.register(app.config["USER_KV"].flush)
+
+# Server-side pomodoro timers pushed to the pages over Server-Sent Events,
+# saved in the per-user key-value store across restarts
+app.config["POMODORO_TRACKER"] = PomodoroTracker(
+    app.config["FOCUS_LOG"],
+    default_duration=app.config["POMODORO_DURATION_SECONDS"],
+    store=app.config["USER_KV"],
+)
+
+# Transcript cGPA results cached by the SHA-256 of the PDF
+app.config["TRANSCRIPT_PARSER"] = TranscriptGpaParser(
+    app.config["PDF_EXTRACTOR"]
+)
+
 
 @app.route("/")
 def start():
@@ -91,14 +251,17 @@ def start():
     a default username, user ID, and courses list for the session.
     """
     # Fetch mock data from CSV in S3 for PoC and set initial configuration
-    df = get_df_from_csv_in_s3(s3, bucket_name, mock_data_file)
+    df = get_user_profiles_from_s3(s3, bucket_name, mock_data_file)
 
     # Set up default session variables for demonstration purposes
-    app.config["username"] = df.loc[0, "username"]  # For PoC purpose
+    user_id = int(df.index[0])  # For PoC purpose
+    app.config["userId"] = user_id
+    app.config["username"] = app.config["USER_DIRECTORY"].get_username(
+        user_id, ""
+    )
     print("username is: ", app.config["username"])
-    app.config["userId"] = df.loc[0, "user_id"]  # For PoC purpose
 
-    cs = df.loc[0, "courses"]  # For PoC purpose
+    cs = df.at[user_id, "courses"]  # For PoC purpose
     print("courses is :", cs)
     # Parsing it into a Python list
     app.config["courses"] = ast.literal_eval(cs)
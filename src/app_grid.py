@@ -3,13 +3,20 @@ Filename: <app_grid.py>
 
 Description:
     This file contains the implementation of the app icon grid functionality
-    for MacONE.
+    for MacONE. The icon order of each user is a list of icon ids kept in
+    the per-user key-value store.
+
+    Icon orders of the old icon_order.csv can be imported with:
+        python -m src.app_grid migrate
 
 Author: Qianni Wang
 Created: 2024-01-21
-Last Modified: 2024-04-04
+Last Modified: 2026-10-19
 """
 
+import argparse
+import ast
+
 from flask import (
     Blueprint,
     current_app,
@@ -17,108 +24,107 @@ from flask import (
     jsonify,
 )
 
-import pandas as pd
-
-# Attempt to import utility functions for S3 operations
-try:
-    from src.util import (
-        get_df_from_csv_in_s3,
-        write_order_csv_to_s3,
-    )
-except ImportError:
-    from .util import (
-        get_df_from_csv_in_s3,
-        write_order_csv_to_s3,
-    )
+# Name of the icon order in the per-user key-value store
+ICON_ORDER = "icon_order"
 
-# Attempt to import utility functions for S3 operations
 grid_blueprint = Blueprint("grid", __name__)
 
 
+def parse_order(orders):
+    """
+    Validate an icon order: a list of distinct icon ids. Returns the list
+    of ints, or None if it is not a valid order.
+    """
+    if not isinstance(orders, list) or not orders:
+        return None
+    if not all(type(icon) is int and icon > 0 for icon in orders):
+        return None
+    if len(set(orders)) != len(orders):
+        return None
+    return orders
+
+
 @grid_blueprint.route("/get-order")
 def get_order():
     """
     Fetches and returns the current icon order for the logged-in user.
-    This function retrieves the user's current icon order from an S3 CSV file.
-    If no specific order exists, it returns a default order.
+    If no specific order exists, it returns the default order.
     """
-    # Extract necessary configuration and S3 client from app config
-    bucket_name = current_app.config["BUCKET_NAME"]
-    icon_order_path = current_app.config["ICON_ORDER_PATH"]
-    s3 = current_app.config["S3_CLIENT"]
-    username = current_app.config["username"]
-
-    # Read current order from S3
-    df = read_order_csv_from_s3(s3, username, bucket_name, icon_order_path)
-
-    # Filter for current user's order
-    filtered_df = df[df["username"] == username]
-
-    # Provide default order if none is found
-    if filtered_df.empty:
-        existing_order = [3, 1, 11, 4, 2, 12, 8, 10, 6, 9, 5, 7]
-    else:
-        existing_order = filtered_df["orders"].iloc[0]
-
-    return jsonify(existing_order)
+    user_id = current_app.config["userId"]
+    order = current_app.config["USER_KV"].get(user_id, ICON_ORDER)
+    if order is None:
+        order = current_app.config["ICON_ORDER_DEFAULT"]
+    return jsonify(order)
 
 
 @grid_blueprint.route("/update-order", methods=["POST"])
 def update_order():
     """
     Updates the icon order for the logged-in user based on the received input.
-    This function updates the user's icon order in the S3 CSV file based on the
-    order specified in the request's JSON payload.
+    Quick successive updates are coalesced into one write.
     """
-    # Extract necessary configuration and S3 client from app config
-    bucket_name = current_app.config["BUCKET_NAME"]
-    s3 = current_app.config["S3_CLIENT"]
-    new_orders = request.json
-    username = current_app.config["username"]
-    icon_order_path = current_app.config["ICON_ORDER_PATH"]
-
-    # Fetch and update current orders
-    df = get_df_from_csv_in_s3(s3, bucket_name, icon_order_path)
-
-    if username in df["username"].values:
-        df.loc[df["username"] == username, "orders"] = str(new_orders)
-    else:
-        new_row = pd.DataFrame(
-            {"username": [username], "orders": [str(new_orders)]}
-        )
-        df = pd.concat([df, new_row], ignore_index=True)
-
-    # Write updated orders back to S3
-    write_order_csv_to_s3(s3, icon_order_path, df, bucket_name)
+    new_orders = parse_order(request.get_json(silent=True))
+    if new_orders is None:
+        return jsonify({"status": "error", "message": "Invalid order."}), 400
+
+    user_id = current_app.config["userId"]
+    current_app.config["USER_KV"].set(user_id, ICON_ORDER, new_orders)
 
     return jsonify(
         {"status": "success", "message": "Order updated successfully."}
     )
 
 
-def read_order_csv_from_s3(s3, username, bucket_name, key):
+def import_icon_orders(store, df):
     """
-    Reads and returns the order data from a CSV file stored in S3.
-    Attempts to fetch the CSV file specified by the key from the S3 bucket.
-    If the file doesn't exist, it creates a default order for the user.
+    Import the rows (user_id, orders) of the old icon order CSV, where
+    orders is the string of a list. Returns the number of imported rows.
     """
-    icon_order_path = current_app.config["ICON_ORDER_PATH"]
-    # Try to fetch the specified CSV file from S3
-    try:
-        response = s3.get_object(Bucket=bucket_name, Key=key)
-        df = pd.read_csv(response["Body"])
-        return df
-    except s3.exceptions.NoSuchKey:
-        # Handle missing file by creating a default order
-        default_order = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
-        default_df = pd.DataFrame(
-            [{"username": username, "orders": default_order}]
-        )
-
-        write_order_csv_to_s3(s3, icon_order_path, default_df, bucket_name)
-
-        return default_df
-    except Exception as e:
-        # Log unexpected errors and return an empty DataFrame
-        print(f"An unexpected error occurred: {e}")
-        return pd.DataFrame(columns=["username", "orders"])
+    count = 0
+    for user_id, orders in zip(df["user_id"], df["orders"]):
+        try:
+            order = parse_order(ast.literal_eval(str(orders)))
+        except (ValueError, SyntaxError):
+            order = None
+        if order is None:
+            print(f"Skipping the invalid order of user {user_id}: {orders}")
+            continue
+        store.set(int(user_id), ICON_ORDER, order)
+        count += 1
+    store.flush()
+    return count
+
+
+def main():
+    import pandas as pd
+
+    from src import config
+    from src.local_storage import create_s3_client
+    from src.user_directory import UserDirectory
+    from src.user_kv import UserKeyValueStore
+
+    parser = argparse.ArgumentParser(description="Manage the icon orders")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser(
+        "migrate", help="Import the icon orders of the old icon order CSV"
+    )
+    migrate_parser.add_argument("--key", default=config.ICON_ORDER_PATH)
+    args = parser.parse_args()
+
+    s3 = create_s3_client(config)
+    store = UserKeyValueStore(
+        s3, config.BUCKET_NAME, prefix=config.USER_KV_PREFIX, write_delay=0
+    )
+    directory = UserDirectory(s3, config.BUCKET_NAME, config.USER_DATA_NAME)
+    response = s3.get_object(Bucket=config.BUCKET_NAME, Key=args.key)
+    df = pd.read_csv(response["Body"])
+    # The old CSV is keyed by username
+    df["user_id"] = [directory.get_user_id(name) for name in df["username"]]
+    for username in df.loc[df["user_id"].isna(), "username"]:
+        print(f"Skipping the icon order of unknown user {username}")
+    count = import_icon_orders(store, df[df["user_id"].notna()])
+    print(f"Imported {count} icon orders from {args.key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,22 @@ Description:
 
 Author: All team members
 Created: 2023-09-23
-Last Modified: 2024-04-03
+Last Modified: 2026-10-19
 """
 
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+IMAGE_WORKERS = 2
+IMAGE_DISPLAY_SIZE = 800
+IMAGE_MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+SYLLABUS_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+UPLOAD_POLICY_EXPIRATION = 600
 BUCKET_NAME = "course-buddy"
 MOCK_DATA_POC_NAME = "mock_data_poc.csv"
 USER_DATA_NAME = "user_data.csv"
+USER_DIRECTORY_REFRESH_SECONDS = 60
 TOPIC_DATA_NAME = "topic_data.csv"
 COMMENT_DATA_NAME = "comment_data.csv"
+TOPIC_INDEX_REFRESH_SECONDS = 30
 TOMATO_DATA_KEY = "weekly_tomato_data.csv"
 PRIORITY_MODEL_FILE_NAME = "trained_priority_model.joblib"
 PRIORITY_MODEL_FILE_PATH = (
@@ -39,5 +46,38 @@ TITLE_TO_COLUMN_MAPPING = {
     "Course Goal/Mission": "goal_mission",
     "MSAF Policy": "MSAF",
 }
-UPLOAD_FOLDER = "poc-data/"
+PDF_EXTRACTION_WORKERS = None
+PDF_PARALLEL_PAGE_THRESHOLD = 32
+PDF_TEXT_CACHE_SIZE = 64
 REGION_NAME = "us-east-2"
+STORAGE_BACKEND = "s3"
+LOCAL_STORAGE_PATH = "local-storage/"
+PRESIGNED_URL_EXPIRATION = 3600
+PRESIGNED_URL_REFRESH_MARGIN = 300
+LLM_MAX_WORKERS = 8
+LLM_REQUESTS_PER_MINUTE = 3500
+LLM_TOKENS_PER_MINUTE = 90000
+LLM_MAX_RETRIES = 5
+LLM_TOKENS_PER_CALL_OVERHEAD = 1000
+LLM_MODEL = "gpt-3.5-turbo"
+LLM_CACHE_PATH = "cache/llm_cache.sqlite3"
+LLM_CACHE_TTL_SECONDS = 30 * 24 * 3600
+LLM_CACHE_MAX_ENTRIES = 10000
+SYLLABUS_CHUNK_TOKENS = 2500
+RULE_EXTRACTION_CONFIDENCE = 0.8
+JOB_QUEUE_PATH = "data/syllabus_jobs.sqlite3"
+JOB_WORKERS = 2
+JOB_MAX_ATTEMPTS = 3
+JOB_LEASE_SECONDS = 600
+SYLLABUS_MANIFEST_KEY = "syllabus_manifest.json"
+SYLLABUS_MANIFEST_REFRESH_SECONDS = 30
+FOCUS_LOG_PREFIX = "focus_sessions/"
+FOCUS_LOG_WAL_PATH = "data/focus_sessions.wal"
+FOCUS_LOG_FLUSH_SECONDS = 10
+POMODORO_DURATION_SECONDS = 25 * 60
+POMODORO_SSE_KEEPALIVE_SECONDS = 15
+FEEDBACK_STORE_PREFIX = "feedback/"
+USER_KV_PREFIX = "user_kv/"
+USER_KV_WRITE_DELAY_SECONDS = 2
+ICON_ORDER_DEFAULT = [3, 1, 11, 4, 2, 12, 8, 10, 6, 9, 5, 7]
+TRANSCRIPT_MAX_UPLOAD_BYTES = 10 * 1024 * 1024
@@ -0,0 +1,231 @@
+"""
+Filename: <course_catalog.py>
+
+Description:
+    In-memory catalog of the course information and extracted course works
+    of every course, indexed by course id. The two CSV files backing it are
+    only re-read when their modification time changes, so course detail
+    views do no file I/O in the steady state. Updates are upserts of the
+    rows of one course; a new course is appended to the CSV without
+    rewriting it.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import csv
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+COURSE_WORK_COLUMNS = [
+    "course",
+    "course_work",
+    "start_date",
+    "due_date",
+    "score_distribution",
+]
+
+
+def read_records(path):
+    """
+    Read a CSV file into a list of row dictionaries with "Not Found" in
+    empty cells, and return them with the file's header.
+    """
+    df = pd.read_csv(path).dropna(how="all")
+    df = df.astype(object).where(pd.notna(df), "Not Found")
+    return list(df.columns), df.to_dict(orient="records")
+
+
+class CourseCatalog:
+    """
+    Course information and course works by course id, backed by CSV files.
+    """
+
+    def __init__(self, course_info_path, course_work_path):
+        self.course_info_path = course_info_path
+        self.course_work_path = course_work_path
+        self._lock = threading.RLock()
+        self._info_columns = []
+        self._course_info = {}
+        self._course_works = {}
+        self._info_mtime = None
+        self._work_mtime = None
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """
+        Reload a CSV file if it was modified since it was last read.
+        """
+        with self._lock:
+            info_mtime = self._mtime(self.course_info_path)
+            if info_mtime != self._info_mtime:
+                rows = []
+                if info_mtime is not None:
+                    self._info_columns, rows = read_records(
+                        self.course_info_path
+                    )
+                else:
+                    self._info_columns = []
+                # The last row of a course wins, like an upsert
+                self._course_info = {row["course"]: row for row in rows}
+                self._info_mtime = info_mtime
+
+            work_mtime = self._mtime(self.course_work_path)
+            if work_mtime != self._work_mtime:
+                rows = []
+                if work_mtime is not None:
+                    _, rows = read_records(self.course_work_path)
+                course_works = {}
+                for row in rows:
+                    course_works.setdefault(row["course"], []).append(row)
+                self._course_works = course_works
+                self._work_mtime = work_mtime
+
+    def get_course_info(self, course_id):
+        """
+        Return the course information row of a course, or None.
+        """
+        self.refresh()
+        with self._lock:
+            row = self._course_info.get(course_id)
+            return dict(row) if row is not None else None
+
+    def get_course_works(self, course_id):
+        """
+        Return the list of extracted course work rows of a course.
+        """
+        self.refresh()
+        with self._lock:
+            return [dict(row) for row in self._course_works.get(course_id, [])]
+
+    def upsert_course_info(self, course_id, pdf_name, course_info):
+        """
+        Insert or update the course information row of a course.
+        """
+        self.upsert_courses({course_id: (pdf_name, course_info)}, {})
+
+    def replace_course_works(self, course_id, course_work_list):
+        """
+        Replace the course works of a course with the given list of
+        dictionaries in the format returned by the coursework extraction.
+        """
+        self.upsert_courses({}, {course_id: course_work_list})
+
+    def upsert_courses(self, course_infos, course_works):
+        """
+        Upsert the information rows and replace the course works of several
+        courses with at most one write per CSV file. course_infos maps
+        course ids to (pdf_name, course_info) and course_works maps course
+        ids to course work lists.
+        """
+        self.refresh()
+        with self._lock:
+            if course_infos:
+                self._upsert_info_rows(course_infos)
+            if course_works:
+                self._replace_work_rows(course_works)
+
+    def _upsert_info_rows(self, course_infos):
+        columns = list(self._info_columns) or ["course", "course_syllabus"]
+        new_rows = []
+        for course_id, (pdf_name, course_info) in course_infos.items():
+            existing = self._course_info.get(course_id)
+            row = dict(existing) if existing else {"course": course_id}
+            row.setdefault("course_syllabus", pdf_name)
+            row.update(course_info)
+            columns += [column for column in row if column not in columns]
+            self._course_info[course_id] = row
+            if existing is None:
+                new_rows.append(row)
+        for course_id, row in self._course_info.items():
+            self._course_info[course_id] = {
+                column: row.get(column, "Not Found") for column in columns
+            }
+
+        if len(new_rows) == len(course_infos) and (
+            columns == self._info_columns
+        ):
+            # Only new courses, append them to the file
+            self._append(
+                self.course_info_path,
+                columns,
+                [self._course_info[row["course"]] for row in new_rows],
+            )
+            self._info_mtime = self._mtime(self.course_info_path)
+        else:
+            self._info_columns = columns
+            self._info_mtime = self._write(
+                self.course_info_path,
+                columns,
+                list(self._course_info.values()),
+            )
+
+    def _replace_work_rows(self, course_works):
+        rewrite = False
+        new_rows = []
+        for course_id, course_work_list in course_works.items():
+            rows = [
+                {
+                    "course": course_id,
+                    "course_work": item.get("Course Work Name", "Not Found"),
+                    "start_date": item.get("Start Date", "Not Found"),
+                    "due_date": item.get("Due Date", "Not Found"),
+                    "score_distribution": str(
+                        item.get("Score Distribution", "Not Found")
+                    ),
+                }
+                for item in course_work_list
+            ]
+            # Courses that had rows before need the file rewritten
+            rewrite = rewrite or bool(self._course_works.get(course_id))
+            self._course_works[course_id] = rows
+            new_rows.extend(rows)
+
+        if not rewrite:
+            self._append(self.course_work_path, COURSE_WORK_COLUMNS, new_rows)
+            self._work_mtime = self._mtime(self.course_work_path)
+        else:
+            self._work_mtime = self._write(
+                self.course_work_path,
+                COURSE_WORK_COLUMNS,
+                [
+                    row
+                    for course_rows in self._course_works.values()
+                    for row in course_rows
+                ],
+            )
+
+    @staticmethod
+    def _append(path, columns, rows):
+        """
+        Append rows to a CSV file, writing the header if it is new.
+        """
+        with open(path, mode="a", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            if file.tell() == 0:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    def _write(self, path, columns, rows):
+        """
+        Atomically replace a CSV file with the given rows and return its
+        new modification time.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, tmp_path = tempfile.mkstemp(dir=directory, suffix=".csv")
+        with os.fdopen(descriptor, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, path)
+        return self._mtime(path)
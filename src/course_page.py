@@ -8,13 +8,14 @@ Description:
 
 Author: Jingyao Qin
 Created: 2023-09-28
-Last Modified: 2024-04-04
+Last Modified: 2026-10-19
 """
 
 from flask import (
     Blueprint,
     render_template,
     current_app,
+    has_app_context,
     request,
     redirect,
     jsonify,
@@ -24,44 +25,83 @@ from flask import (
 # Importing required modules and packages
 import openai
 import re
-import csv
-import json
 import botocore
 import ast
-import pandas as pd
 import io
-import pypdf
+from functools import partial
 
 # Attempt to import configuration and utility functions
 try:
     from config import (
-        MOCK_COURSE_INFO_CSV,
-        COURSE_WORK_EXTRACTED_INFO,
         TITLE_TO_COLUMN_MAPPING,
+        LLM_TOKENS_PER_CALL_OVERHEAD,
+        LLM_MODEL,
+        SYLLABUS_CHUNK_TOKENS,
+        RULE_EXTRACTION_CONFIDENCE,
     )
 except ImportError:
     from .config import (
-        MOCK_COURSE_INFO_CSV,
-        COURSE_WORK_EXTRACTED_INFO,
         TITLE_TO_COLUMN_MAPPING,
+        LLM_TOKENS_PER_CALL_OVERHEAD,
+        LLM_MODEL,
+        SYLLABUS_CHUNK_TOKENS,
+        RULE_EXTRACTION_CONFIDENCE,
     )
 
 try:
     from src.util import (
         upload_df_to_s3,
-        add_task_todo,
+        add_tasks_todo,
         get_df_from_csv_in_s3,
+        get_user_profiles_from_s3,
+    )
+    from src.direct_uploads import create_upload_policy
+    from src.metrics import track_llm_call
+    from src.llm_cache import make_cache_key
+    from src.course_work_extraction import (
+        merge_course_works,
+        parse_course_work_list,
+    )
+    from src.syllabus_chunker import (
+        chunk_course_work_text,
+        chunk_text,
+        count_tokens,
+    )
+    from src.syllabus_rules import (
+        extract_course_info_by_rules,
+        extract_course_works_by_rules,
     )
 except ImportError:
     from .util import (
-        add_task_todo,
+        add_tasks_todo,
         upload_df_to_s3,
         get_df_from_csv_in_s3,
+        get_user_profiles_from_s3,
+    )
+    from .direct_uploads import create_upload_policy
+    from .metrics import track_llm_call
+    from .llm_cache import make_cache_key
+    from .course_work_extraction import (
+        merge_course_works,
+        parse_course_work_list,
+    )
+    from .syllabus_chunker import (
+        chunk_course_work_text,
+        chunk_text,
+        count_tokens,
+    )
+    from .syllabus_rules import (
+        extract_course_info_by_rules,
+        extract_course_works_by_rules,
     )
 
 # Defining a Blueprint for the courses module
 courses_blueprint = Blueprint("courses", __name__)
 
+# Bump these when a prompt changes so cached responses are not reused
+COURSE_INFO_PROMPT_VERSION = 2
+COURSE_WORK_PROMPT_VERSION = 1
+
 
 # Router to course page
 @courses_blueprint.route("/course_page", methods=["GET", "POST"])
@@ -72,12 +112,17 @@ def course_page():
     Display the course content (name) on the page.
     """
     current_app.config["current_page"] = "course_page"
+    # Syllabus status of every course with a single manifest lookup
+    syllabus_statuses = current_app.config["SYLLABUS_MANIFEST"].statuses(
+        current_app.config["courses"]
+    )
     # Render the course page
     return render_template(
         "course_page.html",
         username=current_app.config["username"],
         courses=current_app.config["courses"],
         current_page=current_app.config["current_page"],
+        syllabus_statuses=syllabus_statuses,
     )
 
 
@@ -94,29 +139,24 @@ def remove_course():
     bucket_name = current_app.config["BUCKET_NAME"]
     mock_data_file = current_app.config["MOCK_DATA_POC_NAME"]
     s3 = current_app.config["S3_CLIENT"]
+    user_id = current_app.config["userId"]
 
     if request.method == "POST":
         index = request.form["index"]
-        df = get_df_from_csv_in_s3(s3, bucket_name, mock_data_file)
-        user_courses_series = df.loc[df["username"] == username, "courses"]
-        user_courses_str = user_courses_series.tolist()[0]
-        user_courses = ast.literal_eval(user_courses_str)
+        df = get_user_profiles_from_s3(s3, bucket_name, mock_data_file)
+        user_courses = ast.literal_eval(df.at[user_id, "courses"])
 
         # Remove the course from the user's courses list
         course_id = user_courses.pop(int(index))
 
-        # Check if syllabus exists and delete associated PDF if found
-        syllabus_exists, pdf_name = check_syllabus_exists(
-            course_id, s3, bucket_name
-        )
-        if syllabus_exists:
-            s3.delete_object(Bucket=bucket_name, Key=pdf_name)
+        # Delete the associated syllabus PDF if the course has one
+        if current_app.config["SYLLABUS_MANIFEST"].remove(course_id):
             update_csv_after_deletion(course_id)
         delete_task_by_course(course_id)
 
         # Update the DataFrame and upload to S3
         list_str = str(user_courses)
-        df.loc[df["username"] == username, "courses"] = list_str
+        df.at[user_id, "courses"] = list_str
         upload_df_to_s3(df, s3, bucket_name, mock_data_file)
         current_app.config["courses"] = user_courses
 
@@ -127,6 +167,9 @@ def remove_course():
                 username=username,
                 courses=current_app.config["courses"],
                 current_page="course_page",
+                syllabus_statuses=current_app.config[
+                    "SYLLABUS_MANIFEST"
+                ].statuses(user_courses),
             )
     return redirect(url_for("start"))
 
@@ -182,26 +225,25 @@ def add_course():
     bucket_name = current_app.config["BUCKET_NAME"]
     mock_data_file = current_app.config["MOCK_DATA_POC_NAME"]
     s3 = current_app.config["S3_CLIENT"]
+    user_id = current_app.config["userId"]
 
     # Proceed if the request method is POST.
     if request.method == "POST":
         # Extract the new course from the request form.
         new_course = request.form["newcourse"]
 
-        # Get DataFrame from CSV stored in S3.
-        df = get_df_from_csv_in_s3(s3, bucket_name, mock_data_file)
+        # Get the user profiles from the CSV stored in S3.
+        df = get_user_profiles_from_s3(s3, bucket_name, mock_data_file)
 
         # Retrieve the user's current courses.
-        user_courses_series = df.loc[df["username"] == username, "courses"]
-        user_courses_str = user_courses_series.tolist()[0]
-        user_courses = ast.literal_eval(user_courses_str)
+        user_courses = ast.literal_eval(df.at[user_id, "courses"])
 
         # Add the new course to the user's courses.
         user_courses.append(new_course)
         list_str = str(user_courses)
 
         # Update the DataFrame with the new course.
-        df.loc[df["username"] == username, "courses"] = list_str
+        df.at[user_id, "courses"] = list_str
         current_app.config["courses"] = user_courses
 
         # Upload the updated DataFrame to S3.
@@ -214,6 +256,9 @@ def add_course():
                 username=username,
                 courses=current_app.config["courses"],
                 current_page="course_page",
+                syllabus_statuses=current_app.config[
+                    "SYLLABUS_MANIFEST"
+                ].statuses(user_courses),
             )
 
     # Redirect to the start page if not on course page.
@@ -226,60 +271,28 @@ def course_detail(course_id):
     """
     Render the course detail page with information about the specified course.
     """
-    mock_tasks_data_file = current_app.config["MOCK_DATA_POC_TASKS"]
-    bucket_name = current_app.config["BUCKET_NAME"]
-    s3 = current_app.config["S3_CLIENT"]
     username = current_app.config["username"]
     message = request.args.get("message", "")
+    # Syllabus analysis job the page polls until it finishes
+    job_id = request.args.get("job_id", "")
 
-    # Check if syllabus exists for the specified course
-    syllabus_exists, pdf_name = check_syllabus_exists(
-        course_id, s3, bucket_name
-    )
+    # Syllabus of the course from the manifest, None if not uploaded
+    syllabus = current_app.config["SYLLABUS_MANIFEST"].get(course_id)
 
-    # Load course information from CSV file
-    course_info_df = pd.read_csv(MOCK_COURSE_INFO_CSV)
-    course_info_row = course_info_df[course_info_df["course"] == course_id]
-
-    # Load course works information from CSV file
-    course_work_info = current_app.config["COURSE_WORK_EXTRACTED_INFO"]
-    course_works_df = pd.read_csv(course_work_info)
-    course_works = course_works_df[course_works_df["course"] == course_id]
-
-    # Iterate through course works and add tasks to todo list
-    for index, row in course_works.iterrows():
-        course_name = row["course"]
-        task_name = row["course_work"]
-        due_date = row["due_date"]
-        weight = row["score_distribution"]
-        est_hours = 3
-        add_task_todo(
-            course_name,
-            task_name,
-            due_date,
-            str(weight),
-            est_hours,
-            s3,
-            bucket_name,
-            mock_tasks_data_file,
-        )
+    # Course information and course works from the in-memory catalog. The
+    # course works were added to the todo list when the syllabus was analyzed
+    course_catalog = current_app.config["COURSE_CATALOG"]
 
     # Render course detail page with course information and todo list
     return render_template(
         "course_detail_page.html",
         course_id=course_id,
         course=course_id,
-        course_info=(
-            course_info_row.to_dict(orient="records")[0]
-            if not course_info_row.empty
-            else None
-        ),
-        course_works=(
-            course_works.to_dict(orient="records")
-            if not course_works.empty
-            else []
-        ),
+        course_info=course_catalog.get_course_info(course_id),
+        course_works=course_catalog.get_course_works(course_id),
         message=message,
+        job_id=job_id,
+        syllabus=syllabus,
         username=username,
     )
 
@@ -326,120 +339,171 @@ def upload_file(course_id):
         s3.upload_fileobj(
             file, bucket_name, new_filename, ExtraArgs={"ACL": "private"}
         )
-        # Check if syllabus exists
-        syllabus_exists, pdf_name = check_syllabus_exists(
-            course_id, s3, bucket_name
-        )
-        if syllabus_exists:
-            pdf_text = extract_text_from_pdf(pdf_name, bucket_name, s3)
-            # Extract course work details from PDF
-            course_work_details = extract_course_work_details(pdf_text)
-            # Analyze course content
-            course_info = analyze_course_content(pdf_text)
-            # Process course work using OpenAI
-            course_work_info = process_course_work_with_openai(
-                course_work_details
-            )
-        else:
-            course_info = ""  # Empty course info
-            course_work_info = ""  # Empty course work info
-
-        # Update CSV with uploaded file details and course info
-        update_csv(course_id, file.filename, course_info)
-        # Convert course work info to a list of dictionaries
-        course_work_list = convert_to_list_of_dicts(course_work_info)
-        # Write course work to CSV
-        write_course_work_to_csv(course_work_list, course_id)
-
-        # Read course info from CSV
-        course_info_df = pd.read_csv(MOCK_COURSE_INFO_CSV)
-        course_info_row = course_info_df[course_info_df["course"] == course_id]
-
-        # Read extracted course works from CSV
-        course_works_df = pd.read_csv(COURSE_WORK_EXTRACTED_INFO)
-        course_works = course_works_df[course_works_df["course"] == course_id]
-
-        # Iterate over course works and add tasks to TODO list
-        for index, row in course_works.iterrows():
-            course_name = row["course"]
-            task_name = row["course_work"]
-            due_date = row["due_date"]
-            weight = row["score_distribution"]
-            est_hours = 3  # Estimated hours for task
-            add_task_todo(
-                course_name,
-                task_name,
-                due_date,
-                str(weight),
-                est_hours,
-                s3,
-                bucket_name,
-                current_app.config["MOCK_DATA_POC_TASKS"],
-            )
-
-        # Redirect to course detail page with success message
+        current_app.config["SYLLABUS_MANIFEST"].record_upload(course_id)
+        return queue_syllabus_analysis(course_id)
+    except botocore.exceptions.NoCredentialsError:
+        # Redirect to course detail page with failure message
         return redirect(
             url_for(
                 "courses.course_detail",
                 course_id=course_id,
-                course_info=(
-                    course_info_row.to_dict(orient="records")[0]
-                    if not course_info_row.empty
-                    else None
-                ),
-                course_works=(
-                    course_works.to_dict(orient="records")
-                    if not course_works.empty
-                    else []
-                ),
-                message="File uploaded successfully!",
+                message="AWS authentication failed. Check your AWS keys.",
                 username=username,
             )
         )
+
+
+@courses_blueprint.route("/upload_policy/<course_id>", methods=["POST"])
+def upload_policy(course_id):
+    """
+    Issue a presigned POST policy so the browser can upload the syllabus
+    PDF directly to storage instead of through this worker.
+    """
+    bucket_name = current_app.config["BUCKET_NAME"]  # S3 bucket name
+    s3 = current_app.config["S3_CLIENT"]  # S3 client
+    data = request.get_json(silent=True) or {}
+
+    # Check if file format is PDF
+    if not data.get("filename", "").lower().endswith(".pdf"):
+        return (
+            jsonify(
+                {
+                    "message": "File format is not PDF. "
+                    "Please upload a PDF file."
+                }
+            ),
+            400,
+        )
+
+    try:
+        policy = create_upload_policy(
+            s3,
+            bucket_name,
+            f"{course_id}-syllabus.pdf",
+            "application/pdf",
+            current_app.config["SYLLABUS_MAX_UPLOAD_BYTES"],
+            expiration=current_app.config["UPLOAD_POLICY_EXPIRATION"],
+        )
     except botocore.exceptions.NoCredentialsError:
-        # Redirect to course detail page with failure message
+        return (
+            jsonify(
+                {"message": "AWS authentication failed. Check your AWS keys."}
+            ),
+            500,
+        )
+    return jsonify({"key": f"{course_id}-syllabus.pdf", **policy})
+
+
+@courses_blueprint.route("/upload_complete/<course_id>", methods=["POST"])
+def upload_complete(course_id):
+    """
+    Callback made by the browser once a direct syllabus upload finished.
+    Queues the same syllabus analysis as a regular form upload.
+    """
+    # The browser may call back even though the upload itself failed
+    manifest = current_app.config["SYLLABUS_MANIFEST"]
+    if manifest.record_upload(course_id) is None:
         return redirect(
             url_for(
                 "courses.course_detail",
                 course_id=course_id,
-                message="AWS authentication failed. Check your AWS keys.",
-                username=username,
+                message="Syllabus upload did not complete. Please try again.",
             )
         )
+    return queue_syllabus_analysis(course_id)
 
 
-# Update the record in mock_course_info.csv file
-def update_csv(course_id, pdf_name, api_response):
+def queue_syllabus_analysis(course_id):
     """
-    Update the information of a course in the mock_course_info.csv file.
+    Queue the analysis of the syllabus stored for a course and redirect to
+    the course detail page, which polls the job until it is done.
+    """
+    job_id = current_app.config["SYLLABUS_JOBS"].submit(
+        {"course_id": course_id}
+    )
+    return redirect(
+        url_for(
+            "courses.course_detail",
+            course_id=course_id,
+            job_id=job_id,
+            message="File uploaded successfully! Analyzing the syllabus...",
+            username=current_app.config["username"],
+        )
+    )
 
+
+@courses_blueprint.route("/jobs/<job_id>")
+def job_status(job_id):
+    """
+    Return the status and progress of a syllabus analysis job.
     """
-    course_info = parse_course_info(api_response)
+    job = current_app.config["SYLLABUS_JOBS"].get(job_id)
+    if job is None:
+        return jsonify({"message": "Job not found"}), 404
+    return jsonify(
+        {
+            "id": job["id"],
+            "course_id": job["payload"].get("course_id"),
+            "status": job["status"],
+            "progress": job["progress"],
+            "message": job["message"],
+        }
+    )
 
-    df = pd.read_csv(MOCK_COURSE_INFO_CSV).dropna(how="all")
 
-    # Check if the course ID exists in the DataFrame
-    if course_id in df["course"].dropna().values:
-        # Update existing course information
-        for column, value in course_info.items():
-            df.loc[df["course"] == course_id, column] = value
+def process_syllabus(payload, report):
+    """
+    Background job analyzing the syllabus stored for a course. Saves the
+    extracted course information and course works and adds the course works
+    to the TODO list. report(stage) records the progress of the job.
+    """
+    course_id = payload["course_id"]
+    bucket_name = current_app.config["BUCKET_NAME"]  # S3 bucket name
+    s3 = current_app.config["S3_CLIENT"]  # S3 client
+    pdf_filename = f"{course_id}-syllabus.pdf"  # Name of the stored PDF
+
+    # Look up the syllabus in the manifest
+    syllabus = current_app.config["SYLLABUS_MANIFEST"].get(course_id)
+    if syllabus is not None:
+        report("extracting text")
+        pdf_text = extract_text_from_pdf(syllabus["key"], bucket_name, s3)
+        report("extracting course works")
+        # Extract the validated list of course works from PDF
+        course_work_list = extract_course_work_details(pdf_text)
+        report("extracting course information")
+        # Extract the course information columns
+        course_info = extract_course_info(pdf_text)
     else:
-        # Add new course information
-        new_data = pd.DataFrame(
-            [
-                {
-                    **{"course": course_id, "course_syllabus": pdf_name},
-                    **course_info,
-                }
-            ]
+        course_info = {}  # Empty course info
+        course_work_list = []  # No course works
+
+    report("saving")
+    course_catalog = current_app.config["COURSE_CATALOG"]
+    # Upsert the uploaded file details and course info
+    course_catalog.upsert_course_info(course_id, pdf_filename, course_info)
+    # Replace the course works of the course
+    course_catalog.replace_course_works(course_id, course_work_list)
+
+    report("adding tasks")
+    # Add the course works to the TODO list, skipping the tasks an earlier
+    # attempt of this job already added
+    tasks = [
+        (
+            row["course"],
+            row["course_work"],
+            row["due_date"],
+            str(row["score_distribution"]),
         )
-        df = pd.concat([df, new_data], ignore_index=True)
-
-    # Fill NaN values with "Not Found"
-    df.fillna("Not Found", inplace=True)
-
-    # Write updated DataFrame back to CSV file
-    df.to_csv(MOCK_COURSE_INFO_CSV, index=False)
+        for row in course_catalog.get_course_works(course_id)
+    ]
+    add_tasks_todo(
+        tasks,
+        3,  # Estimated hours for each task
+        s3,
+        bucket_name,
+        current_app.config["MOCK_DATA_POC_TASKS"],
+    )
+    return "Syllabus analyzed successfully!"
 
 
 def parse_course_info(api_response):
@@ -463,51 +527,31 @@ def parse_course_info(api_response):
     for match in matches:
         title = match[0].strip()
         if title in TITLE_TO_COLUMN_MAPPING and title not in found_titles:
-            found_titles.add(title)
             info = match[1].rstrip(" #").strip()
-            if info == "":
-                info = "Not Found"
-            info_dict[TITLE_TO_COLUMN_MAPPING[title]] = info
+            column = TITLE_TO_COLUMN_MAPPING[title]
+            if info == "" or info == "Not Found":
+                # A later segment of the syllabus may still have it
+                info_dict.setdefault(column, "Not Found")
+                continue
+            found_titles.add(title)
+            info_dict[column] = info
 
     return info_dict
 
 
-def check_syllabus_exists(course_id, s3, bucket_name):
-    """
-    Check if syllabus PDF exists in the specified S3 bucket for a given
-    course ID.
-    """
-    try:
-        pdf_name = course_id + "-syllabus.pdf"  # Construct PDF name
-        s3.head_object(Bucket=bucket_name, Key=pdf_name)  # Check if exists
-        return True, pdf_name  # Syllabus exists
-    except botocore.exceptions.ClientError as e:
-        if e.response["Error"]["Code"] == "404":  # Syllabus not found
-            return False, None
-        else:
-            raise e  # Other error, re-raise
-
-
 # Extracts text from a PDF file.
-def extract_text_from_pdf(filename, bucket_name, s3):
+def extract_text_from_pdf(filename, bucket_name, s3, extractor=None):
     """
     Extracts text content from a PDF file stored in an S3 bucket.
     """
     # Retrieve the PDF file from S3 bucket
     response = s3.get_object(Bucket=bucket_name, Key=filename)
     pdf_file = response["Body"].read()
-    pdf_file_obj = io.BytesIO(pdf_file)
 
-    # Read PDF using PyPDF2
-    pdf_reader = pypdf.PdfReader(pdf_file_obj)
-    text = ""
-
-    # Iterate through each page and extract text
-    for page_num in range(len(pdf_reader.pages)):
-        page = pdf_reader.pages[page_num]
-        text += page.extract_text() if page.extract_text() else ""
-
-    return text
+    # Extract every page once, cached by the content hash of the PDF
+    if extractor is None:
+        extractor = current_app.config["PDF_EXTRACTOR"]
+    return extractor.extract_text(pdf_file)
 
 
 def update_csv_after_deletion(course_id):
@@ -517,87 +561,185 @@ def update_csv_after_deletion(course_id):
     pass
 
 
-def extract_course_work_details(syllabus_text, max_tokens=4097):
+def extract_course_work_details(
+    syllabus_text, max_tokens=SYLLABUS_CHUNK_TOKENS, executor=None, cache=None
+):
     """
-    Extracts course work details from a syllabus text.
+    Extracts the list of course works from a syllabus text. The grading
+    sections are sent to OpenAI once, in chunks if they exceed the token
+    limit, and the per-chunk lists are merged, deduplicated and validated.
     """
-    if estimate_token_count(syllabus_text) <= max_tokens:
-        api_result = process_course_work_with_openai(syllabus_text)
-        # API result contains course work details.
-        return api_result
+    # Plain grading tables are parsed locally without calling OpenAI
+    course_works, confidence = extract_course_works_by_rules(syllabus_text)
+    if confidence >= RULE_EXTRACTION_CONFIDENCE:
+        return course_works
+
+    segments = chunk_course_work_text(syllabus_text, max_tokens)
+    if len(segments) == 1:
+        responses = [process_course_work_with_openai(segments[0], cache)]
     else:
         # If syllabus exceeds token limit, process in segments.
-        return process_course_work_in_segments(syllabus_text, max_tokens)
+        responses = run_segments(
+            process_course_work_with_openai, segments, executor, cache
+        )
+    return merge_course_works(
+        parse_course_work_list(response) for response in responses
+    )
 
 
 def estimate_token_count(text):
     """
     Helper function to estimate the number of tokens
     """
-    return len(text) // 4  # A rough estimate
+    return count_tokens(text)  # Local approximation of the tokenizer
 
 
-def analyze_course_content(pdf_text, max_tokens=4097):
+def extract_course_info(
+    pdf_text, max_tokens=SYLLABUS_CHUNK_TOKENS, executor=None, cache=None
+):
+    """
+    Extract the course information columns of a syllabus. Columns the
+    local rules find, or are confident the syllabus does not have, are
+    final. OpenAI is only asked for the columns below the confidence
+    threshold, with a prompt listing just those.
     """
-    Modified analyze_course_content function
+    course_info, confidence = extract_course_info_by_rules(pdf_text)
+    uncertain = [
+        column
+        for column, score in confidence.items()
+        if score < RULE_EXTRACTION_CONFIDENCE
+    ]
+    if not uncertain:
+        return course_info
+
+    titles = [
+        title
+        for title, column in TITLE_TO_COLUMN_MAPPING.items()
+        if column in uncertain
+    ]
+    api_info = parse_course_info(
+        analyze_course_content(pdf_text, max_tokens, executor, cache, titles)
+    )
+    for column in uncertain:
+        value = api_info.get(column, "Not Found")
+        if value != "Not Found":
+            course_info[column] = value
+    return course_info
+
+
+def analyze_course_content(
+    pdf_text,
+    max_tokens=SYLLABUS_CHUNK_TOKENS,
+    executor=None,
+    cache=None,
+    titles=None,
+):
+    """
+    Modified analyze_course_content function. titles are the course
+    information titles to ask for, all of them by default.
     """
     # Estimate the token count
     if estimate_token_count(pdf_text) <= max_tokens:
         # If within token limit, process normally
-        return process_text_with_openai(pdf_text)
+        return process_text_with_openai(pdf_text, cache, titles)
     else:
         # If over the limit, split the text and process in segments
-        return process_text_in_segments(pdf_text, max_tokens)
+        return process_text_in_segments(
+            pdf_text, max_tokens, executor, cache, titles
+        )
 
 
-def process_course_work_in_segments(text, max_tokens):
+def process_text_in_segments(
+    text, max_tokens, executor=None, cache=None, titles=None
+):
     """
-    Process the given text in segments to ensure it fits within the specified
-    maximum token limit per segment.
+    Process the input text in segments to ensure it fits within the specified
+    token limit.
     """
-    # Calculate the length of each segment based on the maximum allowed tokens
-    segment_length = max_tokens * 4
-
-    # Divide the input text into segments of specified length
-    segments = [
-        text[i: i + segment_length]
-        for i in range(0, len(text), segment_length)
-    ]
-
-    full_output = ""
+    segments = chunk_text(text, max_tokens)
+    outputs = run_segments(
+        partial(process_text_with_openai, titles=titles),
+        segments,
+        executor,
+        cache,
+    )
+    return "".join(output + "\n\n" for output in outputs)
 
-    # Process each segment independently and concatenate the results
-    for segment in segments:
-        full_output += process_course_work_with_openai(segment) + "\n\n"
 
-    return full_output
+def run_segments(function, segments, executor=None, cache=None):
+    """
+    Run an OpenAI call for every segment on the rate limited LLM executor
+    and return the outputs in segment order.
+    """
+    if executor is None:
+        executor = current_app.config["LLM_EXECUTOR"]
+    # The tasks run in a copy of this context, so without an explicit
+    # cache chat_completion still finds the LLM_CACHE of the app
+    function = partial(function, cache=cache)
+    # Prompt and completion tokens are charged on top of the segment itself
+    token_counts = [
+        estimate_token_count(segment) + LLM_TOKENS_PER_CALL_OVERHEAD
+        for segment in segments
+    ]
+    return executor.map(function, segments, token_counts)
 
 
-def process_text_in_segments(text, max_tokens):
+def chat_completion(
+    system_message, prompt, template_version, text, cache=None
+):
     """
-    Process the input text in segments to ensure it fits within the specified
-    token limit.
+    Get the ChatCompletion response to a prompt built from text. Responses
+    are served from the LLM cache when the same text was sent before with
+    the same model, system message and prompt template version.
     """
-    segment_length = (
-        max_tokens * 4
-    )  # Roughly estimate segment length in characters
+    if cache is None and has_app_context():
+        cache = current_app.config.get("LLM_CACHE")
+    if cache is not None:
+        key = make_cache_key(LLM_MODEL, system_message, template_version, text)
+        cached_response = cache.get(key)
+        if cached_response is not None:
+            return cached_response
+
+    # Getting response from OpenAI ChatCompletion API
+    with track_llm_call() as call:
+        response = openai.ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": system_message},
+                {"role": "user", "content": prompt},
+            ],
+        )
+        call["usage"] = response.get("usage")
+    content = response["choices"][0]["message"]["content"].strip()
 
-    full_output = ""
-    start_index = 0
+    if cache is not None:
+        cache.put(key, LLM_MODEL, content)
+    return content
 
-    while start_index < len(text):
-        end_index = min(start_index + segment_length, len(text))
-        segment = text[start_index:end_index]
-        full_output += process_text_with_openai(segment) + "\n\n"
-        start_index += segment_length
 
-    return full_output
+def course_info_template(titles):
+    """
+    Numbered answer template of the course info prompt for the given
+    titles.
+    """
+    lines = []
+    for number, title in enumerate(titles, start=1):
+        lines.append(f"{number}. {title}:")
+        if TITLE_TO_COLUMN_MAPPING[title] == "TAs":
+            lines.append(
+                "(template: Jane Qin: qinj15@mcmaster.ca; "
+                "Qianni Wang: qian12@mcmaster.ca#)"
+            )
+    return "\n    ".join(lines)
 
 
-def process_text_with_openai(text):
+def process_text_with_openai(text, cache=None, titles=None):
     """
-    Function to process a text segment with OpenAI fot extract course info
+    Function to process a text segment with OpenAI fot extract course info.
+    Only the given titles are asked for, all of them by default.
     """
+    if titles is None:
+        titles = list(TITLE_TO_COLUMN_MAPPING)
 
     # Constructing a prompt for OpenAI based on the given text segment
     prompt = f"""
@@ -607,34 +749,22 @@ def process_text_with_openai(text):
     inform the ending! If you do not found, put a String "Not Found" in the
     corresponding area of the return template!
     Template:
-    1. Instructor Name:
-    2. Instructor Email:
-    3. Instructor Office Hour:
-    4. Required and Optional Textbook List:
-    5. Lecture Schedule List with Location:
-    6. Tutorials Schedule List with Location:
-    7. Course Teaching Assistants (TAs) Name and Email List:
-    (template: Jane Qin: qinj15@mcmaster.ca; Qianni Wang: qian12@mcmaster.ca#)
-    8. Course Introduction:
-    9. Course Goal/Mission:
-    10. MSAF Policy:
+    {course_info_template(titles)}
 
     Syllabus Content:
     {text}
     """
-    # Getting response from OpenAI ChatCompletion API
-    response = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt},
-        ],
+    return chat_completion(
+        "You are a helpful assistant.",
+        prompt,
+        # Prompts asking for different titles are cached apart
+        f"{COURSE_INFO_PROMPT_VERSION}:{';'.join(titles)}",
+        text,
+        cache,
     )
 
-    return response["choices"][0]["message"]["content"].strip()
-
 
-def process_course_work_with_openai(syllabus_text):
+def process_course_work_with_openai(syllabus_text, cache=None):
     """
     Function to process a text segment with OpenAI for coursework info
     """
@@ -668,71 +798,10 @@ def process_course_work_with_openai(syllabus_text):
     Syllabus Content:
     {syllabus_text}
     """
-    # Getting response from OpenAI ChatCompletion API
-    response = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a human teaching assistant.",
-            },
-            {"role": "user", "content": prompt},
-        ],
+    return chat_completion(
+        "You are a human teaching assistant.",
+        prompt,
+        COURSE_WORK_PROMPT_VERSION,
+        syllabus_text,
+        cache,
     )
-
-    return response["choices"][0]["message"]["content"].strip()
-
-
-def write_course_work_to_csv(course_work_list, course_id):
-    """
-    Write course work information to a CSV file.
-
-    """
-    # File path for CSV where course work information is stored
-    csv_file_path = COURSE_WORK_EXTRACTED_INFO
-
-    # Headers for CSV columns
-    headers = [
-        "course id",
-        "course work",
-        "start date",
-        "due date",
-        "score distribution",
-    ]
-
-    # Open CSV file in append mode
-    with open(csv_file_path, mode="a", newline="", encoding="utf-8") as file:
-        # Initialize CSV writer with specified headers
-        writer = csv.DictWriter(file, fieldnames=headers)
-
-        # Write header if file is empty
-        if file.tell() == 0:
-            writer.writeheader()
-
-        # Iterate over course work list
-        for item in course_work_list:
-            # Prepare a row for writing into CSV
-            row = {
-                "course id": course_id,  # Course ID
-                "course work": item.get("Course Work Name", "Not Found"),
-                "start date": item.get("Start Date", "Not Found"),
-                "due date": item.get("Due Date", "Not Found"),
-                "score distribution": str(
-                    item.get("Score Distribution", "Not Found")
-                ),
-            }
-            # Write row into CSV
-            writer.writerow(row)
-
-
-def convert_to_list_of_dicts(course_work_data):
-    """
-    Convert course work data from JSON format to a list of dictionaries.
-    """
-    try:
-        # Attempt to parse JSON string into a list of dictionaries
-        course_work_list = json.loads(course_work_data)
-        return course_work_list
-    except json.JSONDecodeError:
-        # Return an empty list if JSON decoding fails
-        return []
@@ -0,0 +1,154 @@
+"""
+Filename: <course_work_extraction.py>
+
+Description:
+    Turns the OpenAI responses for the syllabus segments into one validated
+    list of course works. Every segment response is parsed on its own, the
+    lists are merged with duplicates removed, dates are checked to be real
+    yyyy-mm-dd dates and weights to be percentages.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import ast
+import json
+import re
+from datetime import datetime
+
+NOT_FOUND = "Not Found"
+
+# Date formats the model sometimes answers with instead of yyyy-mm-dd
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%B %d, %Y", "%b %d, %Y")
+
+# Keys every parsed course work must have, the dates may be missing
+REQUIRED_KEYS = ("Course Work Name", "Score Distribution")
+
+
+def parse_course_work_list(response):
+    """
+    Parse one model response into a list of dictionaries. The response is
+    asked to be a Python list, so both JSON and Python literals are
+    accepted, also when surrounded by other text. Returns [] if nothing
+    can be parsed. Items that are not course work dictionaries are
+    dropped.
+    """
+    if not isinstance(response, str):
+        return []
+    start = response.find("[")
+    end = response.rfind("]")
+    if start == -1 or end < start:
+        return []
+    candidate = response[start: end + 1]
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            parsed = parse(candidate)
+        # literal_eval raises TypeError on unhashable keys like {[1]: 2}
+        # and MemoryError or RecursionError on deeply nested input
+        except (
+            ValueError,
+            SyntaxError,
+            TypeError,
+            MemoryError,
+            RecursionError,
+        ):
+            continue
+        if isinstance(parsed, list):
+            return [
+                item
+                for item in parsed
+                if isinstance(item, dict)
+                and all(key in item for key in REQUIRED_KEYS)
+            ]
+    return []
+
+
+def normalize_date(value):
+    """
+    Return the date as yyyy-mm-dd, or "Not Found" if it is not a valid date.
+    """
+    if not isinstance(value, str):
+        return NOT_FOUND
+    value = value.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return NOT_FOUND
+
+
+def normalize_weight(value):
+    """
+    Return the weight as a number in (0, 100], or None if it is not one.
+    Accepts numbers as well as strings such as "25" or "25%".
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*%?\s*", value)
+        if not match:
+            return None
+        value = float(match.group(1))
+    if not isinstance(value, (int, float)) or not 0 < value <= 100:
+        return None
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def validate_course_work(item):
+    """
+    Return a cleaned course work dictionary, or None if it has no name or
+    no valid score distribution.
+    """
+    name = item.get("Course Work Name")
+    if not isinstance(name, str) or not name.strip():
+        return None
+    weight = normalize_weight(item.get("Score Distribution"))
+    if weight is None:
+        return None
+    start_date = normalize_date(item.get("Start Date"))
+    due_date = normalize_date(item.get("Due Date"))
+    # A start date after the deadline is a misread, keep only the deadline
+    if NOT_FOUND not in (start_date, due_date) and start_date > due_date:
+        start_date = NOT_FOUND
+    return {
+        "Course Work Name": " ".join(name.split()),
+        "Start Date": start_date,
+        "Due Date": due_date,
+        "Score Distribution": weight,
+    }
+
+
+def merge_course_works(course_work_lists):
+    """
+    Merge the per-segment course work lists in order. A course work with
+    the same name as an earlier one is a duplicate if their due dates agree
+    or one of them is missing; its known dates fill in the earlier entry.
+    """
+    merged = []
+    by_name = {}
+    for course_work_list in course_work_lists:
+        for item in course_work_list:
+            course_work = validate_course_work(item)
+            if course_work is None:
+                continue
+            key = course_work["Course Work Name"].casefold()
+            duplicate = None
+            for existing in by_name.get(key, []):
+                due_dates = {existing["Due Date"], course_work["Due Date"]}
+                if len(due_dates - {NOT_FOUND}) <= 1:
+                    duplicate = existing
+                    break
+            if duplicate is None:
+                merged.append(course_work)
+                by_name.setdefault(key, []).append(course_work)
+                continue
+            for field in ("Start Date", "Due Date"):
+                if duplicate[field] == NOT_FOUND:
+                    duplicate[field] = course_work[field]
+
+    total_weight = sum(item["Score Distribution"] for item in merged)
+    if total_weight > 100:
+        print(f"Extracted course works add up to {total_weight}%")
+    return merged
@@ -0,0 +1,47 @@
+"""
+Filename: <direct_uploads.py>
+
+Description:
+    Helpers for direct-to-storage browser uploads. The server only issues a
+    constrained presigned POST policy (content type, maximum size and key
+    prefix); the browser then uploads the file straight to AWS S3 (or the
+    local storage stand-in) and calls back once the upload is complete, so
+    no Flask worker is tied up streaming the file.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+
+def create_upload_policy(
+    s3,
+    bucket_name,
+    key,
+    content_type,
+    max_size,
+    key_prefix="",
+    expiration=600,
+):
+    """
+    Create a presigned POST policy allowing exactly one object to be
+    uploaded under the given key. Returns a dictionary with the "url" to
+    post to and the form "fields" to send along with the file.
+    """
+    if not key.startswith(key_prefix):
+        raise ValueError(f"Key {key} is outside of prefix {key_prefix}")
+
+    conditions = [
+        {"Content-Type": content_type},
+        ["content-length-range", 1, max_size],
+    ]
+    if key_prefix:
+        conditions.append(["starts-with", "$key", key_prefix])
+
+    return s3.generate_presigned_post(
+        Bucket=bucket_name,
+        Key=key,
+        Fields={"Content-Type": content_type},
+        Conditions=conditions,
+        ExpiresIn=expiration,
+    )
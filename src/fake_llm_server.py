@@ -0,0 +1,99 @@
+"""
+Filename: <fake_llm_server.py>
+
+Description:
+    Local stand-in for the OpenAI chat completions API, used to exercise
+    syllabus processing offline. Latency and the share of rate limited
+    (HTTP 429) responses can be injected to test concurrency and retries.
+
+    Run from the repository root:
+        python -m src.fake_llm_server --port 8001 --latency 2
+    and point the app at it with:
+        export OPENAI_API_BASE=http://127.0.0.1:8001/v1
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from flask import Flask, jsonify, request
+
+
+def create_fake_llm_app(latency=0.0, error_rate=0.0, reply=None):
+    """
+    Create the fake API. Every completion waits `latency` seconds, a share
+    `error_rate` of the calls is rejected with 429, and the reply is either
+    the fixed `reply` or an echo of the end of the last user message.
+    """
+    fake_app = Flask(__name__)
+    fake_app.config["CALLS"] = 0
+
+    @fake_app.route("/v1/chat/completions", methods=["POST"])
+    def chat_completions():
+        fake_app.config["CALLS"] += 1
+        time.sleep(latency)
+        if random.random() < error_rate:
+            return (
+                jsonify(
+                    {
+                        "error": {
+                            "message": "Rate limit reached",
+                            "type": "requests",
+                        }
+                    }
+                ),
+                429,
+            )
+
+        body = request.get_json()
+        user_messages = [
+            message["content"]
+            for message in body["messages"]
+            if message["role"] == "user"
+        ]
+        content = reply
+        if content is None:
+            content = user_messages[-1].strip()[-80:] if user_messages else ""
+        return jsonify(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "total_tokens": 0,
+                },
+            }
+        )
+
+    return fake_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI API server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reply", type=str, default=None)
+    args = parser.parse_args()
+
+    fake_app = create_fake_llm_app(args.latency, args.error_rate, args.reply)
+    fake_app.run(port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
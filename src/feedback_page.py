@@ -6,24 +6,36 @@ Description:
     using AWS S3 for storage. Feedback is categorized as 'viewed' or 'pending'.
     This module facilitates feedback form rendering, submission to S3, and
     retrieval/display of feedback from S3 based on user interactions.
+    Feedback is kept in the FeedbackStore as per-user records, so the page
+    only reads the current user's feedback. Developers triage feedback
+    through the token protected /triage routes.
 
 Author: Qianni Wang
 Created: 2024-01-23
-Last Modified: 2024-04-03
+Last Modified: 2026-10-19
 """
 
+import hmac
+import json
+from functools import wraps
+from itertools import islice
+
 from flask import (
     Blueprint,
+    Response,
     render_template,
     current_app,
     request,
     redirect,
     url_for,
+    jsonify,
+    stream_with_context,
 )
 
-import os
-import uuid
-import pandas as pd
+try:
+    from src.feedback_store import PENDING, VIEWED
+except ImportError:
+    from .feedback_store import PENDING, VIEWED
 
 feedback_blueprint = Blueprint("feedback", __name__)
 
@@ -34,22 +46,20 @@ def feedback_page():
     Route to the feedback page.
     """
     # Retrieve necessary configurations
-    bucket_name = current_app.config["BUCKET_NAME"]
-    s3 = current_app.config["S3_CLIENT"]
-    username = current_app.config["username"]
+    user_id = current_app.config["userId"]
     current_page = current_app.config["current_page"]
     current_app.config["current_page"] = "feedback_page"
 
-    # Read feedback data from S3 bucket
-    df = read_feedback_csv_from_s3(s3, bucket_name, "feedback.csv")
-
-    # Filter feedback data for the current user
-    viewed = df.loc[(df["username"] == username) & (df["status"] == 1)]
-    pending = df.loc[(df["username"] == username) & (df["status"] == 0)]
-
-    # Convert filtered feedback data to dictionaries
-    viewed_feedback_list = viewed.to_dict("records")
-    pending_feedback_list = pending.to_dict("records")
+    # Read only the current user's feedback
+    feedback_list = current_app.config["FEEDBACK_STORE"].list_feedback(
+        user_id
+    )
+    viewed_feedback_list = [
+        item for item in feedback_list if item["status"] == VIEWED
+    ]
+    pending_feedback_list = [
+        item for item in feedback_list if item["status"] == PENDING
+    ]
 
     # Render feedback page with relevant data
     return render_template(
@@ -61,34 +71,12 @@ def feedback_page():
     )
 
 
-def read_feedback_csv_from_s3(s3, bucket_name, key):
-    """
-    Read feedback CSV file from Amazon S3 bucket.
-    """
-    try:
-        # Get object from S3 bucket
-        response = s3.get_object(Bucket=bucket_name, Key=key)
-
-        # Read CSV into a DataFrame
-        df = pd.read_csv(response["Body"])
-
-        # Fill NaN values with empty string
-        df.fillna("", inplace=True)
-
-        return df
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        return pd.DataFrame(columns=["username", "orders"])
-
-
 @feedback_blueprint.route("/submit_feedback", methods=["POST"])
 def submit_feedback():
     """
     Store the feedback data in an Amazon S3 bucket.
     """
-    bucket_name = current_app.config["BUCKET_NAME"]
-    s3 = current_app.config["S3_CLIENT"]
-    username = current_app.config["username"]
+    user_id = current_app.config["userId"]
 
     if request.method == "POST":
         # Extract feedback data from the form
@@ -97,62 +85,145 @@ def submit_feedback():
         feedback_type = request.form["feedback_type"]
         feedback = request.form["feedback"]
 
-        # Generate a unique feedback ID
-        feedback_id = str(uuid.uuid4())
-
-        # Construct a dictionary to create a DataFrame for the new feedback
-        feedback_data = {
-            "feedback_id": [feedback_id],
-            "username": [username],
-            "name": [name],
-            "email": [email],
-            "feedback_type": [feedback_type],
-            "feedback": [feedback],
-            "status": [0],  # Initial status is set to 0
-            "developer_feedback": [""],  # Developer feedback initially empty
-        }
-        new_feedback_df = pd.DataFrame(feedback_data)
-
-        # Path to the feedback data file in the S3 bucket
-        feedback_data_path = "feedback.csv"
-
-        try:
-            # Try to read existing feedback data from S3
-            response = s3.get_object(
-                Bucket=bucket_name, Key=feedback_data_path
-            )
-            feedback_df = pd.read_csv(response["Body"])
-        except s3.exceptions.NoSuchKey:
-            # If no such key (file) exists, create an empty DataFrame
-            feedback_df = pd.DataFrame(
-                columns=[
-                    "feedback_id",
-                    "username",
-                    "name",
-                    "email",
-                    "feedback_type",
-                    "feedback",
-                    "status",
-                    "developer_feedback",
-                ]
+        # Store the feedback as a new record in the user's shard
+        current_app.config["FEEDBACK_STORE"].submit(
+            user_id, name, email, feedback_type, feedback
+        )
+
+    # Redirect to the feedback page
+    return redirect(url_for("feedback.feedback_page"))
+
+
+def require_triage_token(view):
+    """
+    Only let requests with the developer triage token through, sent as
+    "Authorization: Bearer <token>".
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get("FEEDBACK_TRIAGE_TOKEN")
+        if not token:
+            return jsonify({"message": "Feedback triage is disabled"}), 403
+        auth = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth.encode(), f"Bearer {token}".encode()):
+            return (
+                jsonify({"message": "Invalid triage token"}),
+                401,
+                {"WWW-Authenticate": "Bearer"},
             )
+        return view(*args, **kwargs)
+
+    return wrapper
 
-        # Concatenate new feedback DataFrame with existing data
-        feedback_df = pd.concat(
-            [feedback_df, new_feedback_df], ignore_index=True
-        )
 
-        # Temporary file path to save the updated CSV
-        new_csv_file_path = "poc-data/tmp.csv"
+def triage_filters(default_status):
+    """
+    Filters of the triage routes from the query string. ?status=all
+    matches every status.
+    """
+    status = request.args.get("status", default_status)
+    user_id = request.args.get("user_id")
+    return {
+        "user_id": None if user_id is None else int(user_id),
+        "feedback_type": request.args.get("feedback_type") or None,
+        "status": None if status == "all" else int(status),
+    }
 
-        # Write the updated DataFrame to a temporary CSV file
-        feedback_df.to_csv(new_csv_file_path, index=False)
 
-        # Upload the temporary CSV file to the S3 bucket
-        s3.upload_file(new_csv_file_path, bucket_name, feedback_data_path)
+def with_username(item):
+    """
+    Add the current username of its user to a feedback.
+    """
+    user_directory = current_app.config["USER_DIRECTORY"]
+    item["username"] = user_directory.get_username(item["user_id"])
+    return item
 
-        # Remove the temporary CSV file
-        os.remove(new_csv_file_path)
 
-    # Redirect to the feedback page
-    return redirect(url_for("feedback.feedback_page"))
+@feedback_blueprint.route("/triage/feedback", methods=["GET"])
+@require_triage_token
+def triage_list():
+    """
+    Page through the feedback of all users, pending feedback by default.
+    Pass the returned next_cursor as ?cursor= to get the next page.
+    """
+    try:
+        filters = triage_filters(str(PENDING))
+        limit = min(max(int(request.args.get("limit", 50)), 1), 200)
+    except ValueError:
+        return jsonify({"message": "Invalid filter or limit"}), 400
+    store = current_app.config["FEEDBACK_STORE"]
+    # The indexes are filtered first, only the records on the page are read
+    entries = store.iter_index(
+        filters["user_id"],
+        request.args.get("cursor"),
+        status=filters["status"],
+        feedback_type=filters["feedback_type"],
+    )
+    page = list(islice(entries, limit + 1))
+    # There is at least one more match after a full page
+    next_cursor = page[limit - 1][0] if len(page) > limit else None
+    items = [
+        with_username(store.load_feedback(key, entry))
+        for key, entry in page[:limit]
+    ]
+    return jsonify({"items": items, "next_cursor": next_cursor})
+
+
+@feedback_blueprint.route("/triage/feedback", methods=["PATCH"])
+@require_triage_token
+def triage_update():
+    """
+    Apply a list of status and developer feedback updates, e.g.
+    {"updates": [{"user_id": ..., "feedback_id": ..., "status": 1,
+    "developer_feedback": ...}]}, with one write per affected user.
+    """
+    data = request.get_json(silent=True) or {}
+    updates = data.get("updates")
+    if not isinstance(updates, list) or not updates:
+        return jsonify({"message": "No updates"}), 400
+    for update in updates:
+        if (
+            not isinstance(update, dict)
+            or type(update.get("user_id")) is not int
+            or not update.get("feedback_id")
+            or update.get("status", PENDING) not in (PENDING, VIEWED)
+            or not isinstance(update.get("developer_feedback", ""), str)
+        ):
+            message = {"message": "Invalid update", "update": update}
+            return jsonify(message), 400
+
+    store = current_app.config["FEEDBACK_STORE"]
+    updated, unknown = store.apply_updates(updates)
+    return jsonify({"updated": len(updated), "unknown": unknown})
+
+
+@feedback_blueprint.route("/triage/export", methods=["GET"])
+@require_triage_token
+def triage_export():
+    """
+    Stream the feedback matching the triage filters as NDJSON, all
+    statuses by default.
+    """
+    try:
+        filters = triage_filters("all")
+    except ValueError:
+        return jsonify({"message": "Invalid filter"}), 400
+    store = current_app.config["FEEDBACK_STORE"]
+
+    def generate():
+        feedback = store.iter_feedback(
+            filters["user_id"],
+            status=filters["status"],
+            feedback_type=filters["feedback_type"],
+        )
+        for _, item in feedback:
+            yield json.dumps(with_username(item)) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={
+            "Content-Disposition": "attachment; filename=feedback.ndjson"
+        },
+    )
@@ -0,0 +1,442 @@
+"""
+Filename: <feedback_store.py>
+
+Description:
+    Feedback storage sharded by user in AWS S3. Every submitted feedback is
+    an immutable JSON record under the prefix of its user, listed in a
+    small per-user index next to the records with its key, type, status
+    and developer response. The index entry is written as pending when the
+    feedback is submitted, and the index is updated with conditional
+    writes on its ETag so concurrent submissions and triage updates are
+    never lost. Listing feedback filters the indexes and fetches only the
+    records returned, which are cached in memory since they never change.
+
+    The feedback of the old single feedback.csv can be imported with:
+        python -m src.feedback_store migrate
+    and records missing from their user's index are added to it with:
+        python -m src.feedback_store reindex
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import argparse
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+
+import botocore.exceptions
+
+try:
+    from src.local_storage import is_precondition_failed, write_conditions
+except ImportError:
+    from .local_storage import is_precondition_failed, write_conditions
+
+PENDING = 0
+VIEWED = 1
+# Attempts of an index update that keeps losing to other writers
+MAX_WRITE_ATTEMPTS = 10
+
+
+class FeedbackStore:
+    """
+    Append-only per-user feedback records with a per-user status index.
+    """
+
+    def __init__(self, s3, bucket_name, prefix="feedback/", cache_size=10000):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        # Number of feedback records kept in memory
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._records = OrderedDict()
+        # User id -> (ETag, index) of the per-user status index
+        self._indexes = {}
+
+    def _user_prefix(self, user_id):
+        # User ids are quoted so that they cannot escape their shard
+        return f"{self.prefix}users/{quote(str(user_id), safe='')}/"
+
+    def _index_key(self, user_id):
+        return f"{self._user_prefix(user_id)}index.json"
+
+    def submit(self, user_id, name, email, feedback_type, feedback):
+        """
+        Store a new feedback of a user and return its record.
+        """
+        now = datetime.now(timezone.utc)
+        record = {
+            "feedback_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "name": name,
+            "email": email,
+            "feedback_type": feedback_type,
+            "feedback": feedback,
+            "created_at": now.isoformat(),
+        }
+        entry = self._index_entry(self._put_record(record, now), record)
+        self._update_index(
+            user_id,
+            lambda index: index.setdefault(record["feedback_id"], entry),
+        )
+        return record
+
+    @staticmethod
+    def _index_entry(key, record, status=PENDING, developer_feedback=""):
+        return {
+            "key": key,
+            "feedback_type": record.get("feedback_type", ""),
+            "status": status,
+            "developer_feedback": developer_feedback,
+        }
+
+    def _put_record(self, record, created):
+        # Keys sort by submission time within the shard
+        key = (
+            f"{self._user_prefix(record['user_id'])}records/"
+            f"{created.strftime('%Y%m%dT%H%M%S%fZ')}-{record['feedback_id']}"
+            ".json"
+        )
+        self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=json.dumps(record),
+            ContentType="application/json",
+        )
+        self._cache_record(key, record)
+        return key
+
+    def _cache_record(self, key, record):
+        with self._lock:
+            self._records[key] = record
+            self._records.move_to_end(key)
+            while len(self._records) > self.cache_size:
+                self._records.popitem(last=False)
+
+    def _get_record(self, key):
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                self._records.move_to_end(key)
+                return record
+        response = self.s3.get_object(Bucket=self.bucket_name, Key=key)
+        record = json.loads(response["Body"].read())
+        self._cache_record(key, record)
+        return record
+
+    def get_index(self, user_id):
+        """
+        Return the {feedback_id: {"key", "feedback_type", "status",
+        "developer_feedback"}} index of a user, revalidated by ETag.
+        """
+        return self._read_index(user_id)[1]
+
+    def _read_index(self, user_id):
+        """
+        Return the (ETag, index) of a user, with a None ETag when the user
+        has no index yet.
+        """
+        with self._lock:
+            etag, index = self._indexes.get(user_id, (None, {}))
+        kwargs = {"IfNoneMatch": etag} if etag else {}
+        try:
+            response = self.s3.get_object(
+                Bucket=self.bucket_name,
+                Key=self._index_key(user_id),
+                **kwargs,
+            )
+        except botocore.exceptions.ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code in ("304", "NotModified"):
+                return etag, index
+            if code in ("NoSuchKey", "404"):
+                return None, {}
+            raise e
+        index = json.loads(response["Body"].read())
+        with self._lock:
+            self._indexes[user_id] = (response.get("ETag"), index)
+        return response.get("ETag"), index
+
+    def _shard_user_ids(self, start_after=None):
+        """
+        Yield the ids of the users with a shard, in key order, from a
+        listing of the shard prefixes only.
+        """
+        users_prefix = f"{self.prefix}users/"
+        kwargs = {"StartAfter": start_after} if start_after else {}
+        while True:
+            response = self.s3.list_objects_v2(
+                Bucket=self.bucket_name,
+                Prefix=users_prefix,
+                Delimiter="/",
+                **kwargs,
+            )
+            for item in response.get("CommonPrefixes", []):
+                yield unquote(item["Prefix"][len(users_prefix): -1])
+            if not response.get("IsTruncated"):
+                return
+            kwargs = {"ContinuationToken": response["NextContinuationToken"]}
+
+    def iter_index(
+        self, user_id=None, start_after=None, status=None, feedback_type=None
+    ):
+        """
+        Yield (key, index entry) of the feedback of one user, or of all
+        users, in key order, matching the status and feedback type when
+        given. Only the indexes are read. Starts after the key
+        `start_after` when given.
+        """
+        if user_id is None:
+            user_ids = self._shard_user_ids(start_after)
+        else:
+            user_ids = [user_id]
+        for index_user in user_ids:
+            index = self.get_index(index_user)
+            for entry in sorted(index.values(), key=lambda e: e["key"]):
+                if start_after and entry["key"] <= start_after:
+                    continue
+                if status is not None and entry["status"] != status:
+                    continue
+                if (
+                    feedback_type is not None
+                    and entry["feedback_type"] != feedback_type
+                ):
+                    continue
+                yield entry["key"], entry
+
+    def load_feedback(self, key, entry):
+        """
+        Return the feedback record of an index entry with its status and
+        developer feedback.
+        """
+        feedback = dict(self._get_record(key))
+        feedback["status"] = entry["status"]
+        feedback["developer_feedback"] = entry["developer_feedback"]
+        return feedback
+
+    def iter_feedback(self, user_id=None, start_after=None, **filters):
+        """
+        Yield (key, feedback) like iter_index, fetching each record as it
+        is reached.
+        """
+        for key, entry in self.iter_index(user_id, start_after, **filters):
+            yield key, self.load_feedback(key, entry)
+
+    def list_feedback(self, user_id):
+        """
+        Return the feedback of a user, oldest first, with its status and
+        developer feedback.
+        """
+        return [feedback for _, feedback in self.iter_feedback(user_id)]
+
+    def _record_keys(self, user_id):
+        """
+        {feedback id: key} of the records in the shard of a user.
+        """
+        keys = {}
+        kwargs = {}
+        while True:
+            response = self.s3.list_objects_v2(
+                Bucket=self.bucket_name,
+                Prefix=f"{self._user_prefix(user_id)}records/",
+                **kwargs,
+            )
+            for item in response.get("Contents", []):
+                # <timestamp>-<feedback id>.json
+                name = item["Key"].rsplit("/", 1)[-1]
+                keys[name.split("-", 1)[1][: -len(".json")]] = item["Key"]
+            if not response.get("IsTruncated"):
+                return keys
+            kwargs = {"ContinuationToken": response["NextContinuationToken"]}
+
+    def _update_index(self, user_id, change):
+        """
+        Apply change(index) to the latest index of a user and write it back
+        conditionally on its ETag, retrying when another writer changed it
+        first. Returns the written index.
+        """
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            etag, index = self._read_index(user_id)
+            index = dict(index)
+            change(index)
+            try:
+                response = self.s3.put_object(
+                    Bucket=self.bucket_name,
+                    Key=self._index_key(user_id),
+                    Body=json.dumps(index, sort_keys=True),
+                    ContentType="application/json",
+                    **write_conditions(etag),
+                )
+            except botocore.exceptions.ClientError as e:
+                if not is_precondition_failed(e):
+                    raise e
+                continue
+            with self._lock:
+                self._indexes[user_id] = (response.get("ETag"), index)
+            return index
+        raise RuntimeError(
+            f"Could not update {self._index_key(user_id)}, too many writers"
+        )
+
+    def update_index(self, user_id, updates):
+        """
+        Apply {feedback_id: {"status": ..., "developer_feedback": ...}}
+        updates to the index of a user with a single write.
+        """
+
+        def change(index):
+            for feedback_id, update in updates.items():
+                entry = dict(index.get(feedback_id, {}))
+                entry.update(update)
+                index[feedback_id] = entry
+
+        return self._update_index(user_id, change)
+
+    def apply_updates(self, updates):
+        """
+        Apply a list of {"user_id", "feedback_id", "status",
+        "developer_feedback"} updates with one index write per affected
+        user. Returns the ids that were updated and the unknown ids.
+        """
+        by_user = {}
+        for update in updates:
+            fields = {
+                field: update[field]
+                for field in ("status", "developer_feedback")
+                if field in update
+            }
+            by_user.setdefault(update["user_id"], {})[
+                str(update["feedback_id"])
+            ] = fields
+        updated, unknown = [], []
+        for user_id, user_updates in by_user.items():
+            known = self.get_index(user_id)
+            unknown += [key for key in user_updates if key not in known]
+            user_updates = {
+                key: fields
+                for key, fields in user_updates.items()
+                if key in known
+            }
+            if user_updates:
+                self.update_index(user_id, user_updates)
+                updated += list(user_updates)
+        return updated, unknown
+
+    def reindex(self, user_id):
+        """
+        Add the records of a user's shard that are missing from the user's
+        index, keeping the status and developer feedback of entries that
+        have them. Returns the number of added entries.
+        """
+        index = self.get_index(user_id)
+        entries = {
+            feedback_id: self._index_entry(key, self._get_record(key))
+            for feedback_id, key in self._record_keys(user_id).items()
+            if "key" not in index.get(feedback_id, {})
+        }
+        if entries:
+
+            def change(index):
+                for feedback_id, entry in entries.items():
+                    index[feedback_id] = {
+                        **entry,
+                        **index.get(feedback_id, {}),
+                    }
+
+            self._update_index(user_id, change)
+        return len(entries)
+
+    def import_records(self, rows):
+        """
+        Import feedback rows of the old feedback.csv format, keeping their
+        ids, statuses and developer feedback. Records already in the
+        user's shard are not written again and existing index entries are
+        kept, so
+        running the import again neither duplicates records nor undoes
+        triage done since. Returns the number of imported rows.
+        """
+        by_user = {}
+        for row in rows:
+            by_user.setdefault(int(row["user_id"]), []).append(row)
+        created = datetime.now(timezone.utc)
+        count = 0
+        for user_id, user_rows in by_user.items():
+            known = self._record_keys(user_id)
+            entries = {}
+            for row in user_rows:
+                feedback_id = str(row["feedback_id"])
+                record = {
+                    "feedback_id": feedback_id,
+                    "user_id": user_id,
+                    "name": row.get("name", ""),
+                    "email": row.get("email", ""),
+                    "feedback_type": row.get("feedback_type", ""),
+                    "feedback": row.get("feedback", ""),
+                    "created_at": created.isoformat(),
+                }
+                if feedback_id not in known:
+                    known[feedback_id] = self._put_record(record, created)
+                    count += 1
+                entries[feedback_id] = self._index_entry(
+                    known[feedback_id],
+                    record,
+                    int(row.get("status") or PENDING),
+                    row.get("developer_feedback") or "",
+                )
+
+            def change(index, entries=entries):
+                # Entries of an interrupted import are filled in as well
+                for feedback_id, entry in entries.items():
+                    index.setdefault(feedback_id, entry)
+
+            self._update_index(user_id, change)
+        return count
+
+
+def main():
+    import pandas as pd
+
+    from src import config
+    from src.local_storage import create_s3_client
+    from src.user_directory import UserDirectory
+
+    parser = argparse.ArgumentParser(description="Manage the feedback store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser(
+        "migrate", help="Import the feedback of the old feedback CSV"
+    )
+    migrate_parser.add_argument("--key", default="feedback.csv")
+    commands.add_parser(
+        "reindex", help="Add the records missing from the user indexes"
+    )
+    args = parser.parse_args()
+
+    s3 = create_s3_client(config)
+    store = FeedbackStore(
+        s3, config.BUCKET_NAME, prefix=config.FEEDBACK_STORE_PREFIX
+    )
+    if args.command == "reindex":
+        count = sum(
+            store.reindex(user_id) for user_id in store._shard_user_ids()
+        )
+        print(f"Indexed {count} feedback records")
+        return
+    directory = UserDirectory(s3, config.BUCKET_NAME, config.USER_DATA_NAME)
+    response = s3.get_object(Bucket=config.BUCKET_NAME, Key=args.key)
+    df = pd.read_csv(response["Body"]).fillna("")
+    # The old CSV is keyed by username
+    df["user_id"] = [directory.get_user_id(name) for name in df["username"]]
+    for username in df.loc[df["user_id"].isna(), "username"].unique():
+        print(f"Skipping the feedback of unknown user {username}")
+    df = df[df["user_id"].notna()]
+    count = store.import_records(df.to_dict("records"))
+    print(f"Imported {count} feedback records from {args.key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Filename: <focus_analytics.py>
+
+Description:
+    Focus analytics computed from the focus session log joined with the
+    tasks CSV: actual vs. estimated hours per task and course, focus
+    streaks, productivity by hour of day and estimate accuracy ratios.
+    Everything is computed with pandas/NumPy column operations over all
+    sessions at once. The latest result of every recently active user is
+    cached until the user records a new session or the tasks change.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+try:
+    from src.util import get_df_from_csv_in_s3_if_changed
+except ImportError:
+    from .util import get_df_from_csv_in_s3_if_changed
+
+# Number and unit pairs such as "1h30m", "1 hour 30 minutes" or "2 days"
+DURATION_PATTERN = r"(\d+(?:\.\d+)?)\s*([a-z]*)"
+# Hours per unit; a bare number is a number of hours
+UNIT_HOURS = {
+    "": 1,
+    "h": 1,
+    "hr": 1,
+    "hrs": 1,
+    "hour": 1,
+    "hours": 1,
+    "m": 1 / 60,
+    "min": 1 / 60,
+    "mins": 1 / 60,
+    "minute": 1 / 60,
+    "minutes": 1 / 60,
+    "d": 24,
+    "day": 24,
+    "days": 24,
+}
+
+
+def parse_estimated_hours(est_time):
+    """
+    Convert a column of free-form estimated times to hours, summing every
+    number and unit pair of an estimate. NaN where the estimate has no
+    number or a unit that is not known.
+    """
+    parts = est_time.astype(str).str.strip().str.lower()
+    pairs = parts.str.extractall(DURATION_PATTERN)
+    factors = pairs[1].fillna("").map(UNIT_HOURS)
+    hours = (pd.to_numeric(pairs[0]) * factors).groupby(level=0).sum()
+    unknown = factors.isna().groupby(level=0).any()
+    hours[unknown] = np.nan
+    return hours.reindex(est_time.index)
+
+
+def ratio(numerator, denominator):
+    """
+    Element-wise numerator / denominator with NaN instead of infinities.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.asarray(numerator, dtype=float) / np.asarray(
+            denominator, dtype=float
+        )
+    return np.where(np.isfinite(values), values, np.nan)
+
+
+def to_records(df):
+    """
+    DataFrame rows as JSON serializable dictionaries, NaN as None.
+    """
+    df = df.astype(object).where(pd.notna(df), None)
+    return df.to_dict(orient="records")
+
+
+def compute_streaks(session_days, today):
+    """
+    Current and longest runs of consecutive days with a focus session.
+    session_days are dates as days since the epoch.
+    """
+    days = np.unique(session_days)
+    if days.size == 0:
+        return {"current": 0, "longest": 0}
+    # A new run starts wherever the gap to the previous day is not 1
+    run_starts = np.flatnonzero(np.diff(days) != 1) + 1
+    run_lengths = np.diff(np.concatenate(([0], run_starts, [days.size])))
+    today = (today - datetime(1970, 1, 1).date()).days
+    # A streak is still current if the last session was today or yesterday
+    current = int(run_lengths[-1]) if today - days[-1] <= 1 else 0
+    return {"current": current, "longest": int(run_lengths.max())}
+
+
+def compute_focus_analytics(sessions, tasks, today):
+    """
+    Analytics of a DataFrame of sessions (task_id, start, duration) joined
+    with a DataFrame of tasks from the tasks CSV.
+    """
+    sessions = sessions.assign(hours=sessions["duration"] / 3600)
+
+    # Actual hours per task, joined with the estimates
+    actual = sessions.groupby("task_id").agg(
+        actual_hours=("hours", "sum"), sessions=("hours", "size")
+    )
+    tasks = tasks.assign(
+        id=pd.to_numeric(tasks["id"], errors="coerce"),
+        est_hours=parse_estimated_hours(tasks["est_time"]),
+    )
+    per_task = tasks[["id", "title", "course", "status", "est_hours"]].merge(
+        actual, left_on="id", right_index=True, how="inner"
+    )
+    per_task["accuracy"] = ratio(
+        per_task["actual_hours"], per_task["est_hours"]
+    )
+
+    per_course = per_task.groupby("course", as_index=False).agg(
+        est_hours=("est_hours", "sum"),
+        actual_hours=("actual_hours", "sum"),
+        sessions=("sessions", "sum"),
+    )
+    per_course["accuracy"] = ratio(
+        per_course["actual_hours"], per_course["est_hours"]
+    )
+
+    # Productivity by hour of day (UTC)
+    hours_of_day = sessions["start"].dt.hour.to_numpy().astype(np.int64)
+    sessions_by_hour = np.bincount(hours_of_day, minlength=24)
+    minutes_by_hour = np.bincount(
+        hours_of_day, weights=sessions["duration"] / 60, minlength=24
+    )
+
+    session_days = (
+        sessions["start"].dt.tz_convert(None).to_numpy().astype(
+            "datetime64[D]"
+        )
+    ).astype(np.int64)
+
+    finite = per_task["accuracy"].dropna().to_numpy()
+    unassigned = ~sessions["task_id"].isin(tasks["id"])
+    return {
+        "total_sessions": int(len(sessions)),
+        "total_hours": round(float(sessions["hours"].sum()), 2),
+        "unassigned_hours": round(
+            float(sessions.loc[unassigned, "hours"].sum()), 2
+        ),
+        "tasks": to_records(per_task.round(2)),
+        "courses": to_records(per_course.round(2)),
+        "streaks": compute_streaks(session_days, today),
+        "hour_of_day": [
+            {"hour": hour, "sessions": int(count), "minutes": round(minutes)}
+            for hour, (count, minutes) in enumerate(
+                zip(sessions_by_hour, minutes_by_hour)
+            )
+        ],
+        "estimate_accuracy": {
+            "median": round(float(np.median(finite)), 2)
+            if finite.size
+            else None,
+            "mean": round(float(np.mean(finite)), 2) if finite.size else None,
+            # Inputs for the time_spent_hours feature of the priority model
+            "time_spent_hours": {
+                str(int(task_id)): round(float(hours), 2)
+                for task_id, hours in zip(
+                    per_task["id"], per_task["actual_hours"]
+                )
+            },
+        },
+    }
+
+
+class FocusAnalytics:
+    """
+    Per-user cache of the focus analytics.
+    """
+
+    def __init__(self, focus_log, s3, bucket_name, tasks_key, cache_size=1024):
+        self.focus_log = focus_log
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.tasks_key = tasks_key
+        # Number of users whose latest analytics are kept
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._tasks = None
+        self._tasks_etag = None
+        # User id -> (days, session revision, tasks ETag, date, analytics),
+        # least recently used first
+        self._cache = OrderedDict()
+
+    def _load_tasks(self):
+        """
+        Reload the tasks CSV if its ETag changed.
+        """
+        with self._lock:
+            tasks, etag = get_df_from_csv_in_s3_if_changed(
+                self.s3, self.bucket_name, self.tasks_key, self._tasks_etag
+            )
+            if tasks is not None:
+                self._tasks, self._tasks_etag = tasks, etag
+            return self._tasks, self._tasks_etag
+
+    def get(self, user_id, days=90, today=None):
+        """
+        Return the analytics of the sessions of the last `days` days.
+        """
+        today = today or datetime.now(timezone.utc).date()
+        tasks, tasks_etag = self._load_tasks()
+        revision = self.focus_log.revision(user_id)
+        version = (days, revision, tasks_etag, today)
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and cached[:4] == version:
+                self._cache.move_to_end(user_id)
+                return cached[4]
+
+        sessions = self.focus_log.sessions(
+            user_id, today - timedelta(days=days - 1), today
+        )
+        analytics = compute_focus_analytics(sessions, tasks, today)
+        analytics["days"] = days
+        with self._lock:
+            self._cache[user_id] = (*version, analytics)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return analytics
@@ -0,0 +1,595 @@
+"""
+Filename: <focus_log.py>
+
+Description:
+    Append-only log of the focus sessions (pomodoros) of every user. Each
+    session is a (task id, start, duration) event stored in AWS S3 in one
+    compressed columnar partition per user and month, next to daily and
+    weekly rollups that are updated incrementally when events are
+    flushed. Weekly charts and long-range totals are read from the rollups
+    without scanning sessions.
+
+    New events are kept in memory and in a local write-ahead log, and a
+    background thread flushes them in batches. Every object remembers the
+    batches already applied to it, so a batch left in the log by a crash
+    is flushed again on the next start without being counted twice.
+    Objects are written conditionally on their ETag and retried on the
+    latest version, so processes flushing the same user do not lose each
+    other's sessions, and the cached rollups are revalidated by ETag so
+    the sessions flushed by other processes show up. Every process locks
+    its own log, so two processes, like the Flask reloader and its child,
+    never share one.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import fcntl
+import glob
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import botocore.exceptions
+import numpy as np
+import pandas as pd
+
+try:
+    from src.local_storage import is_precondition_failed, write_conditions
+except ImportError:
+    from .local_storage import is_precondition_failed, write_conditions
+
+# Same order as the weekly achievements chart
+DAYS = [
+    "Saturday",
+    "Sunday",
+    "Monday",
+    "Tuesday",
+    "Wednesday",
+    "Thursday",
+    "Friday",
+]
+# Stored in the task id column of sessions without a task
+NO_TASK = -1
+# Attempts of a write that keeps losing to other writers
+MAX_WRITE_ATTEMPTS = 10
+BATCH_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def week_key(day):
+    """
+    ISO year and week of a date, e.g. "2026-W43". Unlike the week number
+    alone it does not collide between years.
+    """
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def event_day(event):
+    """
+    UTC date on which a session started.
+    """
+    return datetime.fromtimestamp(event["start"], timezone.utc).date()
+
+
+def current_week_dates(today=None):
+    """
+    Map the day names of the chart to their dates in the current ISO week.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    monday = today - timedelta(days=today.weekday())
+    week = [monday + timedelta(days=offset) for offset in range(7)]
+    dates = {day.strftime("%A"): day for day in week}
+    return {name: dates[name] for name in DAYS}
+
+
+def month_key(day):
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def empty_rollups():
+    return {"daily": {}, "weekly": {}, "applied_batches": []}
+
+
+def add_to_rollups(rollups, events):
+    """
+    Add sessions to the daily and weekly [sessions, seconds] rollups.
+    """
+    for event in events:
+        day = event_day(event)
+        for period, key in (
+            ("daily", day.isoformat()),
+            ("weekly", week_key(day)),
+        ):
+            sessions, seconds = rollups[period].get(key, (0, 0))
+            rollups[period][key] = [sessions + 1, seconds + event["duration"]]
+
+
+class FocusSessionLog:
+    """
+    Focus session event log with monthly partitions and rollups in S3.
+    """
+
+    def __init__(
+        self,
+        s3,
+        bucket_name,
+        prefix,
+        wal_path,
+        flush_interval=10,
+        applied_batch_limit=100,
+        refresh_interval=30,
+    ):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        # Key prefix of the partitions and rollups, e.g. "focus_sessions/"
+        self.prefix = prefix
+        # Seconds between two flushes of the background thread
+        self.flush_interval = flush_interval
+        # Number of flushed batch ids remembered in every object
+        self.applied_batch_limit = applied_batch_limit
+        # Minimum number of seconds between two ETag checks of the rollups
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        # Only one flush at a time, held while talking to S3
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        # User id -> flushed rollups and their ETag
+        self._rollups = {}
+        self._etags = {}
+        # User id -> time of the last ETag check of the rollups
+        self._checked_at = {}
+        # User id -> number of sessions recorded by this process
+        self._revisions = {}
+        # Events not yet in a flush batch
+        self._pending = []
+        # Batch id -> events of a rotated log not yet written to S3
+        self._batches = {}
+        directory = os.path.dirname(wal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.wal_path, self._wal_lock = self._lock_wal(wal_path)
+        self._recover()
+        self._wal = open(self.wal_path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _lock_wal(wal_path):
+        """
+        Take the first log of wal_path, wal_path-1, wal_path-2, ... that no
+        other process holds. The lock is released when the process exits,
+        so the log of a crashed process is recovered by the next process
+        taking it.
+        """
+        number = 0
+        while True:
+            path = f"{wal_path}-{number}" if number else wal_path
+            lock = open(f"{path}.lock", "a")
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock.close()
+                number += 1
+                continue
+            return path, lock
+
+    @staticmethod
+    def _read_log(path):
+        events = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # Last line cut short by a crash
+                    continue
+        return events
+
+    def _recover(self):
+        """
+        Load the events left in the logs by the previous process.
+        """
+        for path in glob.glob(f"{glob.escape(self.wal_path)}.*"):
+            batch_id = path.rsplit(".", 1)[1]
+            if BATCH_ID.fullmatch(batch_id):
+                self._batches[batch_id] = self._read_log(path)
+        if os.path.exists(self.wal_path):
+            self._pending = self._read_log(self.wal_path)
+
+    def _batch_path(self, batch_id):
+        return f"{self.wal_path}.{batch_id}"
+
+    def _rollups_key(self, user_id):
+        return f"{self.prefix}{user_id}/rollups.json"
+
+    def _partition_key(self, user_id, month):
+        return f"{self.prefix}{user_id}/{month}.npz"
+
+    def _fetch_rollups(self, user_id):
+        """
+        Reload the rollups of a user if they changed in S3. Called with the
+        flush lock held.
+        """
+        with self._lock:
+            etag = self._etags.get(user_id)
+        kwargs = {"IfNoneMatch": etag} if etag else {}
+        rollups = None
+        try:
+            response = self.s3.get_object(
+                Bucket=self.bucket_name,
+                Key=self._rollups_key(user_id),
+                **kwargs,
+            )
+            rollups = json.loads(response["Body"].read())
+            etag = response.get("ETag")
+        except botocore.exceptions.ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code in ("NoSuchKey", "404"):
+                rollups, etag = empty_rollups(), None
+            elif code not in ("304", "NotModified"):
+                raise e
+        with self._lock:
+            if rollups is not None:
+                self._rollups[user_id] = rollups
+                self._etags[user_id] = etag
+            self._checked_at[user_id] = time.monotonic()
+            return self._rollups[user_id]
+
+    def _refresh_rollups(self, user_id):
+        """
+        Revalidate the cached rollups of a user at most every
+        refresh_interval seconds. A running flush updates them itself, so
+        they are not revalidated during one.
+        """
+        with self._lock:
+            checked_at = self._checked_at.get(user_id)
+        if (
+            checked_at is not None
+            and time.monotonic() - checked_at < self.refresh_interval
+        ):
+            return
+        # The first read of a user waits for a running flush
+        if not self._flush_lock.acquire(blocking=checked_at is None):
+            return
+        try:
+            self._fetch_rollups(user_id)
+        finally:
+            self._flush_lock.release()
+
+    def _user_events(self, user_id):
+        # Called with the lock held
+        return [
+            event
+            for events in [*self._batches.values(), self._pending]
+            for event in events
+            if event["user"] == user_id
+        ]
+
+    def _unflushed_events(self, user_id):
+        with self._lock:
+            return self._user_events(user_id)
+
+    def record(self, user_id, task_id, start, duration):
+        """
+        Append a focus session of `duration` seconds that started at
+        `start`, a UTC datetime or POSIX timestamp.
+        """
+        if hasattr(start, "timestamp"):
+            start = start.timestamp()
+        event = {
+            "user": user_id,
+            "task_id": NO_TASK if task_id is None else int(task_id),
+            "start": int(start),
+            "duration": int(duration),
+        }
+        with self._lock:
+            self._pending.append(event)
+            self._revisions[user_id] = self._revisions.get(user_id, 0) + 1
+            self._wal.write(json.dumps(event) + "\n")
+            self._wal.flush()
+            os.fsync(self._wal.fileno())
+        return event
+
+    def revision(self, user_id):
+        """
+        Number that changes whenever a session of the user is recorded, to
+        invalidate results computed from the sessions.
+        """
+        with self._lock:
+            return self._revisions.get(user_id, 0)
+
+    def _lookup(self, user_id, period, keys):
+        """
+        Return the [sessions, seconds] of rollup keys, including the
+        sessions not flushed yet.
+        """
+        self._refresh_rollups(user_id)
+        # A flush moves events to the rollups under the lock, so reading
+        # both under it counts every event exactly once
+        with self._lock:
+            flushed = self._rollups[user_id][period]
+            events = self._user_events(user_id)
+        unflushed = empty_rollups()
+        add_to_rollups(unflushed, events)
+        values = {}
+        for key in keys:
+            sessions, seconds = flushed.get(key, (0, 0))
+            extra_sessions, extra_seconds = unflushed[period].get(key, (0, 0))
+            values[key] = (sessions + extra_sessions, seconds + extra_seconds)
+        return values
+
+    def daily(self, user_id, start_date, end_date):
+        """
+        Sessions and focused seconds per day from start_date to end_date.
+        """
+        days = [
+            (start_date + timedelta(days=offset)).isoformat()
+            for offset in range((end_date - start_date).days + 1)
+        ]
+        values = self._lookup(user_id, "daily", days)
+        return [
+            {
+                "date": day,
+                "sessions": values[day][0],
+                "seconds": values[day][1],
+            }
+            for day in days
+        ]
+
+    def weekly(self, user_id, start_date, end_date):
+        """
+        Sessions and focused seconds per ISO week overlapping the range.
+        """
+        weeks = []
+        day = start_date - timedelta(days=start_date.weekday())
+        while day <= end_date:
+            weeks.append(week_key(day))
+            day += timedelta(days=7)
+        values = self._lookup(user_id, "weekly", weeks)
+        return [
+            {
+                "week": week,
+                "sessions": values[week][0],
+                "seconds": values[week][1],
+            }
+            for week in weeks
+        ]
+
+    def totals(self, user_id, start_date, end_date):
+        """
+        Total sessions and focused seconds in a date range, read from the
+        weekly rollups for whole weeks and the daily ones at the edges.
+        """
+        daily_keys = []
+        weekly_keys = []
+        day = start_date
+        while day <= end_date:
+            if day.weekday() == 0 and day + timedelta(days=6) <= end_date:
+                weekly_keys.append(week_key(day))
+                day += timedelta(days=7)
+            else:
+                daily_keys.append(day.isoformat())
+                day += timedelta(days=1)
+        values = list(self._lookup(user_id, "daily", daily_keys).values())
+        values += self._lookup(user_id, "weekly", weekly_keys).values()
+        return {
+            "sessions": sum(sessions for sessions, _ in values),
+            "seconds": sum(seconds for _, seconds in values),
+        }
+
+    def _read_partition(self, user_id, month):
+        """
+        Return the columns and applied batch ids of a monthly partition and
+        its ETag, or (None, None) if it does not exist.
+        """
+        try:
+            response = self.s3.get_object(
+                Bucket=self.bucket_name,
+                Key=self._partition_key(user_id, month),
+            )
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None, None
+            raise e
+        with np.load(io.BytesIO(response["Body"].read())) as arrays:
+            partition = {name: arrays[name] for name in arrays.files}
+        return partition, response.get("ETag")
+
+    def sessions(self, user_id, start_date, end_date):
+        """
+        Return the sessions that started in a date range as a DataFrame
+        with task_id, start (UTC) and duration (seconds) columns. Only the
+        partitions of the months in the range are read.
+        """
+        columns = {"task_id": [], "start": [], "duration": []}
+        month = start_date.replace(day=1)
+        while month <= end_date:
+            partition, _ = self._read_partition(user_id, month_key(month))
+            if partition is not None:
+                for name in columns:
+                    columns[name].append(partition[name])
+            month = (month + timedelta(days=32)).replace(day=1)
+        unflushed = self._unflushed_events(user_id)
+        for name in columns:
+            columns[name].append(
+                np.array([event[name] for event in unflushed], dtype=np.int64)
+            )
+        df = pd.DataFrame(
+            {name: np.concatenate(arrays) for name, arrays in columns.items()}
+        )
+        df["start"] = pd.to_datetime(df["start"], unit="s", utc=True)
+        first = pd.Timestamp(start_date, tz="UTC")
+        last = pd.Timestamp(end_date + timedelta(days=1), tz="UTC")
+        in_range = (df["start"] >= first) & (df["start"] < last)
+        return df[in_range].sort_values("start").reset_index(drop=True)
+
+    def _append_partition(self, user_id, month, batches):
+        """
+        Append the events of flush batches to a monthly partition, skipping
+        the batches already in it. The partition is written only if no one
+        else changed it since it was read, otherwise this is retried.
+        """
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            partition, etag = self._read_partition(user_id, month)
+            partition = partition or {
+                "task_id": np.array([], dtype=np.int64),
+                "start": np.array([], dtype=np.int64),
+                "duration": np.array([], dtype=np.int32),
+                "batches": np.array([], dtype=str),
+            }
+            applied = set(partition["batches"].tolist())
+            events = [
+                event
+                for batch_id, batch_events in batches.items()
+                if batch_id not in applied
+                for event in batch_events
+            ]
+            if not events:
+                return
+            new_batches = [*partition["batches"].tolist()]
+            new_batches += [
+                batch_id for batch_id in batches if batch_id not in applied
+            ]
+            buffer = io.BytesIO()
+            np.savez_compressed(
+                buffer,
+                task_id=np.concatenate(
+                    [partition["task_id"], [e["task_id"] for e in events]]
+                ).astype(np.int64),
+                start=np.concatenate(
+                    [partition["start"], [e["start"] for e in events]]
+                ).astype(np.int64),
+                duration=np.concatenate(
+                    [partition["duration"], [e["duration"] for e in events]]
+                ).astype(np.int32),
+                batches=np.array(new_batches[-self.applied_batch_limit:]),
+            )
+            try:
+                self.s3.put_object(
+                    Bucket=self.bucket_name,
+                    Key=self._partition_key(user_id, month),
+                    Body=buffer.getvalue(),
+                    ContentType="application/octet-stream",
+                    **write_conditions(etag),
+                )
+                return
+            except botocore.exceptions.ClientError as e:
+                if not is_precondition_failed(e):
+                    raise e
+        raise RuntimeError(f"Could not write {month} sessions of {user_id}")
+
+    def _flush_user(self, user_id, batches):
+        # Group the events of the batches by month, keeping the batch ids
+        months = {}
+        for batch_id, events in batches.items():
+            for event in events:
+                month = month_key(event_day(event))
+                months.setdefault(month, {}).setdefault(batch_id, [])
+                months[month][batch_id].append(event)
+        for month, month_batches in months.items():
+            self._append_partition(user_id, month, month_batches)
+
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            rollups = self._fetch_rollups(user_id)
+            rollups = {
+                "daily": dict(rollups["daily"]),
+                "weekly": dict(rollups["weekly"]),
+                "applied_batches": list(rollups["applied_batches"]),
+            }
+            for batch_id, events in batches.items():
+                if batch_id not in rollups["applied_batches"]:
+                    add_to_rollups(rollups, events)
+                    rollups["applied_batches"].append(batch_id)
+            limit = self.applied_batch_limit
+            rollups["applied_batches"] = rollups["applied_batches"][-limit:]
+            try:
+                response = self.s3.put_object(
+                    Bucket=self.bucket_name,
+                    Key=self._rollups_key(user_id),
+                    Body=json.dumps(rollups, sort_keys=True),
+                    ContentType="application/json",
+                    **write_conditions(self._etags.get(user_id)),
+                )
+                return rollups, response.get("ETag")
+            except botocore.exceptions.ClientError as e:
+                if not is_precondition_failed(e):
+                    raise e
+        raise RuntimeError(f"Could not write the rollups of {user_id}")
+
+    def flush(self):
+        """
+        Write the logged events to their partitions and rollups. Returns
+        True if something was written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._pending:
+                    # Rotate the log, new events go to a fresh one
+                    batch_id = uuid.uuid4().hex
+                    self._wal.close()
+                    os.replace(self.wal_path, self._batch_path(batch_id))
+                    self._wal = open(self.wal_path, "a", encoding="utf-8")
+                    self._batches[batch_id] = self._pending
+                    self._pending = []
+                batches = dict(self._batches)
+            if not batches:
+                return False
+
+            by_user = {}
+            for batch_id, events in batches.items():
+                for event in events:
+                    user_batches = by_user.setdefault(event["user"], {})
+                    user_batches.setdefault(batch_id, []).append(event)
+            flushed = {
+                user_id: self._flush_user(user_id, user_batches)
+                for user_id, user_batches in by_user.items()
+            }
+
+            with self._lock:
+                for user_id, (rollups, etag) in flushed.items():
+                    self._rollups[user_id] = rollups
+                    self._etags[user_id] = etag
+                    self._checked_at[user_id] = time.monotonic()
+                for batch_id in batches:
+                    del self._batches[batch_id]
+            for batch_id in batches:
+                os.remove(self._batch_path(batch_id))
+            return True
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # The batches are kept and retried on the next flush
+                print(f"Flushing focus sessions failed: {e}")
+
+    def start(self):
+        """
+        Start the background flush thread.
+        """
+        self._thread = threading.Thread(
+            target=self._run, name="focus-log-flush", daemon=True
+        )
+        self._thread.start()
+
+    def shutdown(self):
+        """
+        Stop the background thread and flush the remaining events.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._wal.close()
+            self._wal_lock.close()
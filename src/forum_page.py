@@ -10,7 +10,7 @@ Description:
 
 Author: Chenwei Song
 Created: 2024-01-25
-Last Modified: 2024-04-03
+Last Modified: 2026-10-19
 """
 
 # Attempt to import configuration and utility functions
@@ -31,22 +31,28 @@ from flask import (
     redirect,
     url_for,
     abort,
+    jsonify,
 )
 
 try:
     from src.util import (
         get_df_from_csv_in_s3,
     )
+    from src.presigned_urls import object_key_from_url
+    from src.image_store import display_key, content_key, CONTENT_TYPES
+    from src.direct_uploads import create_upload_policy
 except ImportError:
     from .util import (
         get_df_from_csv_in_s3,
     )
+    from .presigned_urls import object_key_from_url
+    from .image_store import display_key, content_key, CONTENT_TYPES
+    from .direct_uploads import create_upload_policy
 
-import botocore
+import re
 import pandas as pd
 from io import StringIO
 from datetime import datetime
-from werkzeug.utils import secure_filename
 
 forum_blueprint = Blueprint("forum", __name__)
 
@@ -54,61 +60,34 @@ forum_blueprint = Blueprint("forum", __name__)
 @forum_blueprint.route("/forum_page", methods=["GET"])
 def forum_page():
 
-    user_data_file = current_app.config["USER_DATA_NAME"]
-    topic_data_file = current_app.config["TOPIC_DATA_NAME"]
-    comment_data_file = current_app.config["COMMENT_DATA_NAME"]
+    topic_index = current_app.config["TOPIC_INDEX"]
+    user_directory = current_app.config["USER_DIRECTORY"]
 
-    bucket_name = current_app.config["BUCKET_NAME"]
-    s3 = current_app.config["S3_CLIENT"]
     current_app.config["current_page"] = "forum_page"
-    current_tag = request.args.get("tag", "All")
+    # Several tags may be given, a topic then has to carry all of them
+    current_tags = [
+        tag for tag in request.args.getlist("tag") if tag and tag != "All"
+    ]
+    current_tag = current_tags[0] if len(current_tags) == 1 else "All"
     try:
-        # Fetch topics, comments, and users data from CSV
-        topics_df = get_df_from_csv_in_s3(s3, bucket_name, topic_data_file)
-        comments_df = get_df_from_csv_in_s3(s3, bucket_name, comment_data_file)
-        users_df = get_df_from_csv_in_s3(s3, bucket_name, user_data_file)
-
-        if current_tag and current_tag != "All":
-            topics_df = topics_df[topics_df["tag"] == current_tag]
-        else:
-            topics_df = get_df_from_csv_in_s3(s3, bucket_name, topic_data_file)
-
-        # Ensure 'userId' in topics_df is the same type as 'userId' in users_df
-        topics_df["userId"] = topics_df["userId"].astype(str)
-        users_df["userId"] = users_df["userId"].astype(str)
+        # Read only the matching topics, with their comment counts
+        matching_topics = topic_index.query(current_tags)
 
-        # Aggregate comments by topicId to count them
-        comments_count = (
-            comments_df.groupby("topicId")
-            .size()
-            .reset_index(name="comment_count")
-        )
-
-        # Merge topics with comments count based on topic ID
-        topics_with_comments = pd.merge(
-            topics_df,
-            comments_count,
-            how="left",
-            left_on="id",
-            right_on="topicId",
-        ).fillna(0)
-
-        # Merge topics with user data to get usernames
-        topics_with_usernames = pd.merge(
-            topics_with_comments,
-            users_df[["userId", "username"]],
-            how="left",
-            left_on="userId",
-            right_on="userId",
+        # Resolve usernames from the cached user directory
+        usernames = user_directory.resolve(
+            [topic["userId"] for topic in matching_topics]
         )
 
         # Prepare the topics list as expected by the template
         topics = [
-            (row.to_dict(), row["username"], int(row["comment_count"]))
-            for _, row in topics_with_usernames.iterrows()
+            (topic, username, topic["comment_count"])
+            for topic, username in zip(matching_topics, usernames)
         ]
         topics = topics[::-1]
 
+        # Sign every image on the page in one batch
+        attach_image_urls([topic for topic, _, _ in topics])
+
     except Exception as e:
         print(f"An error occurred while fetching forum data: {e}")
         topics = []
@@ -142,23 +121,19 @@ def add_topic():
         tag = request.form.get("tag")
         current_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        image_url = None  # Or handle the case where there is no valid file
+        image_key = None  # Or handle the case where there is no valid file
+        image_store = current_app.config["IMAGE_STORE"]
 
-        if "image" in request.files:
+        if request.form.get("image_key"):
+            # The image was already uploaded directly by the browser
+            image_key = image_store.register_uploaded(
+                request.form["image_key"]
+            )
+        elif "image" in request.files:
             file = request.files["image"]
             if file and allowed_file(file.filename):
-                print("yeah image")
-                # Handle the file upload
-                filename = secure_filename(file.filename)
-                image_key = f"uploads/{filename}"
-                s3.upload_fileobj(
-                    file,
-                    bucket_name,
-                    image_key,
-                    ExtraArgs={"ACL": "private"},
-                )
-
-                image_url = create_presigned_url(s3, bucket_name, image_key)
+                # Store the image under its content hash, deduplicated
+                image_key = image_store.store(file.stream, file.filename)
 
         # Fetch current topics DataFrame from S3
         topics_df = get_df_from_csv_in_s3(
@@ -181,7 +156,7 @@ def add_topic():
                     userId
                 ],  # Convert userId to a list to match DataFrame structure.
                 "tag": [tag],
-                "imageUrl": [image_url],
+                "imageKey": [image_key],
                 "date": [current_timestamp],
             }
         )
@@ -203,6 +178,10 @@ def add_topic():
             Body=csv_buffer.getvalue(),
             ContentType="text/csv",
         )
+        # Make the new topic visible in the forum index right away
+        current_app.config["TOPIC_INDEX"].add_topic(
+            new_topic.iloc[0].to_dict()
+        )
 
         return redirect(url_for("forum.forum_page"))
     else:
@@ -211,6 +190,40 @@ def add_topic():
         )
 
 
+@forum_blueprint.route("/image_upload_policy", methods=["POST"])
+def image_upload_policy():
+    """
+    Issue a presigned POST policy for uploading a topic image directly to
+    storage. The browser sends the SHA-256 of the image, so an image that
+    is already stored does not need to be uploaded at all.
+    """
+    bucket_name = current_app.config["BUCKET_NAME"]
+    s3 = current_app.config["S3_CLIENT"]
+    image_store = current_app.config["IMAGE_STORE"]
+    data = request.get_json(silent=True) or {}
+
+    filename = data.get("filename", "")
+    digest = str(data.get("sha256", "")).lower()
+    if not allowed_file(filename) or not re.fullmatch(r"[0-9a-f]{64}", digest):
+        return jsonify({"message": "Invalid image"}), 400
+
+    image_key = content_key(digest, filename)
+    if image_store.exists(image_key):
+        return jsonify({"key": image_key, "exists": True})
+
+    extension = image_key.rsplit(".", 1)[1]
+    policy = create_upload_policy(
+        s3,
+        bucket_name,
+        image_key,
+        CONTENT_TYPES[extension],
+        current_app.config["IMAGE_MAX_UPLOAD_BYTES"],
+        key_prefix="uploads/",
+        expiration=current_app.config["UPLOAD_POLICY_EXPIRATION"],
+    )
+    return jsonify({"key": image_key, "exists": False, **policy})
+
+
 @forum_blueprint.route("/forum_page/reverse_order", methods=["POST"])
 def reverse_forum_order():
     """
@@ -235,6 +248,8 @@ def topic(topic_id):
     bucket_name = current_app.config["BUCKET_NAME"]
     s3 = current_app.config["S3_CLIENT"]
     comment_data_file = current_app.config["COMMENT_DATA_NAME"]
+    user_directory = current_app.config["USER_DIRECTORY"]
+    topic_index = current_app.config["TOPIC_INDEX"]
 
     username = current_app.config["username"]
     current_page = current_app.config["current_page"]
@@ -283,6 +298,7 @@ def topic(topic_id):
             Key=comment_data_file,
             Body=csv_buffer.getvalue(),
         )
+        topic_index.add_comment(topic_id)
 
         return redirect(url_for("forum.topic", topic_id=topic_id))
 
@@ -291,38 +307,23 @@ def topic(topic_id):
     comments_with_usernames = []
 
     try:
-        # Fetch necessary data from CSVs
-        topics_df = get_df_from_csv_in_s3(s3, bucket_name, "topic_data.csv")
-        topics_df["imageUrl"] = topics_df["imageUrl"].fillna("none")
-        topics_df["imageUrl"] = topics_df["imageUrl"].astype(str)
+        # Fetch topic data from the topic index
+        topic_dict = topic_index.get_topic(topic_id)
+        if topic_dict is None:
+            abort(404)  # Topic not found
+        attach_image_urls([topic_dict])
 
         comments_df = get_df_from_csv_in_s3(
             s3, bucket_name, "comment_data.csv"
         )
-        users_df = get_df_from_csv_in_s3(s3, bucket_name, "user_data.csv")
 
-        # Fetch topic data
-        topic_data = topics_df[topics_df["id"].astype(str) == str(topic_id)]
-        if topic_data.empty:
-            abort(404)  # Topic not found
-        topic_dict = topic_data.iloc[0].to_dict()
-
-        author_id = topic_dict["userId"]
-        author_username = users_df[
-            users_df["userId"].astype(str) == str(author_id)
-        ].iloc[0]["username"]
+        author_username = user_directory.get_username(topic_dict["userId"])
 
         # Prepare comments with usernames
         comments_df = comments_df[
             comments_df["topicId"].astype(str) == str(topic_id)
         ]
-        comments_with_users = pd.merge(
-            comments_df,
-            users_df,
-            left_on="userId",
-            right_on="userId",
-            how="left",
-        )
+        comment_usernames = user_directory.resolve(comments_df["userId"])
 
         comments_with_usernames = [
             (
@@ -333,9 +334,11 @@ def topic(topic_id):
                     "layer": row["layer"],
                     "date": row["date"],
                 },
-                row["username"],
+                comment_username,
+            )
+            for (_, row), comment_username in zip(
+                comments_df.iterrows(), comment_usernames
             )
-            for _, row in comments_with_users.iterrows()
         ]
 
         comment_hierarchy = build_comment_hierarchy(comments_with_usernames)
@@ -362,9 +365,9 @@ def search():
     bucket_name = current_app.config["BUCKET_NAME"]
     s3 = current_app.config["S3_CLIENT"]
 
-    user_data_file = current_app.config["USER_DATA_NAME"]
     topic_data_file = current_app.config["TOPIC_DATA_NAME"]
     comment_data_file = current_app.config["COMMENT_DATA_NAME"]
+    user_directory = current_app.config["USER_DIRECTORY"]
 
     current_app.config["current_page"] = "forum_page"
     query = request.args.get("query", "").strip()
@@ -373,7 +376,6 @@ def search():
         # Fetch topics and comments data from CSV
         topics_df = get_df_from_csv_in_s3(s3, bucket_name, topic_data_file)
         comments_df = get_df_from_csv_in_s3(s3, bucket_name, comment_data_file)
-        users_df = get_df_from_csv_in_s3(s3, bucket_name, user_data_file)
 
         # Filter topics and comments based on the search query
         matching_topics = topics_df[
@@ -386,33 +388,27 @@ def search():
             comments_df["text"].str.contains(query, case=False, na=False)
         ]
 
-        # Join matching topics and comments with user data to include usernames
-        matching_topics_with_usernames = pd.merge(
-            matching_topics,
-            users_df[["userId", "username"]],
-            how="left",
-            left_on="userId",
-            right_on="userId",
-        )
-        matching_comments_with_usernames = pd.merge(
-            matching_comments,
-            users_df[["userId", "username"]],
-            how="left",
-            left_on="userId",
-            right_on="userId",
+        # Resolve usernames of matching topics and comments
+        topic_usernames = user_directory.resolve(matching_topics["userId"])
+        comment_usernames = user_directory.resolve(
+            matching_comments["userId"]
         )
 
         # Prepare results to pass to the template
-        topics_results = matching_topics_with_usernames.to_dict(
-            orient="records"
-        )
+        topics_results = matching_topics.to_dict(orient="records")
+        for topic_result, topic_username in zip(
+            topics_results, topic_usernames
+        ):
+            topic_result["username"] = topic_username
         comments_results = [
             {
                 "text": row["text"],
                 "topicId": row["topicId"],
-                "username": row["username"],
+                "username": comment_username,
             }
-            for _, row in matching_comments_with_usernames.iterrows()
+            for (_, row), comment_username in zip(
+                matching_comments.iterrows(), comment_usernames
+            )
         ]
 
         results = {"topics": topics_results, "comments": comments_results}
@@ -456,19 +452,41 @@ def allowed_file(filename):
     )
 
 
-def create_presigned_url(s3, bucket_name, object_name, expiration=604800):
+def get_image_key(topic):
     """
-    Generate a presigned URL for accessing an object in an S3 bucket.
+    Return the S3 object key of a topic's image, or None if it has none.
+    Rows written before keys were stored only carry a presigned URL, so the
+    key is recovered from that URL.
     """
-    try:
-        # Generate presigned URL for accessing the object
-        response = s3.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": bucket_name, "Key": object_name},
-            ExpiresIn=expiration,
+    image_key = topic.get("imageKey")
+    if isinstance(image_key, str) and image_key not in ("", "none"):
+        return image_key
+    image_url = topic.get("imageUrl")
+    if isinstance(image_url, str) and image_url not in ("", "none"):
+        return object_key_from_url(
+            image_url, current_app.config["BUCKET_NAME"]
         )
-    except botocore.exceptions.ClientError as e:
-        # Print error message and return None if URL generation fails
-        print(f"Error generating presigned URL: {e}")
-        return None
-    return response
+    return None
+
+
+def attach_image_urls(topics):
+    """
+    Set fresh presigned URLs on each topic dictionary, signing all images
+    with a single batch call to the presigned URL cache. "imageUrl" points
+    to the downscaled display variant and "imageFullUrl" to the original,
+    which pages fall back to while the variant is still being generated.
+    """
+    url_cache = current_app.config["PRESIGNED_URL_CACHE"]
+    image_keys = [get_image_key(topic) for topic in topics]
+    keys_to_sign = []
+    for image_key in image_keys:
+        if image_key:
+            keys_to_sign += [image_key, display_key(image_key)]
+    urls = url_cache.get_urls(keys_to_sign)
+    for topic, image_key in zip(topics, image_keys):
+        if image_key:
+            topic["imageUrl"] = urls.get(display_key(image_key), "none")
+            topic["imageFullUrl"] = urls.get(image_key, "none")
+        else:
+            topic["imageUrl"] = "none"
+            topic["imageFullUrl"] = "none"
@@ -0,0 +1,236 @@
+"""
+Filename: <image_store.py>
+
+Description:
+    Content-addressed storage of forum images in AWS S3. Uploaded images are
+    keyed by the SHA-256 of their content, so identical images are stored
+    once and two users uploading "image.png" never overwrite each other.
+    A background worker pool generates downscaled display variants that the
+    forum pages serve instead of the full size originals.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import hashlib
+import io
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import botocore
+from PIL import Image
+
+IMAGE_KEY_PREFIX = "uploads/"
+DISPLAY_KEY_PREFIX = "uploads/display/"
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "gif": "image/gif",
+}
+PIL_FORMATS = {"png": "PNG", "jpg": "JPEG", "gif": "GIF"}
+CONTENT_KEY_PATTERN = re.compile(r"^uploads/([0-9a-f]{64})\.(png|jpg|gif)$")
+
+
+class HashingReader:
+    """
+    File-like wrapper that feeds every chunk read through a SHA-256 hash.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.hash.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+def hash_stream(stream, chunk_size=1024 * 1024):
+    """
+    Hash a seekable stream chunk by chunk and rewind it, so the same
+    stream can then be uploaded without holding a second copy in memory.
+    """
+    start = stream.tell()
+    reader = HashingReader(stream)
+    while reader.read(chunk_size):
+        pass
+    stream.seek(start)
+    return reader.hexdigest()
+
+
+def normalize_extension(filename):
+    """
+    Return the lower case extension of a filename with "jpeg" mapped to
+    "jpg", so identical content always maps to the same key.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower()
+    return "jpg" if extension == "jpeg" else extension
+
+
+def content_key(digest, filename):
+    """
+    Return the content-addressed key of an image with the given SHA-256.
+    """
+    return f"{IMAGE_KEY_PREFIX}{digest}.{normalize_extension(filename)}"
+
+
+def display_key(image_key):
+    """
+    Return the key of the downscaled display variant of an image.
+    """
+    return DISPLAY_KEY_PREFIX + image_key.rsplit("/", 1)[-1]
+
+
+class ImageStore:
+    """
+    Deduplicating image uploader with background thumbnail generation.
+    """
+
+    def __init__(self, s3, bucket_name, max_workers=2, display_size=800):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        # Longest side in pixels of the generated display variant
+        self.display_size = display_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="image-store"
+        )
+        self._lock = threading.Lock()
+        # Keys already known to exist, so repeated uploads skip the HEAD
+        self._known_keys = set()
+
+    def store(self, stream, filename):
+        """
+        Upload an image stream under its content hash and return the key.
+        The upload is skipped if the same content is already stored.
+        """
+        extension = normalize_extension(filename)
+        image_key = content_key(hash_stream(stream), filename)
+
+        if self.exists(image_key):
+            # The variant of an earlier upload may have failed
+            self._ensure_display_variant(image_key)
+            return image_key
+
+        self.s3.upload_fileobj(
+            stream,
+            self.bucket_name,
+            image_key,
+            ExtraArgs={
+                "ACL": "private",
+                "ContentType": CONTENT_TYPES.get(
+                    extension, "application/octet-stream"
+                ),
+            },
+        )
+        with self._lock:
+            self._known_keys.add(image_key)
+        # Downscale off the request path
+        self._executor.submit(self.create_display_variant, image_key)
+        return image_key
+
+    def register_uploaded(self, image_key):
+        """
+        Accept an image the browser uploaded directly to storage. Returns
+        the key if it is a valid content key that exists, otherwise None.
+        """
+        if not CONTENT_KEY_PATTERN.match(image_key or ""):
+            return None
+        if not self.exists(image_key):
+            return None
+        self._ensure_display_variant(image_key)
+        return image_key
+
+    def _ensure_display_variant(self, image_key):
+        """
+        Create the display variant of a stored image in the background
+        unless it is known to exist.
+        """
+        with self._lock:
+            if display_key(image_key) in self._known_keys:
+                return
+        self._executor.submit(self.create_missing_display_variant, image_key)
+
+    def create_missing_display_variant(self, image_key):
+        """
+        Create the display variant of an image if it is not stored yet.
+        """
+        try:
+            if self.exists(display_key(image_key)):
+                return
+        except botocore.exceptions.ClientError as e:
+            print(f"Error checking display variant for {image_key}: {e}")
+            return
+        self.create_display_variant(image_key)
+
+    def exists(self, image_key):
+        """
+        Check whether an image key is already stored in S3.
+        """
+        with self._lock:
+            if image_key in self._known_keys:
+                return True
+        try:
+            self.s3.head_object(Bucket=self.bucket_name, Key=image_key)
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] == "404":
+                return False
+            raise e
+        with self._lock:
+            self._known_keys.add(image_key)
+        return True
+
+    def create_display_variant(self, image_key):
+        """
+        Download an original image, downscale it so its longest side is at
+        most display_size pixels and upload it under its display key.
+        """
+        try:
+            response = self.s3.get_object(
+                Bucket=self.bucket_name, Key=image_key
+            )
+            content = response["Body"].read()
+
+            # Direct uploads are named by the browser, so check the hash
+            match = CONTENT_KEY_PATTERN.match(image_key)
+            if match and hashlib.sha256(content).hexdigest() != match[1]:
+                print(f"Content of {image_key} does not match its hash")
+                self.s3.delete_object(Bucket=self.bucket_name, Key=image_key)
+                with self._lock:
+                    self._known_keys.discard(image_key)
+                return
+
+            image = Image.open(io.BytesIO(content))
+            image.thumbnail((self.display_size, self.display_size))
+
+            extension = normalize_extension(image_key)
+            output = io.BytesIO()
+            if extension == "jpg" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.save(output, format=PIL_FORMATS.get(extension, "PNG"))
+            output.seek(0)
+
+            self.s3.put_object(
+                Bucket=self.bucket_name,
+                Key=display_key(image_key),
+                Body=output.getvalue(),
+                ContentType=CONTENT_TYPES.get(extension, "image/png"),
+            )
+            with self._lock:
+                self._known_keys.add(display_key(image_key))
+        except Exception as e:
+            # The pages fall back to the original image if this fails
+            print(f"Error generating display variant for {image_key}: {e}")
+
+    def shutdown(self, wait=True):
+        """
+        Stop the worker pool, finishing queued variants if wait is True.
+        """
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,237 @@
+"""
+Filename: <job_queue.py>
+
+Description:
+    Durable background job queue for work too slow for an HTTP request,
+    such as syllabus analysis. Jobs are stored in SQLite and executed by a
+    pool of worker threads inside the app process. A job that was running
+    when its worker died is picked up again once its lease expires, so
+    restarting the app does not lose jobs. The lease of a running job is
+    renewed by a heartbeat, so slow jobs are not picked up twice. A job
+    whose lease expires on its last attempt fails instead of being retried,
+    so a job that kills the worker does not run again on every restart.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class JobQueue:
+    """
+    SQLite backed job queue with an in-process worker pool.
+    """
+
+    def __init__(
+        self,
+        path,
+        handler,
+        app=None,
+        max_workers=2,
+        max_attempts=3,
+        lease_seconds=600,
+        poll_interval=1.0,
+    ):
+        self.path = path
+        # Called as handler(payload, report) where report(stage) records
+        # the progress of the job; its return value becomes the message
+        self.handler = handler
+        # Flask app whose context the handler runs in
+        self.app = app
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        # Seconds without a heartbeat after which a running job is retried
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode, transactions are started explicitly
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                message TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)"
+        )
+
+    def start(self):
+        """
+        Start the worker threads.
+        """
+        for number in range(self.max_workers):
+            worker = threading.Thread(
+                target=self._work, name=f"job-worker-{number}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def shutdown(self, wait=True):
+        """
+        Stop the workers after their current job. Unfinished jobs stay in
+        the queue for the next start.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        self._workers = []
+
+    def submit(self, payload):
+        """
+        Queue a job with a JSON serializable payload and return its id.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO jobs (id, payload, status, progress, message, "
+                "attempts, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', 'queued', '', 0, ?, ?)",
+                (job_id, json.dumps(payload), now, now),
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """
+        Return the status of a job as a dictionary, or None if unknown.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, payload, status, progress, message, attempts, "
+                "created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "payload": json.loads(row[1]),
+            "status": row[2],
+            "progress": row[3],
+            "message": row[4],
+            "attempts": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+        }
+
+    def _claim(self):
+        """
+        Atomically take the oldest queued job, or a running job whose lease
+        expired, and mark it as running. Expired jobs that used all their
+        attempts, e.g. because they kill the worker, are marked as failed.
+        """
+        now = time.time()
+        expired = now - self.lease_seconds
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._connection.execute(
+                    "UPDATE jobs SET status = 'failed', "
+                    "message = 'Lease expired on the last attempt', "
+                    "updated_at = ? WHERE status = 'running' "
+                    "AND updated_at < ? AND attempts >= ?",
+                    (now, expired, self.max_attempts),
+                )
+                row = self._connection.execute(
+                    "SELECT id, payload, attempts FROM jobs "
+                    "WHERE status = 'queued' "
+                    "OR (status = 'running' AND updated_at < ? "
+                    "AND attempts < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (expired, self.max_attempts),
+                ).fetchone()
+                if row is not None:
+                    self._connection.execute(
+                        "UPDATE jobs SET status = 'running', "
+                        "progress = 'started', attempts = attempts + 1, "
+                        "updated_at = ? WHERE id = ?",
+                        (now, row[0]),
+                    )
+                self._connection.execute("COMMIT")
+            except sqlite3.Error:
+                self._connection.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2] + 1
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def _heartbeat(self, job_id, done):
+        """
+        Renew the lease of a running job until done is set.
+        """
+        interval = self.lease_seconds / 3
+        while not done.wait(interval):
+            self._update(job_id)
+
+    def _run(self, job_id, payload, attempts):
+        def report(stage):
+            self._update(job_id, progress=stage)
+
+        done = threading.Event()
+        if self.lease_seconds > 0:
+            threading.Thread(
+                target=self._heartbeat,
+                args=(job_id, done),
+                name=f"job-heartbeat-{job_id}",
+                daemon=True,
+            ).start()
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    message = self.handler(payload, report)
+            else:
+                message = self.handler(payload, report)
+            self._update(
+                job_id, status="done", progress="done", message=message or ""
+            )
+        except Exception as e:
+            print(f"Job {job_id} failed on attempt {attempts}: {e}")
+            status = "queued" if attempts < self.max_attempts else "failed"
+            self._update(job_id, status=status, message=str(e))
+        finally:
+            done.set()
+
+    def _work(self):
+        while not self._stopping.is_set():
+            job = self._claim()
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run(*job)
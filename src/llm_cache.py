@@ -0,0 +1,217 @@
+"""
+Filename: <llm_cache.py>
+
+Description:
+    Persistent cache of OpenAI responses for syllabus analysis, stored in
+    SQLite. Entries are keyed by a hash of the model, the system message,
+    the prompt template version and the segment text, so re-uploading a
+    syllabus, or another section sharing the same syllabus, is answered
+    from disk without calling the API. Entries expire after a TTL and the
+    least recently used ones are evicted above a maximum count.
+
+    Run from the repository root:
+        python -m src.llm_cache stats
+        python -m src.llm_cache purge [--expired]
+        python -m src.llm_cache warm path/to/syllabus.pdf ...
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+def make_cache_key(model, system_message, template_version, text):
+    """
+    Hash everything that determines the response of a prompt.
+    """
+    digest = hashlib.sha256()
+    for part in (model, system_message, str(template_version), text):
+        digest.update(part.encode("utf-8"))
+        # Separator, so that moving text between parts changes the key
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite backed prompt/response cache with TTL and size based eviction.
+    """
+
+    def __init__(self, path, ttl=30 * 24 * 3600, max_entries=10000):
+        self.path = path
+        # Seconds after which an entry is no longer served
+        self.ttl = ttl
+        # Maximum number of entries kept after an insert
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+            "ON responses (accessed_at)"
+        )
+        self._connection.commit()
+
+    def get(self, key):
+        """
+        Return the cached response for a key, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self._connection.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, response):
+        """
+        Store a response and evict the least recently used entries above
+        the size limit.
+        """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, model, response, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            self._connection.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._connection.commit()
+
+    def purge(self, expired_only=False):
+        """
+        Delete all entries, or only the expired ones. Returns the number of
+        deleted entries.
+        """
+        with self._lock:
+            if expired_only:
+                cursor = self._connection.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (time.time() - self.ttl,),
+                )
+            else:
+                cursor = self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        """
+        Return the entry count and the hit/miss counters of this process.
+        """
+        with self._lock:
+            entries = self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def warm(cache, pdf_paths):
+    """
+    Run the syllabus analysis prompts for local PDFs so later uploads of
+    the same syllabuses are served from the cache. Like an upload, only
+    what the local rules cannot extract is sent to OpenAI.
+    """
+    from src import config
+    from src.course_page import extract_course_info
+    from src.course_page import extract_course_work_details
+    from src.llm_executor import LLMExecutor
+    from src.pdf_text import PdfTextExtractor
+
+    extractor = PdfTextExtractor()
+    executor = LLMExecutor(
+        max_workers=config.LLM_MAX_WORKERS,
+        requests_per_minute=config.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=config.LLM_TOKENS_PER_MINUTE,
+        max_retries=config.LLM_MAX_RETRIES,
+    )
+    try:
+        for pdf_path in pdf_paths:
+            with open(pdf_path, "rb") as pdf_file:
+                text = extractor.extract_text(pdf_file.read())
+            extract_course_info(text, executor=executor, cache=cache)
+            extract_course_work_details(text, executor=executor, cache=cache)
+            print(f"Warmed {pdf_path}")
+    finally:
+        executor.shutdown()
+        extractor.shutdown()
+
+
+def main():
+    from src import config
+
+    parser = argparse.ArgumentParser(description="Manage the LLM cache")
+    parser.add_argument(
+        "--path",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), config.LLM_CACHE_PATH
+        ),
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show the number of cached entries")
+    purge_parser = commands.add_parser("purge", help="Delete cached entries")
+    purge_parser.add_argument(
+        "--expired", action="store_true", help="Only delete expired entries"
+    )
+    warm_parser = commands.add_parser("warm", help="Cache syllabus PDFs")
+    warm_parser.add_argument("pdfs", nargs="+")
+    args = parser.parse_args()
+
+    cache = LLMCache(
+        args.path,
+        ttl=config.LLM_CACHE_TTL_SECONDS,
+        max_entries=config.LLM_CACHE_MAX_ENTRIES,
+    )
+    if args.command == "stats":
+        print(cache.stats())
+    elif args.command == "purge":
+        print(f"Deleted {cache.purge(expired_only=args.expired)} entries")
+    else:
+        warm(cache, args.pdfs)
+        print(cache.stats())
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Filename: <llm_executor.py>
+
+Description:
+    Concurrent executor for OpenAI calls over syllabus segments. Segments
+    are sent in parallel on a thread pool while respecting requests-per-
+    minute and tokens-per-minute budgets, failed calls are retried with
+    jittered exponential backoff, and the outputs are returned in the same
+    order as the segments.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import contextvars
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+# Errors after which retrying the same request can succeed
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.Timeout,
+    openai.error.ServiceUnavailableError,
+    openai.error.APIConnectionError,
+)
+
+
+class RateLimiter:
+    """
+    Token buckets for a requests-per-minute and a tokens-per-minute budget.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._requests = min(
+            self.requests_per_minute,
+            self._requests + elapsed * self.requests_per_minute / 60,
+        )
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + elapsed * self.tokens_per_minute / 60,
+        )
+
+    def acquire(self, tokens):
+        """
+        Block until one request using the given number of tokens fits in
+        both budgets, then consume it.
+        """
+        # A single request larger than the whole budget waits for a full one
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self.requests_per_minute,
+                    (tokens - self._tokens) * 60 / self.tokens_per_minute,
+                )
+            time.sleep(max(wait, 0.01))
+
+
+class LLMExecutor:
+    """
+    Thread pool that runs LLM calls concurrently under a rate limit.
+    """
+
+    def __init__(
+        self,
+        max_workers=8,
+        requests_per_minute=3500,
+        tokens_per_minute=90000,
+        max_retries=5,
+        base_delay=1.0,
+        max_delay=30.0,
+    ):
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="llm"
+        )
+
+    def _call(self, function, segment, tokens):
+        """
+        Call function(segment) within the rate limit, retrying with full
+        jitter backoff on transient OpenAI errors.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(tokens)
+            try:
+                return function(segment)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise e
+                delay = min(self.max_delay, self.base_delay * 2**attempt)
+                print(f"LLM call failed ({e}), retrying")
+                time.sleep(random.uniform(0, delay))
+
+    def map(self, function, segments, token_counts):
+        """
+        Apply function to every segment concurrently and return the results
+        in segment order. token_counts gives the estimated tokens each call
+        uses against the tokens-per-minute budget.
+        """
+        # Run every call in a copy of the caller's context, so the metrics
+        # of the calls are tagged with the route that made them
+        futures = [
+            self._executor.submit(
+                contextvars.copy_context().run,
+                self._call,
+                function,
+                segment,
+                tokens,
+            )
+            for segment, tokens in zip(segments, token_counts)
+        ]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self._executor.shutdown()
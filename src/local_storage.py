@@ -0,0 +1,403 @@
+"""
+Filename: <local_storage.py>
+
+Description:
+    Local stand-in for AWS S3 so the application can be developed and
+    tested offline. LocalS3Client implements the subset of the boto3 S3
+    client used by the application on top of a local directory, including
+    presigned GET URLs and presigned POST upload policies, and conditional
+    writes with IfMatch and IfNoneMatch. The blueprint in this file plays
+    the role of the S3 endpoint the browser talks to.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import base64
+import fcntl
+import hashlib
+import hmac
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from urllib.parse import urlencode
+
+import botocore.exceptions
+from flask import Blueprint, abort, current_app, request, send_file
+
+local_storage_blueprint = Blueprint("local_storage", __name__)
+
+
+class NoSuchKey(botocore.exceptions.ClientError):
+    """
+    Raised by get_object for a missing key, like the boto3 exception.
+    """
+
+    def __init__(self, key):
+        super().__init__(
+            {"Error": {"Code": "NoSuchKey", "Key": key}}, "GetObject"
+        )
+
+
+class LocalS3Exceptions:
+    NoSuchKey = NoSuchKey
+
+
+def is_precondition_failed(error):
+    """
+    Whether a ClientError is a failed IfMatch or IfNoneMatch condition,
+    meaning another writer changed the object first.
+    """
+    return error.response.get("Error", {}).get("Code") in (
+        "PreconditionFailed",
+        "412",
+        "ConditionalRequestConflict",
+        "409",
+    )
+
+
+def write_conditions(etag):
+    """
+    put_object arguments that only write if the object still has the
+    given ETag, or still does not exist if etag is None.
+    """
+    return {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+
+
+class LocalS3Client:
+    """
+    Directory backed replacement for the boto3 S3 client.
+    """
+
+    exceptions = LocalS3Exceptions
+
+    def __init__(self, root_path, secret_key, url_prefix="/local-storage"):
+        self.root_path = os.path.abspath(root_path)
+        self.secret_key = (
+            secret_key.encode() if isinstance(secret_key, str) else secret_key
+        )
+        self.url_prefix = url_prefix
+        os.makedirs(self.root_path, exist_ok=True)
+
+    def object_path(self, bucket, key):
+        """
+        Map a bucket and key to a file path inside the storage root.
+        """
+        path = os.path.abspath(os.path.join(self.root_path, bucket, key))
+        if not path.startswith(self.root_path + os.sep):
+            raise ValueError(f"Invalid key: {key}")
+        return path
+
+    @staticmethod
+    def _etag(path):
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(chunk)
+        return f'"{md5.hexdigest()}"'
+
+    def _not_found(self, key, operation):
+        return botocore.exceptions.ClientError(
+            {"Error": {"Code": "404", "Key": key}}, operation
+        )
+
+    def _write(self, bucket, key, fileobj, if_match=None, if_none_match=None):
+        """
+        Atomically write a file-like object to the given key, if the
+        object matches the conditions. Writes are serialized by a lock
+        file, so the conditions also hold across processes.
+        """
+        path = self.object_path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+        with open(os.path.join(self.root_path, ".write.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            exists = os.path.isfile(path)
+            if (if_none_match == "*" and exists) or (
+                if_match is not None
+                and (not exists or self._etag(path) != if_match)
+            ):
+                os.remove(tmp_path)
+                raise botocore.exceptions.ClientError(
+                    {"Error": {"Code": "PreconditionFailed", "Key": key}},
+                    "PutObject",
+                )
+            os.replace(tmp_path, path)
+            return {"ETag": self._etag(path)}
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None, **kwargs):
+        path = self.object_path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise NoSuchKey(Key)
+        etag = self._etag(path)
+        if IfNoneMatch is not None and IfNoneMatch == etag:
+            raise botocore.exceptions.ClientError(
+                {"Error": {"Code": "304"}}, "GetObject"
+            )
+        with open(path, "rb") as f:
+            body = f.read()
+        return {
+            "Body": io.BytesIO(body),
+            "ETag": etag,
+            "ContentLength": len(body),
+            "LastModified": os.path.getmtime(path),
+        }
+
+    def head_object(self, Bucket, Key, **kwargs):
+        path = self.object_path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise self._not_found(Key, "HeadObject")
+        return {
+            "ETag": self._etag(path),
+            "ContentLength": os.path.getsize(path),
+            "LastModified": os.path.getmtime(path),
+        }
+
+    def put_object(
+        self,
+        Bucket,
+        Key,
+        Body=b"",
+        IfMatch=None,
+        IfNoneMatch=None,
+        **kwargs,
+    ):
+        if isinstance(Body, str):
+            Body = Body.encode("utf-8")
+        if isinstance(Body, bytes):
+            Body = io.BytesIO(Body)
+        return self._write(Bucket, Key, Body, IfMatch, IfNoneMatch)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, ExtraArgs=None, **kwargs):
+        self._write(Bucket, Key, Fileobj)
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, **kwargs):
+        with open(Filename, "rb") as f:
+            self._write(Bucket, Key, f)
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        path = self.object_path(Bucket, Key)
+        if os.path.isfile(path):
+            os.remove(path)
+        return {}
+
+    def list_objects_v2(
+        self,
+        Bucket,
+        Prefix="",
+        MaxKeys=1000,
+        ContinuationToken=None,
+        StartAfter=None,
+        Delimiter=None,
+        **kwargs,
+    ):
+        """
+        List the keys of a bucket in lexicographic order, a page at a time.
+        With a Delimiter, the keys that contain it after the prefix are
+        rolled up into CommonPrefixes. The continuation token is the last
+        key or common prefix of the previous page.
+        """
+        start = ContinuationToken or StartAfter
+        bucket_path = os.path.join(self.root_path, Bucket)
+        entries, prefixes = set(), set()
+        for directory, _, filenames in os.walk(bucket_path):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                key = os.path.relpath(path, bucket_path).replace(os.sep, "/")
+                if not key.startswith(Prefix) or (
+                    start is not None and key <= start
+                ):
+                    continue
+                rest = key[len(Prefix):]
+                if Delimiter and Delimiter in rest:
+                    key = Prefix + rest[: rest.index(Delimiter) + 1]
+                    prefixes.add(key)
+                entries.add(key)
+        # The common prefix the previous page ended with is done
+        entries.discard(ContinuationToken)
+        entries = sorted(entries)
+        page = entries[:MaxKeys]
+        keys = [key for key in page if key not in prefixes]
+        response = {
+            "Contents": [
+                {
+                    "Key": key,
+                    "Size": os.path.getsize(self.object_path(Bucket, key)),
+                    "ETag": self._etag(self.object_path(Bucket, key)),
+                    "LastModified": os.path.getmtime(
+                        self.object_path(Bucket, key)
+                    ),
+                }
+                for key in keys
+            ],
+            "KeyCount": len(page),
+            "IsTruncated": len(entries) > MaxKeys,
+        }
+        if Delimiter:
+            response["CommonPrefixes"] = [
+                {"Prefix": key} for key in page if key in prefixes
+            ]
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def _sign(self, message):
+        return hmac.new(
+            self.secret_key, message.encode("utf-8"), hashlib.sha256
+        ).hexdigest()
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600):
+        """
+        Return a signed, expiring URL served by the local storage blueprint.
+        """
+        bucket, key = Params["Bucket"], Params["Key"]
+        expires = int(time.time()) + int(ExpiresIn)
+        signature = self._sign(f"{bucket}/{key}:{expires}")
+        query = urlencode({"expires": expires, "signature": signature})
+        return f"{self.url_prefix}/{bucket}/{key}?{query}"
+
+    def verify_url(self, bucket, key, expires, signature):
+        """
+        Check a signature produced by generate_presigned_url.
+        """
+        try:
+            expires = int(expires)
+        except (TypeError, ValueError):
+            return False
+        expected = self._sign(f"{bucket}/{key}:{expires}")
+        return expires >= time.time() and hmac.compare_digest(
+            expected, signature or ""
+        )
+
+    def generate_presigned_post(
+        self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600
+    ):
+        """
+        Return an upload form policy in the same shape as boto3: a URL and
+        the form fields the browser must send along with the file.
+        """
+        fields = dict(Fields or {})
+        fields["key"] = Key
+        conditions = list(Conditions or []) + [
+            {"bucket": Bucket},
+            {"key": Key},
+        ]
+        policy = {
+            "expiration": int(time.time()) + int(ExpiresIn),
+            "conditions": conditions,
+        }
+        encoded_policy = base64.b64encode(
+            json.dumps(policy).encode("utf-8")
+        ).decode("ascii")
+        fields["policy"] = encoded_policy
+        fields["signature"] = self._sign(encoded_policy)
+        return {"url": f"{self.url_prefix}/{Bucket}", "fields": fields}
+
+    def verify_post(self, bucket, form, size):
+        """
+        Validate an upload form against its signed policy. Returns the key
+        to store the file under or raises ValueError.
+        """
+        encoded_policy = form.get("policy", "")
+        if not hmac.compare_digest(
+            self._sign(encoded_policy), form.get("signature", "")
+        ):
+            raise ValueError("Invalid policy signature")
+        policy = json.loads(base64.b64decode(encoded_policy))
+        if policy["expiration"] < time.time():
+            raise ValueError("Policy expired")
+
+        values = dict(form)
+        values["bucket"] = bucket
+        for condition in policy["conditions"]:
+            if isinstance(condition, dict):
+                for field, expected in condition.items():
+                    if values.get(field) != expected:
+                        raise ValueError(f"Condition failed for {field}")
+            elif condition[0] == "starts-with":
+                field = condition[1].lstrip("$")
+                if not values.get(field, "").startswith(condition[2]):
+                    raise ValueError(f"Condition failed for {field}")
+            elif condition[0] == "content-length-range":
+                if not condition[1] <= size <= condition[2]:
+                    raise ValueError("File size outside allowed range")
+        return form["key"]
+
+
+@local_storage_blueprint.route("/<bucket>", methods=["POST"])
+def upload(bucket):
+    """
+    Accept a browser upload made with a presigned POST policy.
+    """
+    s3 = current_app.config["S3_CLIENT"]
+    # Only served when the local stand-in replaces S3
+    if not hasattr(s3, "verify_post"):
+        abort(404)
+    file = request.files.get("file")
+    if file is None:
+        abort(400)
+
+    # Measure the size without reading the upload into memory
+    file.stream.seek(0, os.SEEK_END)
+    size = file.stream.tell()
+    file.stream.seek(0)
+    try:
+        key = s3.verify_post(bucket, request.form, size)
+    except (ValueError, KeyError) as e:
+        print(f"Rejected local storage upload: {e}")
+        abort(403)
+
+    s3.upload_fileobj(file.stream, bucket, key)
+    return "", 204
+
+
+@local_storage_blueprint.route("/<bucket>/<path:key>", methods=["GET"])
+def download(bucket, key):
+    """
+    Serve an object through a presigned GET URL.
+    """
+    s3 = current_app.config["S3_CLIENT"]
+    # Only served when the local stand-in replaces S3
+    if not hasattr(s3, "verify_post"):
+        abort(404)
+    if not s3.verify_url(
+        bucket, key, request.args.get("expires"), request.args.get("signature")
+    ):
+        abort(403)
+    try:
+        path = s3.object_path(bucket, key)
+    except ValueError:
+        abort(404)
+    if not os.path.isfile(path):
+        abort(404)
+    return send_file(path)
+
+
+def create_s3_client(config, secret_key="cli"):
+    """
+    Storage client configured like the app's, for command line tools.
+    """
+    backend = os.environ.get("STORAGE_BACKEND", config.STORAGE_BACKEND)
+    if backend == "local":
+        return LocalS3Client(
+            os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                config.LOCAL_STORAGE_PATH,
+            ),
+            os.environ.get("LOCAL_STORAGE_SECRET", secret_key),
+        )
+
+    import boto3
+
+    return boto3.client(
+        "s3",
+        aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+        region_name=config.REGION_NAME,
+    )
@@ -0,0 +1,417 @@
+"""
+Filename: <metrics.py>
+
+Description:
+    Request, storage and LLM metrics for the web application, exposed at
+    /metrics in the Prometheus text format. A middleware records the
+    latency of every request by blueprint and route. Storage calls made
+    through InstrumentedS3Client and LLM calls are counted, timed and
+    tagged with the route that made them, and the number of storage calls
+    of each request is kept as a histogram, so a route making one call
+    per course shows up at a glance.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import botocore.exceptions
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    g,
+    has_app_context,
+    request,
+)
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# (blueprint, endpoint, storage call counter) of the current request.
+# Calls made outside of a request, like background jobs, are "background".
+ROUTE = contextvars.ContextVar("route", default=None)
+
+
+def escape_label(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs)
+        + "}"
+    )
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with labels.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, labels=()):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name, format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """
+    Cumulative histogram with labels.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., sum, count]
+        self._values = {}
+
+    def observe(self, labels, value):
+        with self._lock:
+            values = self._values.get(labels)
+            if values is None:
+                values = self._values[labels] = [0] * len(self.buckets) + [
+                    0.0,
+                    0,
+                ]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    values[i] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def get(self, labels=()):
+        """
+        (sum, count) of the observations with the given labels.
+        """
+        with self._lock:
+            values = self._values.get(labels, [0.0, 0])
+            return values[-2], values[-1]
+
+    def samples(self):
+        with self._lock:
+            values = sorted(
+                (labels, list(value)) for labels, value in self._values.items()
+            )
+        for labels, value in values:
+            for bound, count in zip(self.buckets, value):
+                yield (
+                    f"{self.name}_bucket",
+                    format_labels(
+                        self.labelnames, labels, [("le", format_value(bound))]
+                    ),
+                    count,
+                )
+            label_text = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum", label_text, value[-2]
+            yield f"{self.name}_count", label_text, value[-1]
+
+
+class MetricsRegistry:
+    """
+    The metrics of the application and their Prometheus rendering.
+    """
+
+    def __init__(self):
+        route = ("blueprint", "endpoint")
+        self.request_duration = Histogram(
+            "app_request_duration_seconds",
+            "Latency of HTTP requests.",
+            route + ("method",),
+            LATENCY_BUCKETS,
+        )
+        self.requests = Counter(
+            "app_requests_total",
+            "HTTP requests by response status.",
+            route + ("method", "status"),
+        )
+        self.request_storage_calls = Histogram(
+            "app_request_storage_calls",
+            "Storage calls made by one HTTP request.",
+            route,
+            CALL_COUNT_BUCKETS,
+        )
+        self.storage_calls = Counter(
+            "app_storage_calls_total",
+            "Storage calls by operation and outcome.",
+            ("operation",) + route + ("outcome",),
+        )
+        self.storage_duration = Histogram(
+            "app_storage_call_duration_seconds",
+            "Latency of storage calls.",
+            ("operation",) + route,
+            LATENCY_BUCKETS,
+        )
+        self.storage_bytes = Counter(
+            "app_storage_bytes_total",
+            "Bytes read or written by storage calls.",
+            ("operation",) + route,
+        )
+        self.llm_calls = Counter(
+            "app_llm_calls_total",
+            "LLM calls by outcome.",
+            route + ("outcome",),
+        )
+        self.llm_duration = Histogram(
+            "app_llm_call_duration_seconds",
+            "Latency of LLM calls.",
+            route,
+            LATENCY_BUCKETS,
+        )
+        self.llm_tokens = Counter(
+            "app_llm_tokens_total",
+            "Tokens used by LLM calls.",
+            route + ("kind",),
+        )
+        self.metrics = [
+            self.request_duration,
+            self.requests,
+            self.request_storage_calls,
+            self.storage_calls,
+            self.storage_duration,
+            self.storage_bytes,
+            self.llm_calls,
+            self.llm_duration,
+            self.llm_tokens,
+        ]
+
+    @staticmethod
+    def current_route():
+        route = ROUTE.get()
+        if route is None:
+            return ("", "background")
+        return route[0], route[1]
+
+    @contextmanager
+    def track_storage_call(self, operation):
+        """
+        Time a storage call. The caller can set call["bytes"].
+        """
+        route = self.current_route()
+        call = {"bytes": 0}
+        outcome = "ok"
+        start = time.perf_counter()
+        try:
+            yield call
+        except botocore.exceptions.ClientError as e:
+            outcome = e.response.get("Error", {}).get("Code", "error")
+            raise e
+        except Exception as e:
+            outcome = type(e).__name__
+            raise e
+        finally:
+            labels = (operation,) + route
+            self.storage_duration.observe(
+                labels, time.perf_counter() - start
+            )
+            self.storage_calls.inc(labels + (outcome,))
+            if call["bytes"]:
+                self.storage_bytes.inc(labels, call["bytes"])
+            current = ROUTE.get()
+            if current is not None:
+                current[2][0] += 1
+
+    @contextmanager
+    def track_llm_call(self):
+        """
+        Time an LLM call. The caller can set call["usage"] to the usage
+        of the response.
+        """
+        route = self.current_route()
+        call = {"usage": None}
+        outcome = "ok"
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception as e:
+            outcome = type(e).__name__
+            raise e
+        finally:
+            self.llm_duration.observe(route, time.perf_counter() - start)
+            self.llm_calls.inc(route + (outcome,))
+            for kind in ("prompt_tokens", "completion_tokens"):
+                tokens = (call["usage"] or {}).get(kind)
+                if tokens:
+                    self.llm_tokens.inc(route + (kind,), tokens)
+
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Metrics of the application
+REGISTRY = MetricsRegistry()
+
+
+def track_llm_call():
+    """
+    Time an LLM call in the metrics of the current app, a no-op outside
+    of the app. The LLM threads run in a copy of the caller's context, so
+    they see the app too.
+    """
+    if has_app_context() and "METRICS" in current_app.config:
+        return current_app.config["METRICS"].track_llm_call()
+    return nullcontext({"usage": None})
+
+
+def request_size(body):
+    """
+    Size in bytes of a put_object body, 0 if it is a stream.
+    """
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return 0
+
+
+class InstrumentedS3Client:
+    """
+    Wrapper of an S3 client that records the storage metrics of its calls
+    and passes everything else through.
+    """
+
+    def __init__(self, s3, registry=REGISTRY):
+        self._s3 = s3
+        self._registry = registry
+
+    def __getattr__(self, name):
+        return getattr(self._s3, name)
+
+    def get_object(self, **kwargs):
+        with self._registry.track_storage_call("get_object") as call:
+            response = self._s3.get_object(**kwargs)
+            call["bytes"] = response.get("ContentLength", 0)
+            return response
+
+    def head_object(self, **kwargs):
+        with self._registry.track_storage_call("head_object"):
+            return self._s3.head_object(**kwargs)
+
+    def put_object(self, **kwargs):
+        with self._registry.track_storage_call("put_object") as call:
+            call["bytes"] = request_size(kwargs.get("Body", b""))
+            return self._s3.put_object(**kwargs)
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        with self._registry.track_storage_call("upload_file") as call:
+            call["bytes"] = os.path.getsize(Filename)
+            return self._s3.upload_file(Filename, Bucket, Key, **kwargs)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, **kwargs):
+        with self._registry.track_storage_call("upload_fileobj") as call:
+            start = Fileobj.tell() if Fileobj.seekable() else 0
+            response = self._s3.upload_fileobj(Fileobj, Bucket, Key, **kwargs)
+            if Fileobj.seekable():
+                call["bytes"] = Fileobj.tell() - start
+            return response
+
+    def list_objects_v2(self, **kwargs):
+        with self._registry.track_storage_call("list_objects_v2"):
+            return self._s3.list_objects_v2(**kwargs)
+
+    def delete_object(self, **kwargs):
+        with self._registry.track_storage_call("delete_object"):
+            return self._s3.delete_object(**kwargs)
+
+
+def init_app(app, registry=REGISTRY):
+    """
+    Record the latency and storage calls of every request of the app.
+    """
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        # The counter is a list so that copies of the context share it
+        ROUTE.set(
+            (request.blueprint or "", request.endpoint or "unmatched", [0])
+        )
+
+    @app.after_request
+    def record_request_metrics(response):
+        route = ROUTE.get()
+        start = g.pop("metrics_start", None)
+        if route is None or start is None:
+            return response
+        labels = route[:2]
+        registry.request_duration.observe(
+            labels + (request.method,), time.perf_counter() - start
+        )
+        registry.requests.inc(
+            labels + (request.method, str(response.status_code))
+        )
+        registry.request_storage_calls.observe(labels, route[2][0])
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(exception=None):
+        ROUTE.set(None)
+
+
+metrics_blueprint = Blueprint("metrics", __name__)
+
+
+@metrics_blueprint.route("/metrics")
+def metrics():
+    """
+    Prometheus scrape endpoint.
+    """
+    return Response(
+        current_app.config["METRICS"].render(),
+        mimetype="text/plain; version=0.0.4",
+    )
@@ -0,0 +1,120 @@
+"""
+Filename: <pdf_text.py>
+
+Description:
+    Shared PDF text extraction for syllabuses and transcripts. Every page
+    is extracted exactly once; large documents are split into page ranges
+    that are extracted in parallel on a process pool. Results are cached by
+    the SHA-256 of the PDF bytes, so re-uploading an identical PDF skips
+    extraction completely.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pypdf
+
+
+def extract_page_range(pdf_bytes, start, stop):
+    """
+    Extract the text of pages [start, stop) of a PDF. Runs inside the
+    worker processes, so it has to be a module level function.
+    """
+    reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+    pages = []
+    for page in reader.pages[start:stop]:
+        pages.append(page.extract_text() or "")
+    return pages
+
+
+class PdfTextExtractor:
+    """
+    Page level PDF text extractor with a process pool and a result cache.
+    """
+
+    def __init__(self, max_workers=None, parallel_threshold=32, cache_size=64):
+        # Number of worker processes, defaults to the number of CPUs
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Documents with fewer pages are extracted in this process
+        self.parallel_threshold = parallel_threshold
+        # Number of documents kept in the SHA-256 keyed cache
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers
+                )
+            return self._executor
+
+    def extract_pages(self, pdf_bytes):
+        """
+        Return the list of page texts of a PDF given as bytes.
+        """
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return list(self._cache[digest])
+
+        reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+        page_count = len(reader.pages)
+        if page_count < self.parallel_threshold or self.max_workers < 2:
+            pages = [page.extract_text() or "" for page in reader.pages]
+        else:
+            pages = self._extract_parallel(pdf_bytes, page_count)
+
+        with self._lock:
+            self._cache[digest] = pages
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(pages)
+
+    def _extract_parallel(self, pdf_bytes, page_count):
+        """
+        Split the pages into one contiguous range per worker and extract
+        the ranges concurrently, keeping the page order.
+        """
+        executor = self._get_executor()
+        range_size = -(-page_count // self.max_workers)
+        futures = [
+            executor.submit(
+                extract_page_range,
+                pdf_bytes,
+                start,
+                min(start + range_size, page_count),
+            )
+            for start in range(0, page_count, range_size)
+        ]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+        return pages
+
+    def extract_text(self, pdf_bytes):
+        """
+        Return the full text of a PDF given as bytes.
+        """
+        return "".join(self.extract_pages(pdf_bytes))
+
+    def shutdown(self):
+        """
+        Stop the worker processes if they were started.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
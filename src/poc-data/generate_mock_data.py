@@ -4,12 +4,12 @@ import os
 filename = "mock_data_poc.csv"
 mock_data = {
     "user_id": [1, 2, 3],
-    "username": ["Jane", "Katrina", "Joyce"],
     "courses": [
         ["SE4G06", "SE4X03", "ANTHROP1AA4"],
         ["SE4G06", "STAT3Y03"],
         ["SE4G06", "SE4X03", "MUSIC2MT3", "ENG1A03"],
     ],
 }
-df = pd.DataFrame(data=mock_data)
+# Usernames are kept in user_data.csv, profiles are keyed by user_id
+df = pd.DataFrame(data=mock_data).set_index("user_id")
 df.to_csv(f"{os.getcwd()}/{filename}")
@@ -8,11 +8,12 @@ Description:
 
 Author: Shuting Shi
 Created: 2024-01-21
-Last Modified: 2024-04-04
+Last Modified: 2026-10-19
 """
 
 from flask import (
     Blueprint,
+    Response,
     render_template,
     current_app,
     request,
@@ -28,9 +29,13 @@ except ImportError:
         get_df_from_csv_in_s3,
     )
 
-import pandas as pd
+try:
+    from src.focus_log import current_week_dates
+except ImportError:
+    from .focus_log import current_week_dates
+
 from io import StringIO
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 
 pomodoro_blueprint = Blueprint("pomodoro", __name__)
 
@@ -62,6 +67,10 @@ def pomodoro_page():
         if update_task_status_endpoint(task_id, "in_progress"):
             print(f"Task {task_id} updated to in_progress")
 
+    # Shown until the timer state arrives from the server
+    duration = current_app.config["POMODORO_DURATION_SECONDS"]
+    minutes, seconds = divmod(duration, 60)
+
     # Render the Pomodoro page template with provided parameters
     return render_template(
         "pomodoro_page.html",
@@ -69,6 +78,7 @@ def pomodoro_page():
         current_page=current_page,
         est_time=est_time,
         task_id=task_id,
+        timer_text=f"{minutes:02d}:{seconds:02d}",
     )
 
 
@@ -91,10 +101,15 @@ def update_task_status_endpoint(task_id, new_status):
 
     # Check if the task exists
     if task_id in tasks_df["id"].values:
-        # Update the status of the task
-        tasks_df.loc[tasks_df["id"] == task_id, "status"] = new_status
-        # Write the updated DataFrame back to S3
-        write_df_to_csv_in_s3(s3, bucket_name, mock_tasks_data_file, tasks_df)
+        task_rows = tasks_df["id"] == task_id
+        # Only rewrite the tasks when the status actually changes
+        if (tasks_df.loc[task_rows, "status"] != new_status).any():
+            # Update the status of the task
+            tasks_df.loc[task_rows, "status"] = new_status
+            # Write the updated DataFrame back to S3
+            write_df_to_csv_in_s3(
+                s3, bucket_name, mock_tasks_data_file, tasks_df
+            )
 
         # Return JSON response indicating success
         return jsonify(
@@ -111,100 +126,147 @@ def update_task_status_endpoint(task_id, new_status):
 @pomodoro_blueprint.route("/get_weekly_data", methods=["GET"])
 def get_weekly_data():
     """
-    Router for getting weekly data from s3
+    Router for getting the pomodoro counts of the current user in the
+    current week, read from the daily rollups
     """
-    bucket_name = current_app.config["BUCKET_NAME"]
-    s3 = current_app.config["S3_CLIENT"]
-    utc_now = datetime.now(timezone.utc)
-    current_week = utc_now.isocalendar()[1]
-    tomato_df = get_df_from_csv_in_s3(
-        s3, bucket_name, current_app.config["TOMATO_DATA_KEY"]
-    )
-    if tomato_df["week_of_year"].iloc[0] != current_week:
-        # Reset the weekly data since it's a new week
-        tomato_df = initialize_weekly_data()
-        write_df_to_csv_in_s3(
-            s3, bucket_name, current_app.config["TOMATO_DATA_KEY"], tomato_df
+    focus_log = current_app.config["FOCUS_LOG"]
+    user_id = current_app.config["userId"]
+    week_dates = current_week_dates()
+    current_week = min(week_dates.values()).isocalendar()[1]
+    daily = {
+        row["date"]: row
+        for row in focus_log.daily(
+            user_id, min(week_dates.values()), max(week_dates.values())
         )
-    # Convert DataFrame to JSON response
-    return jsonify(tomato_df.to_dict(orient="records"))
+    }
+    return jsonify(
+        [
+            {
+                "day": day,
+                "date": day_date.isoformat(),
+                "count": daily[day_date.isoformat()]["sessions"],
+                "seconds": daily[day_date.isoformat()]["seconds"],
+                "week_of_year": current_week,
+            }
+            for day, day_date in week_dates.items()
+        ]
+    )
 
 
-def initialize_weekly_data():
+@pomodoro_blueprint.route("/session", methods=["GET"])
+def session_state():
     """
-    Initialize weekly data DataFrame with zero records for each day
-    of the week.
+    Current state of the pomodoro timer of the current user
     """
-    # Initialize the weekly data for each day to zero
-    days = [
-        "Saturday",
-        "Sunday",
-        "Monday",
-        "Tuesday",
-        "Wednesday",
-        "Thursday",
-        "Friday",
-    ]
-    # Get the current week of the year
-    week_of_year = datetime.now().isocalendar()[1]
-    # Create dictionary for DataFrame construction
-    data = {"day": days, "count": [0] * 7, "week_of_year": [week_of_year] * 7}
-    # Create DataFrame from dictionary
-    return pd.DataFrame(data)
+    tracker = current_app.config["POMODORO_TRACKER"]
+    return jsonify(tracker.state(current_app.config["userId"]))
 
 
-@pomodoro_blueprint.route("/update_tomato/<day>", methods=["POST"])
-def update_tomato(day):
+@pomodoro_blueprint.route("/session/<action>", methods=["POST"])
+def session_action(action):
     """
-    Update Tomato count for weekly achievements form
+    Start, pause, resume, complete or reset the pomodoro timer of the
+    current user. The JSON body may have the "session_id" the page knows
+    about, and for start the "task_id" and "duration" in seconds. Repeated
+    requests do not change the state again.
     """
-    bucket_name = current_app.config["BUCKET_NAME"]
-    s3 = current_app.config["S3_CLIENT"]
-    tomato_data_key = current_app.config["TOMATO_DATA_KEY"]
-    utc_now = datetime.now(timezone.utc)
-    current_week = utc_now.isocalendar()[1]
+    tracker = current_app.config["POMODORO_TRACKER"]
+    user_id = current_app.config["userId"]
+    data = request.get_json(silent=True) or {}
+    session_id = data.get("session_id")
 
-    try:
-        # Load existing data or initialize if not present
+    if action == "start":
         try:
-            tomato_df = get_df_from_csv_in_s3(s3, bucket_name, tomato_data_key)
-            # Check if it's a new week
-            if tomato_df["week_of_year"].iloc[0] != current_week:
-                tomato_df["count"] = 0
-                tomato_df["week_of_year"] = current_week
-        except s3.exceptions.NoSuchKey:
-            tomato_df = pd.DataFrame(
-                {
-                    "day": [
-                        "Saturday",
-                        "Sunday",
-                        "Monday",
-                        "Tuesday",
-                        "Wednesday",
-                        "Thursday",
-                        "Friday",
-                    ],
-                    "count": [0, 0, 0, 0, 0, 0, 0],
-                    "week_of_year": [current_week] * 7,
-                }
-            )
+            task_id = data.get("task_id")
+            task_id = int(task_id) if task_id not in (None, "") else None
+            duration = data.get("duration")
+            duration = int(duration) if duration is not None else None
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid session"}), 400
+        if duration is not None and duration <= 0:
+            return jsonify({"message": "Invalid session"}), 400
+        return jsonify(tracker.start(user_id, task_id, duration))
+    if action in ("pause", "resume", "complete", "reset"):
+        return jsonify(getattr(tracker, action)(user_id, session_id))
+    return jsonify({"message": "Invalid action"}), 400
 
-        # Update count for the specified day
-        if day in tomato_df["day"].values:
-            tomato_df.loc[tomato_df["day"] == day, "count"] += 1
-            write_df_to_csv_in_s3(s3, bucket_name, tomato_data_key, tomato_df)
-            return jsonify({"message": "Tomato count updated successfully"})
-        else:
-            return jsonify({"message": "Invalid day"}), 400
-
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return (
-            jsonify(
-                {"message": "An error occurred while updating tomato count"}
-            ),
-            500,
+
+@pomodoro_blueprint.route("/session/events", methods=["GET"])
+def session_events():
+    """
+    Server-Sent Events stream pushing every change of the pomodoro timer
+    of the current user, so all open tabs and devices stay in sync.
+    """
+    tracker = current_app.config["POMODORO_TRACKER"]
+    stream = tracker.events(
+        current_app.config["userId"],
+        keepalive=current_app.config["POMODORO_SSE_KEEPALIVE_SECONDS"],
+    )
+    return Response(
+        stream,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@pomodoro_blueprint.route("/focus_stats", methods=["GET"])
+def focus_stats():
+    """
+    Focus sessions and focused seconds of the current user between the
+    "start" and "end" dates (yyyy-mm-dd, default the last 30 days), per
+    "day", per "week" or in "total" depending on "granularity".
+    """
+    focus_log = current_app.config["FOCUS_LOG"]
+    user_id = current_app.config["userId"]
+    today = datetime.now(timezone.utc).date()
+    try:
+        end_date = request.args.get("end")
+        end_date = date.fromisoformat(end_date) if end_date else today
+        start_date = request.args.get("start")
+        start_date = (
+            date.fromisoformat(start_date)
+            if start_date
+            else end_date - timedelta(days=29)
         )
+    except ValueError:
+        return jsonify({"message": "Dates must be yyyy-mm-dd"}), 400
+    if start_date > end_date:
+        return jsonify({"message": "start must not be after end"}), 400
+
+    granularity = request.args.get("granularity", "day")
+    if granularity == "day":
+        rows = focus_log.daily(user_id, start_date, end_date)
+    elif granularity == "week":
+        rows = focus_log.weekly(user_id, start_date, end_date)
+    elif granularity == "total":
+        rows = focus_log.totals(user_id, start_date, end_date)
+    else:
+        return jsonify({"message": "Invalid granularity"}), 400
+    return jsonify(
+        {
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "granularity": granularity,
+            "data": rows,
+        }
+    )
+
+
+@pomodoro_blueprint.route("/focus_analytics", methods=["GET"])
+def focus_analytics():
+    """
+    Focus analytics of the current user over the last "days" days
+    (default 90): actual vs. estimated hours per task and course, focus
+    streaks, productivity by hour of day and estimate accuracy.
+    """
+    try:
+        days = int(request.args.get("days", 90))
+    except ValueError:
+        return jsonify({"message": "days must be a number"}), 400
+    if not 1 <= days <= 3660:
+        return jsonify({"message": "days must be between 1 and 3660"}), 400
+    analytics = current_app.config["FOCUS_ANALYTICS"]
+    return jsonify(analytics.get(current_app.config["userId"], days))
 
 
 def write_df_to_csv_in_s3(client, bucket, key, dataframe):
@@ -0,0 +1,284 @@
+"""
+Filename: <pomodoro_tracker.py>
+
+Description:
+    Server-side state of the pomodoro timer of every user. Starting,
+    pausing, resuming and completing a session are idempotent state
+    transitions, so reopening the page or a second tab does not restart
+    the timer. A session completes on the server when its time is up and
+    is then recorded in the focus session log. Every state change is
+    pushed to the open pages of the user over Server-Sent Events.
+
+    Sessions are saved in the per-user key-value store and loaded again
+    the first time a user is seen, so a restart keeps the running session
+    and completes and records it if its time ran out meanwhile. Timers and
+    event streams live in one process: with several app workers, the tabs
+    of a user are only kept in sync if they talk to the same worker.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import json
+import queue
+import threading
+import time
+import uuid
+
+ACTIVE = ("running", "paused")
+# Name of the saved session in the per-user key-value store
+SESSION = "pomodoro_session"
+
+
+class PomodoroTracker:
+    """
+    Per-user pomodoro session state machine with change notifications.
+    """
+
+    def __init__(self, focus_log, default_duration=25 * 60, store=None):
+        # Completed sessions are recorded in this FocusSessionLog
+        self.focus_log = focus_log
+        # Length of a session in seconds when none is given
+        self.default_duration = default_duration
+        # UserKeyValueStore the sessions are saved in, if any
+        self.store = store
+        self._lock = threading.Lock()
+        # User id -> current or last session, None if the user has none
+        self._sessions = {}
+        # User id -> set of queues of the open event streams
+        self._subscribers = {}
+        # User id -> timer completing the running session
+        self._timers = {}
+
+    def _snapshot(self, session, now):
+        """
+        Public state of a session, with the seconds left at `now`.
+        """
+        if session is None:
+            return {"status": "idle", "duration": self.default_duration}
+        elapsed = session["elapsed"]
+        if session["status"] == "running":
+            elapsed += now - session["resumed_at"]
+        state = {
+            key: session[key]
+            for key in ("id", "task_id", "status", "duration", "version")
+        }
+        state["elapsed"] = round(min(elapsed, session["duration"]), 3)
+        state["remaining"] = round(max(session["duration"] - elapsed, 0), 3)
+        return state
+
+    def _load(self, user_id):
+        """
+        Load the saved session of a user seen for the first time. A running
+        session is scheduled again, or completed if its time is up.
+        """
+        if self.store is None:
+            return
+        with self._lock:
+            if user_id in self._sessions:
+                return
+        session = self.store.get(user_id, SESSION)
+        with self._lock:
+            if user_id in self._sessions:
+                return
+            self._sessions[user_id] = session
+            if session is None or session["status"] != "running":
+                return
+            if time.time() - session["resumed_at"] < (
+                session["duration"] - session["elapsed"]
+            ):
+                self._schedule(user_id, session)
+                return
+        # The time ran out while the app was not running
+        self.complete(user_id, session["id"])
+
+    def state(self, user_id):
+        """
+        Return the current state of the timer of a user.
+        """
+        self._load(user_id)
+        with self._lock:
+            return self._snapshot(self._sessions.get(user_id), time.time())
+
+    def _publish(self, user_id, session, now):
+        """
+        Push a changed session to the subscribers. Called with the lock.
+        """
+        session["version"] += 1
+        if self.store is not None:
+            # A copy, the session keeps changing while the write waits
+            self.store.set(user_id, SESSION, dict(session))
+        state = self._snapshot(session, now)
+        for subscriber in self._subscribers.get(user_id, ()):
+            subscriber.put(state)
+        return state
+
+    def _schedule(self, user_id, session):
+        """
+        Complete the running session on the server when its time is up.
+        Called with the lock.
+        """
+        self._cancel_timer(user_id)
+        remaining = session["duration"] - session["elapsed"]
+        timer = threading.Timer(
+            max(remaining, 0), self.complete, args=(user_id, session["id"])
+        )
+        timer.daemon = True
+        self._timers[user_id] = timer
+        timer.start()
+
+    def _cancel_timer(self, user_id):
+        timer = self._timers.pop(user_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _current(self, user_id, session_id):
+        """
+        The active session of a user, or None if there is none or the
+        request is about an older session (a stale tab).
+        """
+        session = self._sessions.get(user_id)
+        if session is None or session["status"] not in ACTIVE:
+            return None
+        if session_id is not None and session_id != session["id"]:
+            return None
+        return session
+
+    def start(self, user_id, task_id=None, duration=None):
+        """
+        Start a session for a task. If a session for the same task is
+        already running or paused it is returned unchanged.
+        """
+        self._load(user_id)
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if (
+                session is not None
+                and session["status"] in ACTIVE
+                and session["task_id"] == task_id
+            ):
+                return self._snapshot(session, now)
+            session = {
+                "id": uuid.uuid4().hex,
+                "task_id": task_id,
+                "status": "running",
+                "duration": duration or self.default_duration,
+                "elapsed": 0.0,
+                "started_at": now,
+                "resumed_at": now,
+                "version": session["version"] if session else 0,
+            }
+            self._sessions[user_id] = session
+            self._schedule(user_id, session)
+            return self._publish(user_id, session, now)
+
+    def pause(self, user_id, session_id=None):
+        """
+        Pause the running session, a no-op if it is not running.
+        """
+        self._load(user_id)
+        now = time.time()
+        with self._lock:
+            session = self._current(user_id, session_id)
+            if session is None or session["status"] != "running":
+                return self._snapshot(self._sessions.get(user_id), now)
+            session["elapsed"] += now - session["resumed_at"]
+            session["status"] = "paused"
+            self._cancel_timer(user_id)
+            return self._publish(user_id, session, now)
+
+    def resume(self, user_id, session_id=None):
+        """
+        Resume the paused session, a no-op if it is not paused.
+        """
+        self._load(user_id)
+        now = time.time()
+        with self._lock:
+            session = self._current(user_id, session_id)
+            if session is None or session["status"] != "paused":
+                return self._snapshot(self._sessions.get(user_id), now)
+            session["status"] = "running"
+            session["resumed_at"] = now
+            self._schedule(user_id, session)
+            return self._publish(user_id, session, now)
+
+    def complete(self, user_id, session_id=None):
+        """
+        Complete the active session and record it in the focus session
+        log. Completing a session twice records it once.
+        """
+        self._load(user_id)
+        now = time.time()
+        with self._lock:
+            session = self._current(user_id, session_id)
+            if session is None:
+                return self._snapshot(self._sessions.get(user_id), now)
+            if session["status"] == "running":
+                session["elapsed"] += now - session["resumed_at"]
+            session["elapsed"] = min(session["elapsed"], session["duration"])
+            session["status"] = "completed"
+            self._cancel_timer(user_id)
+            state = self._publish(user_id, session, now)
+        if session["elapsed"] >= 1:
+            self.focus_log.record(
+                user_id,
+                session["task_id"],
+                session["started_at"],
+                session["elapsed"],
+            )
+        return state
+
+    def reset(self, user_id, session_id=None):
+        """
+        Abandon the active session without recording it.
+        """
+        self._load(user_id)
+        now = time.time()
+        with self._lock:
+            session = self._current(user_id, session_id)
+            if session is None:
+                return self._snapshot(self._sessions.get(user_id), now)
+            session["status"] = "reset"
+            self._cancel_timer(user_id)
+            return self._publish(user_id, session, now)
+
+    def subscribe(self, user_id):
+        """
+        Return a queue receiving the state of the user's timer on every
+        change, starting with the current state.
+        """
+        self._load(user_id)
+        subscriber = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+            subscriber.put(
+                self._snapshot(self._sessions.get(user_id), time.time())
+            )
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def events(self, user_id, keepalive=15):
+        """
+        Server-Sent Events stream of the state of the user's timer, with a
+        comment line every `keepalive` seconds to keep proxies from closing
+        an idle connection.
+        """
+        subscriber = self.subscribe(user_id)
+        try:
+            while True:
+                try:
+                    state = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(state)}\n\n"
+        finally:
+            self.unsubscribe(user_id, subscriber)
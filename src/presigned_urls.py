@@ -0,0 +1,101 @@
+"""
+Filename: <presigned_urls.py>
+
+Description:
+    Issues presigned AWS S3 URLs lazily at render time. Signed URLs are
+    cached per object key until shortly before they expire, and a batch call
+    signs every image on a page at once, so stored data only needs to keep
+    the object key and never goes stale.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import threading
+import time
+from urllib.parse import urlparse, unquote
+
+import botocore
+
+
+def create_presigned_url(s3, bucket_name, object_name, expiration=3600):
+    """
+    Generate a presigned URL for accessing an object in an S3 bucket.
+    """
+    try:
+        # Generate presigned URL for accessing the object
+        response = s3.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket_name, "Key": object_name},
+            ExpiresIn=expiration,
+        )
+    except botocore.exceptions.ClientError as e:
+        # Print error message and return None if URL generation fails
+        print(f"Error generating presigned URL: {e}")
+        return None
+    return response
+
+
+def object_key_from_url(url, bucket_name):
+    """
+    Recover the object key from a previously stored presigned URL, for rows
+    written before only keys were stored.
+    """
+    path = unquote(urlparse(url).path).lstrip("/")
+    # Path-style URLs carry the bucket name as the first path segment
+    if path.startswith(f"{bucket_name}/"):
+        path = path[len(bucket_name) + 1:]
+    return path or None
+
+
+class PresignedUrlCache:
+    """
+    Per-key cache of presigned GET URLs.
+    """
+
+    def __init__(self, s3, bucket_name, expiration=3600, refresh_margin=300):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        # Lifetime of each signed URL in seconds
+        self.expiration = expiration
+        # URLs are re-signed this many seconds before they actually expire
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._urls = {}
+
+    def get_url(self, key):
+        """
+        Return a valid presigned URL for a single object key.
+        """
+        return self.get_urls([key]).get(key)
+
+    def get_urls(self, keys):
+        """
+        Return a dictionary mapping every given key to a valid presigned
+        URL, signing only the keys missing from the cache or about to expire.
+        """
+        now = time.monotonic()
+        urls = {}
+        with self._lock:
+            for key in set(keys):
+                cached = self._urls.get(key)
+                if cached is not None and cached[1] > now:
+                    urls[key] = cached[0]
+                    continue
+                url = create_presigned_url(
+                    self.s3, self.bucket_name, key, self.expiration
+                )
+                if url is None:
+                    continue
+                refresh_at = now + self.expiration - self.refresh_margin
+                self._urls[key] = (url, refresh_at)
+                urls[key] = url
+        return urls
+
+    def invalidate(self, key):
+        """
+        Drop the cached URL of a key, e.g. after the object was replaced.
+        """
+        with self._lock:
+            self._urls.pop(key, None)
@@ -5,12 +5,13 @@ Description:
     Manages user profile operations for a web application. Features include
     displaying user profiles with academic details, uploading academic
     transcripts to calculate and display the cumulative Grade Point Average
-    (cGPA), and allowing users to change their username. It integrates with
-    filesystem operations for file handling and AWS S3 for data storage.
+    (cGPA), and allowing users to change their username. Transcripts are
+    parsed in memory and the cGPA is stored in the user's profile in the
+    per-user key-value store.
 
 Author: Qianni Wang
 Created: 2024-02-04
-Last Modified: 2024-04-04
+Last Modified: 2026-10-19
 """
 
 from flask import (
@@ -21,22 +22,30 @@ from flask import (
     redirect,
     url_for,
 )
-import os
-import pypdf
+import hashlib
+
+from pypdf.errors import PyPdfError
+
+# Name of the transcript result in the per-user key-value store
+TRANSCRIPT_GPA = "transcript_gpa"
+NO_TRANSCRIPT = "None (Please upload your transcript)"
 
-try:
-    from src.util import (
-        upload_df_to_s3,
-        get_df_from_csv_in_s3,
-    )
-except ImportError:
-    from .util import (
-        upload_df_to_s3,
-        get_df_from_csv_in_s3,
-    )
 profile_blueprint = Blueprint("profile", __name__)
 
 
+def transcript_gpa_text(user_id):
+    """
+    The cGPA shown on the profile page, from the user's stored transcript
+    result.
+    """
+    result = current_app.config["USER_KV"].get(user_id, TRANSCRIPT_GPA)
+    if result is None:
+        return NO_TRANSCRIPT
+    if result["cgpa"] is None:
+        return "None (No term totals found in your transcript)"
+    return str(result["cgpa"])
+
+
 @profile_blueprint.route("/profile_page", methods=["GET", "POST"])
 def profile_page():
     """
@@ -48,118 +57,83 @@ def profile_page():
     # Retrieve current page from application config
     current_page = current_app.config.get("current_page", "home")
 
-    # Retrieve cGPA from application config, set default if not available
-    cGPA = current_app.config.get(
-        "cGPA", "None (Please upload your transcript)"
-    )
-
     # Render profile page template with retrieved information
     return render_template(
         "profile_page.html",
         username=username,
         current_page=current_page,
-        cGPA=cGPA,
+        cGPA=transcript_gpa_text(current_app.config["userId"]),
     )
 
 
 @profile_blueprint.route("/upload_transcript", methods=["GET", "POST"])
 def upload_transcript():
     """
-    Route for uploading a transcript file.
+    Route for uploading a transcript file. The upload is parsed in memory
+    and the result is stored in the user's profile.
     """
     # Get current user's username and page
     username = current_app.config.get("username", "")
     current_page = current_app.config.get("current_page", "home")
-
-    # Path to store uploaded transcripts
-    Transcript_path = current_app.config["UPLOAD_FOLDER"]
-
-    # Current CGPA
-    cGPA = current_app.config.get(
-        "cGPA", "None (Please upload your transcript)"
-    )
+    user_id = current_app.config["userId"]
+    max_bytes = current_app.config["TRANSCRIPT_MAX_UPLOAD_BYTES"]
+    message = None
 
     if request.method == "POST":
         # Check if file was uploaded
-        file = request.files["transcript"]
-        os.makedirs(Transcript_path, exist_ok=True)
+        file = request.files.get("transcript")
         if file:
-            # Save the uploaded file
-            filename = file.filename
-            file.save(os.path.join(Transcript_path, filename))
-
-            # Process the transcript and update current CGPA
-            current_app.config["cGPA"] = process_transcript_pdf(
-                os.path.join(Transcript_path, filename)
-            )
-
-            # Render profile page with updated CGPA
-            return render_template(
-                "profile_page.html",
-                username=username,
-                current_page=current_page,
-                cGPA=str(current_app.config["cGPA"]),
-            )
-
-    # Render profile page with upload form
+            # Read one byte more than allowed to detect oversized uploads
+            pdf_bytes = file.stream.read(max_bytes + 1)
+            if len(pdf_bytes) > max_bytes:
+                message = "The transcript is too large."
+            else:
+                message = store_transcript_gpa(user_id, pdf_bytes)
+
+    # Render profile page with the current CGPA
     return render_template(
         "profile_page.html",
         username=username,
         current_page=current_page,
-        cGPA=cGPA,
+        cGPA=message or transcript_gpa_text(user_id),
     )
 
 
+def store_transcript_gpa(user_id, pdf_bytes):
+    """
+    Compute the cGPA of a transcript and store it in the user's profile,
+    unless the user already uploaded the same file. Returns an error
+    message or None.
+    """
+    user_kv = current_app.config["USER_KV"]
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    stored = user_kv.get(user_id, TRANSCRIPT_GPA)
+    if stored is not None and stored.get("sha256") == digest:
+        return None
+    try:
+        result = current_app.config["TRANSCRIPT_PARSER"].parse(pdf_bytes)
+    except PyPdfError:
+        return "The transcript could not be read."
+    user_kv.set(user_id, TRANSCRIPT_GPA, result)
+    return None
+
+
 # Change user's name
 @profile_blueprint.route("/change_username", methods=["POST"])
 def change_username():
     """
     Endpoint to change user's name.
     """
-    username = current_app.config.get(
-        "username", ""
-    )  # Get current username from configuration
-    bucket_name = current_app.config[
-        "BUCKET_NAME"
-    ]  # Get S3 bucket name from configuration
-    mock_data_file = current_app.config[
-        "MOCK_DATA_POC_NAME"
-    ]  # Get mock data file name from configuration
-
-    s3 = current_app.config["S3_CLIENT"]  # Get S3 client from configuration
-
     if request.method == "POST":
         new_username = request.form[
             "newusername"
         ]  # Get new username from request form
-        df = get_df_from_csv_in_s3(
-            s3, bucket_name, mock_data_file
-        )  # Read data from S3 into DataFrame
-        # Replace current username with new username in DataFrame
-        df.loc[df["username"] == username, "username"] = new_username
-        # Upload modified DataFrame to S3
-        upload_df_to_s3(df, s3, bucket_name, mock_data_file)
+        # Data is keyed by user id, so a rename only changes the user's row
+        # in the user directory
+        current_app.config["USER_DIRECTORY"].rename(
+            current_app.config["userId"], new_username
+        )
         # Update configuration with new username
         current_app.config["username"] = new_username
 
     return redirect(url_for("start"))  # Redirect to the 'start' endpoint
-
-
-def process_transcript_pdf(path_to_pdf):
-    """
-    Process a transcript PDF file to extract cumulative GPA.
-    """
-    reader = pypdf.PdfReader(path_to_pdf)
-    text = ""
-    points = []
-    units = []
-    for page in reader.pages:
-        text = page.extract_text()
-        if text:
-            for line in text.split("\n"):
-                if line.startswith("Term Totals"):
-                    points.append(float(line.split()[-2]))
-                    units.append(float(line.split()[-3]))
-    cGPA = sum(points) / sum(units)
-    os.remove(path_to_pdf)  # Remove the PDF file after processing
-    return cGPA
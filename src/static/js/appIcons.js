@@ -1,12 +1,13 @@
 /*
 Author: Qianni Wang
 Created: 2024-02-04
-Last Updated: 2024-04-04
+Last Updated: 2026-10-19
 
 Description:
 This script fetches the order of tiles from the server and rearranges them
 accordingly on the web page. It also allows dragging and dropping of tiles
-to change their order and updates the server with the new order.
+to change their order and updates the server with the new order. Saves are
+debounced so that several quick drags send one update.
 */
 document.addEventListener('DOMContentLoaded', function () {
 
@@ -36,6 +37,15 @@ document.addEventListener('DOMContentLoaded', function () {
         .catch(error => console.error('Error fetching order array:', error));
         
         
+    // Wait for the user to stop dragging before saving the order
+    const SAVE_DELAY_MS = 500;
+    let saveTimer = null;
+
+    function scheduleSave() {
+        clearTimeout(saveTimer);
+        saveTimer = setTimeout(saveNewOrder, SAVE_DELAY_MS);
+    }
+
     function saveNewOrder() {
         let tiles = document.querySelectorAll('.app-tile');
         let orderArray = Array.from(tiles).map(tile => parseInt(tile.id.replace('app-tile', '')));
@@ -107,7 +117,7 @@ document.addEventListener('DOMContentLoaded', function () {
             item.classList.remove('over');
         });
 
-        saveNewOrder();
+        scheduleSave();
 
         return false;
     }
@@ -0,0 +1,105 @@
+/*
+Author: All team members
+Created: 2026-10-19
+Last Updated: 2026-10-19
+
+Description:
+This script uploads syllabus PDFs and forum images directly from the browser
+to storage using a presigned POST policy issued by the server, then calls back
+to the server once the upload completes. If anything fails, the form falls
+back to a regular multipart submission through the server.
+*/
+
+async function requestUploadPolicy(policyUrl, details) {
+    const response = await fetch(policyUrl, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(details),
+    });
+    if (!response.ok) {
+        throw new Error('Upload policy request failed');
+    }
+    return response.json();
+}
+
+async function uploadWithPolicy(policy, file) {
+    const formData = new FormData();
+    Object.entries(policy.fields).forEach(([name, value]) => {
+        formData.append(name, value);
+    });
+    // The file must be the last field of the form
+    formData.append('file', file);
+    const response = await fetch(policy.url, { method: 'POST', body: formData });
+    if (!response.ok) {
+        throw new Error('Direct upload failed');
+    }
+}
+
+async function sha256Hex(file) {
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest))
+        .map(byte => byte.toString(16).padStart(2, '0'))
+        .join('');
+}
+
+function submitFallback(form) {
+    form.dataset.directUpload = 'off';
+    form.submit();
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    // Syllabus upload: upload the PDF, then post to the completion callback
+    document.querySelectorAll('form[data-direct-upload="syllabus"]').forEach(form => {
+        form.addEventListener('submit', async event => {
+            const input = form.querySelector('input[type="file"]');
+            const file = input.files[0];
+            if (form.dataset.directUpload !== 'syllabus' || !file) {
+                return;
+            }
+            event.preventDefault();
+            try {
+                const policy = await requestUploadPolicy(form.dataset.policyUrl, {
+                    filename: file.name,
+                    size: file.size,
+                });
+                await uploadWithPolicy(policy, file);
+                const callback = document.createElement('form');
+                callback.method = 'POST';
+                callback.action = form.dataset.completeUrl;
+                document.body.appendChild(callback);
+                callback.submit();
+            } catch (error) {
+                console.error(error);
+                submitFallback(form);
+            }
+        });
+    });
+
+    // Forum image: upload the image, then publish the topic with its key
+    document.querySelectorAll('form[data-direct-upload="image"]').forEach(form => {
+        form.addEventListener('submit', async event => {
+            const input = form.querySelector('input[type="file"]');
+            const file = input.files[0];
+            if (form.dataset.directUpload !== 'image' || !file) {
+                return;
+            }
+            event.preventDefault();
+            try {
+                const policy = await requestUploadPolicy(form.dataset.policyUrl, {
+                    filename: file.name,
+                    sha256: await sha256Hex(file),
+                });
+                if (!policy.exists) {
+                    await uploadWithPolicy(policy, file);
+                }
+                form.querySelector('input[name="image_key"]').value = policy.key;
+                input.value = '';
+                form.dataset.directUpload = 'off';
+                form.submit();
+            } catch (error) {
+                console.error(error);
+                submitFallback(form);
+            }
+        });
+    });
+});
@@ -1,58 +1,60 @@
 /*
 Author: Shuting Shi
 Created: 2024-02-01
-Last Updated: 2024-04-04
+Last Updated: 2026-10-19
 
 Description:
 This script manages a Pomodoro timer and task-related functionalities.
-It includes functions for starting and resetting the timer, playing
-music, updating task status, and loading task details.
+It includes functions for starting, pausing and resetting the timer,
+which runs on the server and is pushed to the page over Server-Sent
+Events, playing music, updating task status, and loading task details.
 */
-var isRunning = false;
-var timer;
-var start;
+// Timer state pushed by the server, and when this page received it
+var sessionState = { status: 'idle' };
+var receivedAt = Date.now();
 
 let currentAudio = null;
 let isPlaying = false;
 
-function updateTomatoCount(day) {
-    fetch(`/update_tomato/${day}`, { method: 'POST' })
-        .then(() => loadWeeklyData())
-        .catch(error => console.error('Error:', error));
+function formatTime(totalSeconds) {
+    var minutes = (totalSeconds / 60) | 0;
+    var seconds = (totalSeconds % 60) | 0;
+    minutes = minutes < 10 ? "0" + minutes : minutes;
+    seconds = seconds < 10 ? "0" + seconds : seconds;
+    return minutes + ":" + seconds;
 }
 
-function startTimer(duration, display) {
-    start = Date.now();
-    var diff, minutes, seconds;
-    function timerFunction() {
-
-        diff = duration - (((Date.now() - start) / 1000) | 0);
-        minutes = (diff / 60) | 0;
-        seconds = (diff % 60) | 0;
-        minutes = minutes < 10 ? "0" + minutes : minutes;
-        seconds = seconds < 10 ? "0" + seconds : seconds;
-        display.textContent = minutes + ":" + seconds;
-        if (diff <= 0) {
-            clearInterval(timer);
-            addStar();
-            isRunning = false;
+function renderTimer() {
+    const display = document.querySelector('#time');
+    if (sessionState.status === 'running' || sessionState.status === 'paused') {
+        var remaining = sessionState.remaining;
+        if (sessionState.status === 'running') {
+            // Count down locally between two pushes of the server
+            remaining -= (Date.now() - receivedAt) / 1000;
         }
-    };
-    if (!isRunning) {
-        clearInterval(timer);
-        isRunning = true;
-        timer = setInterval(timerFunction, 1000);
+        display.textContent = formatTime(Math.max(Math.ceil(remaining), 0));
+    } else if (sessionState.duration) {
+        // Idle states carry the configured session length
+        display.textContent = formatTime(sessionState.duration);
+    } else {
+        display.textContent = "25:00";
     }
+    const labels = { running: 'PAUSE', paused: 'RESUME' };
+    document.querySelector('#startBtn').textContent = labels[sessionState.status] || 'START';
 }
 
-function getSimulatedDayOfWeek(simulatedDay) {
-    const daysMap = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
-    if (simulatedDay !== undefined && daysMap.includes(simulatedDay)) {
-        return daysMap.indexOf(simulatedDay);
-    } else {
-        // If no simulatedDay is provided or if it's not valid, use the current day of the week
-        return new Date().getDay();
+function applyState(state) {
+    // Ignore states older than the one already shown
+    if (state.id === sessionState.id && state.version < sessionState.version) {
+        return;
+    }
+    const previous = sessionState;
+    sessionState = state;
+    receivedAt = Date.now();
+    if (state.status === 'completed' && previous.id === state.id && previous.status !== 'completed') {
+        addStar();
     }
+    renderTimer();
 }
 
 function addStar() {
@@ -60,29 +62,19 @@ function addStar() {
     const tomato = document.createElement('span');
     tomato.className = 'tomato';
     tomato.textContent = '🍅';
-    tomatoContainer.appendChild(tomato); const simulatedDay = 'Monday'; // Example: Change this to test different days
-    const dayOfWeek = getSimulatedDayOfWeek(simulatedDay);
-   
-    // //update the day on weeklyMap
-    // const dayOfWeek = new Date().getDay(); // Use getDay() instead of getUTCDay() if you want the local day
-    // console.log(dayOfWeek);
-    // // Ensure the daysMap aligns with JavaScript's getDay(), where 0 is Sunday, 1 is Monday, etc.
-    const daysMap = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
-    const day = daysMap[dayOfWeek];
-    updateTomatoCount(day);
+    tomatoContainer.appendChild(tomato);
+    // The server recorded the session, update the visualization
+    loadWeeklyData();
 }
 
-
-function updateTomatoCount(day) {
-    fetch(`/update_tomato/${day}`, { method: 'POST' })
-        .then(response => {
-            if (response.ok) {
-                // After updating the count, reload the weekly data to update the visualization
-                loadWeeklyData();
-            } else {
-                console.error('Error updating tomato count:', response);
-            }
-        })
+function sessionAction(action, body) {
+    fetch(`/pomodoro/session/${action}`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(Object.assign({ session_id: sessionState.id }, body || {}))
+    })
+        .then(response => response.json())
+        .then(applyState)
         .catch(error => console.error('Error:', error));
 }
 
@@ -113,16 +105,24 @@ function loadWeeklyData() {
 window.onload = function () {
 
     loadWeeklyData()
-    var timeInvertal = 5 * 1, //60 * 25
-        display = document.querySelector('#time');
+    // Every tab and device of the user follows the same server-side timer
+    const events = new EventSource('/pomodoro/session/events');
+    events.onmessage = event => applyState(JSON.parse(event.data));
+    setInterval(renderTimer, 1000);
+
     document.querySelector('#startBtn').onclick = function () {
-        startTimer(timeInvertal, display);
+        if (sessionState.status === 'running') {
+            sessionAction('pause');
+        } else if (sessionState.status === 'paused') {
+            sessionAction('resume');
+        } else {
+            // The session is for the task the page was opened for
+            const taskId = new URLSearchParams(window.location.search).get('task_id');
+            sessionAction('start', { task_id: taskId });
+        }
     };
     document.querySelector('#resetBtn').onclick = function () {
-        clearInterval(timer);
-        isRunning = false;
-        start = Date.now();
-        display.textContent = "25:00";
+        sessionAction('reset');
     };
 
     document.getElementById('playMusic').addEventListener('click', function () {
@@ -0,0 +1,47 @@
+/*
+Author: All team members
+Created: 2026-10-19
+Last Updated: 2026-10-19
+
+Description:
+This script polls the status of the background syllabus analysis job started
+by an upload, shows its progress on the course detail page and reloads the
+page with the extracted course information once the job is done.
+*/
+
+const SYLLABUS_JOB_POLL_MS = 2000;
+
+async function pollSyllabusJob(element) {
+    try {
+        const response = await fetch(element.dataset.statusUrl);
+        if (!response.ok) {
+            element.textContent = 'The syllabus analysis could not be found.';
+            return;
+        }
+        const job = await response.json();
+        if (job.status === 'done') {
+            const doneUrl = new URL(element.dataset.doneUrl, window.location.origin);
+            doneUrl.searchParams.set('message', job.message);
+            window.location.replace(doneUrl);
+            return;
+        }
+        if (job.status === 'failed') {
+            element.className = 'alert alert-danger';
+            element.textContent = `The syllabus analysis failed: ${job.message}`;
+            return;
+        }
+        element.textContent = job.status === 'queued'
+            ? 'Waiting for the syllabus analysis to start...'
+            : `Analyzing the syllabus: ${job.progress}...`;
+    } catch (error) {
+        console.error(error);
+    }
+    setTimeout(() => pollSyllabusJob(element), SYLLABUS_JOB_POLL_MS);
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    const element = document.getElementById('syllabus-job');
+    if (element) {
+        pollSyllabusJob(element);
+    }
+});
@@ -0,0 +1,237 @@
+"""
+Filename: <syllabus_chunker.py>
+
+Description:
+    Structure aware splitting of syllabus text into chunks for the OpenAI
+    prompts. The text is split into sections at headings, sections into
+    paragraphs and paragraphs into lines, so grading table rows and
+    sentences are never cut. Chunks are packed greedily up to a token
+    budget measured with a local approximation of the model tokenizer.
+    For the coursework prompt the grading related sections come first and
+    the schedule and other dated sections fill the rest of its budget.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import math
+import re
+
+# Words, numbers and single punctuation marks, roughly like the BPE pieces
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+# Numbered ("2.", "3.1", "IV.") or keyword headings
+NUMBERED_HEADING = re.compile(r"^((\d+\.)+\d*|[IVX]+[.)])\s+[A-Z]")
+HEADING_KEYWORDS = re.compile(
+    r"^(course|instructor|assessment|evaluation|grading|grade|marking|"
+    r"schedule|tentative schedule|weekly topics|timeline|calendar|"
+    r"textbook|policy|policies|deliverables|office hours|"
+    r"teaching assistants|tutorials?|lectures?|important dates|msaf)\b",
+    re.IGNORECASE,
+)
+
+# Headings of the sections that hold the course works and their weights
+GRADING_HEADINGS = re.compile(
+    r"assessment|evaluation|grading|grade|marking|deliverables|"
+    r"course ?work|important dates|deadlines",
+    re.IGNORECASE,
+)
+
+# Headings of the sections whose tables often hold the only due dates
+SCHEDULE_HEADINGS = re.compile(
+    r"schedule|timeline|calendar|weekly|topics|dates|due", re.IGNORECASE
+)
+DATE_PATTERN = re.compile(
+    r"\b(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+    r"\s+\d{1,2}\b|\b\d{4}-\d{2}-\d{2}\b",
+    re.IGNORECASE,
+)
+
+# Token budget of the coursework prompt, in chunks
+COURSE_WORK_BUDGET_CHUNKS = 3
+
+
+def count_tokens(text):
+    """
+    Approximate the number of model tokens of a text. Long words are split
+    into pieces of about four letters like the model tokenizer does, and
+    numbers into groups of three digits.
+    """
+    count = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece.isalpha():
+            count += max(1, math.ceil(len(piece) / 4))
+        elif piece.isdigit():
+            count += math.ceil(len(piece) / 3)
+        else:
+            count += 1
+    return count
+
+
+def is_heading(line):
+    """
+    Guess if a line of extracted PDF text is a section heading.
+    """
+    line = line.strip()
+    if not line or len(line) > 80 or line.endswith((".", ",", ";")):
+        return False
+    # Grading table rows are not headings even when they are numbered
+    if re.search(r"\d\s*%", line):
+        return False
+    if NUMBERED_HEADING.match(line) or HEADING_KEYWORDS.match(line):
+        return True
+    letters = [char for char in line if char.isalpha()]
+    return len(letters) > 3 and all(char.isupper() for char in letters)
+
+
+def split_sections(text):
+    """
+    Split text into (heading, body) sections. Text before the first
+    heading is a section with an empty heading.
+    """
+    sections = []
+    heading, lines = "", []
+    for line in text.splitlines():
+        if is_heading(line):
+            if heading or any(body_line.strip() for body_line in lines):
+                sections.append((heading, "\n".join(lines).strip("\n")))
+            heading, lines = line.strip(), []
+        else:
+            lines.append(line)
+    if heading or any(body_line.strip() for body_line in lines):
+        sections.append((heading, "\n".join(lines).strip("\n")))
+    return sections
+
+
+def split_units(text, max_tokens):
+    """
+    Split a block that does not fit the budget into paragraphs, then lines,
+    then words, returning pieces that each fit.
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    if len(paragraphs) > 1:
+        separator, parts = "\n\n", paragraphs
+    else:
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) > 1:
+            separator, parts = "\n", lines
+        else:
+            separator, parts = " ", text.split()
+            if len(parts) == 1:
+                # A single enormous word, slice it by characters
+                return [
+                    text[i: i + max_tokens * 4]
+                    for i in range(0, len(text), max_tokens * 4)
+                ]
+    units = []
+    for part in parts:
+        units.extend(split_units(part, max_tokens))
+    return pack(units, max_tokens, separator)
+
+
+def pack(units, max_tokens, separator="\n\n"):
+    """
+    Greedily join consecutive units into chunks of at most max_tokens.
+    """
+    chunks = []
+    current, current_tokens = [], 0
+    separator_tokens = count_tokens(separator)
+    for unit in units:
+        unit_tokens = count_tokens(unit)
+        if current and current_tokens + separator_tokens + unit_tokens > (
+            max_tokens
+        ):
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+        if current:
+            current_tokens += separator_tokens
+        current.append(unit)
+        current_tokens += unit_tokens
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def section_text(section):
+    heading, body = section
+    return f"{heading}\n{body}" if heading else body
+
+
+def chunk_sections(sections, max_tokens):
+    """
+    Pack sections into chunks. A section too large for one chunk is split
+    into paragraphs and rows, and its heading is repeated on every piece so
+    each chunk keeps its context.
+    """
+    units = []
+    for heading, body in sections:
+        section = section_text((heading, body))
+        if count_tokens(section) <= max_tokens:
+            units.append(section)
+            continue
+        budget = max_tokens
+        if heading:
+            budget = max(1, max_tokens - count_tokens(heading) - 1)
+        for piece in split_units(body, budget):
+            units.append(f"{heading}\n{piece}" if heading else piece)
+    return pack(units, max_tokens)
+
+
+def chunk_text(text, max_tokens):
+    """
+    Split a syllabus into as few chunks of at most max_tokens as possible
+    without cutting through sections, paragraphs or table rows.
+    """
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    return chunk_sections(split_sections(text), max_tokens)
+
+
+def chunk_course_work_text(text, max_tokens, budget_tokens=None):
+    """
+    Chunks for the coursework prompt. When the syllabus has grading related
+    sections they are sent first, then schedule sections and other sections
+    with dates fill the rest of budget_tokens, COURSE_WORK_BUDGET_CHUNKS
+    chunks by default. Otherwise the whole text is chunked.
+    """
+    sections = split_sections(text)
+    grading = [
+        i for i, section in enumerate(sections)
+        if GRADING_HEADINGS.search(section[0])
+    ]
+    if not grading:
+        return chunk_text(text, max_tokens)
+    if budget_tokens is None:
+        budget_tokens = max_tokens * COURSE_WORK_BUDGET_CHUNKS
+
+    schedules = [
+        i for i, section in enumerate(sections)
+        if i not in grading and SCHEDULE_HEADINGS.search(section[0])
+    ]
+    dated = [
+        i for i, section in enumerate(sections)
+        if i not in grading
+        and i not in schedules
+        and DATE_PATTERN.search(section[1])
+    ]
+    selected = [sections[i] for i in grading]
+    remaining = budget_tokens - sum(
+        count_tokens(section_text(section)) for section in selected
+    )
+    for heading, body in (sections[i] for i in schedules + dated):
+        if remaining <= 0:
+            break
+        tokens = count_tokens(section_text((heading, body)))
+        if tokens > remaining:
+            # Keep the first rows of the section that fit
+            budget = remaining - (count_tokens(heading) + 1 if heading else 0)
+            if budget <= 0:
+                break
+            body = split_units(body, budget)[0]
+            tokens = count_tokens(section_text((heading, body)))
+        selected.append((heading, body))
+        remaining -= tokens
+    return chunk_sections(selected, max_tokens)
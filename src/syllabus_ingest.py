@@ -0,0 +1,422 @@
+"""
+Filename: <syllabus_ingest.py>
+
+Description:
+    Command line ingester that imports the syllabuses of a whole department
+    at once. PDFs are uploaded to storage with bounded concurrency, then
+    text extraction and analysis run on a process pool, and the extracted
+    course information and course works are saved in batches with one CSV
+    write per batch. Every finished step is appended to a checkpoint file,
+    so an interrupted run resumes where it stopped.
+
+    Run from the repository root:
+        python -m src.syllabus_ingest path/to/pdfs/
+        python -m src.syllabus_ingest manifest.csv --upload-workers 16
+
+    A manifest is a CSV file with "course" and "path" columns, paths being
+    relative to the manifest. In a directory, "SFWRENG 3A04.pdf" and
+    "SFWRENG 3A04-syllabus.pdf" are both ingested as course SFWRENG 3A04.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# LLM executor and cache of the current worker process
+_worker_state = {}
+
+
+def discover(source):
+    """
+    Return the (course id, PDF path) pairs of a directory or manifest.
+    """
+    from src.syllabus_manifest import SYLLABUS_SUFFIX
+
+    if os.path.isdir(source):
+        documents = []
+        for name in sorted(os.listdir(source)):
+            if not name.lower().endswith(".pdf"):
+                continue
+            if name.endswith(SYLLABUS_SUFFIX):
+                course_id = name[: -len(SYLLABUS_SUFFIX)]
+            else:
+                course_id = name[: -len(".pdf")]
+            documents.append((course_id, os.path.join(source, name)))
+        return documents
+
+    directory = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="", encoding="utf-8") as file:
+        return [
+            (row["course"], os.path.join(directory, row["path"]))
+            for row in csv.DictReader(file)
+        ]
+
+
+class Checkpoint:
+    """
+    Append-only JSON lines log of the steps finished for each course.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Course id -> {"uploaded": entry, "analyzed": result, ...}
+        self.courses = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Last line cut short by the interruption
+                        continue
+                    course = self.courses.setdefault(record["course"], {})
+                    course[record["stage"]] = record.get("data")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def done(self, course_id, stage):
+        return stage in self.courses.get(course_id, {})
+
+    def get(self, course_id, stage):
+        return self.courses.get(course_id, {}).get(stage)
+
+    def record(self, course_id, stage, data=None):
+        """
+        Durably record that a course finished a stage.
+        """
+        self.courses.setdefault(course_id, {})[stage] = data
+        self._file.write(
+            json.dumps({"course": course_id, "stage": stage, "data": data})
+            + "\n"
+        )
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class StageTimer:
+    """
+    Wall clock time and item count of each stage of the ingestion.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, seconds, items=0):
+        total = self.stages.setdefault(stage, [0.0, 0])
+        total[0] += seconds
+        total[1] += items
+
+    def report(self):
+        for stage, (seconds, items) in self.stages.items():
+            rate = items / seconds if seconds > 0 else 0.0
+            print(
+                f"{stage:>16}: {seconds:8.2f}s  {items:5d} items  "
+                f"{rate:8.2f} items/s"
+            )
+
+
+def upload_all(s3, bucket_name, manifest, documents, checkpoint, workers):
+    """
+    Upload the PDFs not uploaded yet with at most `workers` concurrent
+    uploads, then add all of them to the syllabus manifest in one write.
+    """
+    from src.syllabus_manifest import syllabus_key
+
+    def upload(course_id, path):
+        s3.upload_file(
+            path,
+            bucket_name,
+            syllabus_key(course_id),
+            ExtraArgs={"ACL": "private"},
+        )
+        return manifest.describe(course_id)
+
+    pending = [
+        (course_id, path)
+        for course_id, path in documents
+        if not checkpoint.done(course_id, "uploaded")
+    ]
+    uploaded = 0
+    uploaded_bytes = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(upload, course_id, path): course_id
+            for course_id, path in pending
+        }
+        for future in as_completed(futures):
+            course_id = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"Upload of {course_id} failed: {e}")
+                continue
+            if entry is None:
+                print(f"Upload of {course_id} did not reach storage")
+                continue
+            uploaded += 1
+            uploaded_bytes += entry["size"]
+            checkpoint.record(course_id, "uploaded", entry)
+
+    # Includes uploads of an interrupted run that never reached the manifest
+    entries = {
+        course_id: checkpoint.get(course_id, "uploaded")
+        for course_id, _ in documents
+        if checkpoint.done(course_id, "uploaded")
+    }
+    if entries:
+        manifest.add_entries(entries)
+    return uploaded, uploaded_bytes
+
+
+def init_worker(cache_path, requests_per_minute, tokens_per_minute):
+    """
+    Create the LLM executor and cache of an analysis worker process.
+    """
+    from src import config
+    from src.llm_cache import LLMCache
+    from src.llm_executor import LLMExecutor
+
+    _worker_state["executor"] = LLMExecutor(
+        max_workers=config.LLM_MAX_WORKERS,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        max_retries=config.LLM_MAX_RETRIES,
+    )
+    if cache_path:
+        _worker_state["cache"] = LLMCache(
+            cache_path,
+            ttl=config.LLM_CACHE_TTL_SECONDS,
+            max_entries=config.LLM_CACHE_MAX_ENTRIES,
+        )
+
+
+def analyze_syllabus(course_id, path):
+    """
+    Extract the text of a syllabus PDF and analyze it like an upload does.
+    Runs inside the worker processes, so it has to be a module level
+    function.
+    """
+    from src.course_page import (
+        extract_course_info,
+        extract_course_work_details,
+    )
+    from src.pdf_text import extract_page_range
+
+    executor = _worker_state.get("executor")
+    cache = _worker_state.get("cache")
+
+    start = time.perf_counter()
+    with open(path, "rb") as pdf_file:
+        pdf_bytes = pdf_file.read()
+    # This process is already one of the pool, extract pages sequentially
+    text = "".join(extract_page_range(pdf_bytes, 0, None))
+    extracted = time.perf_counter()
+    course_work_list = extract_course_work_details(
+        text, executor=executor, cache=cache
+    )
+    course_info = extract_course_info(text, executor=executor, cache=cache)
+    analyzed = time.perf_counter()
+    return {
+        "course_info": course_info,
+        "course_works": course_work_list,
+        "timings": {
+            "extract": extracted - start,
+            "analyze": analyzed - extracted,
+        },
+    }
+
+
+def write_batch(catalog, batch, checkpoint):
+    """
+    Save the analysis results of a batch of courses with one write per
+    CSV file.
+    """
+    from src.syllabus_manifest import syllabus_key
+
+    catalog.upsert_courses(
+        {
+            course_id: (syllabus_key(course_id), result["course_info"])
+            for course_id, result in batch.items()
+        },
+        {
+            course_id: result["course_works"]
+            for course_id, result in batch.items()
+        },
+    )
+    for course_id in batch:
+        checkpoint.record(course_id, "written")
+
+
+def ingest(
+    documents,
+    s3,
+    bucket_name,
+    manifest,
+    catalog,
+    checkpoint,
+    upload_workers=8,
+    analysis_workers=None,
+    batch_size=50,
+    cache_path=None,
+):
+    """
+    Upload, analyze and save a list of (course id, PDF path) pairs,
+    skipping the steps the checkpoint says are done. Returns the timings.
+    """
+    from src import config
+
+    timer = StageTimer()
+    analysis_workers = analysis_workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    uploads, uploaded_bytes = upload_all(
+        s3, bucket_name, manifest, documents, checkpoint, upload_workers
+    )
+    timer.add("upload", time.perf_counter() - start, uploads)
+    if uploads:
+        print(f"Uploaded {uploaded_bytes / 1e6:.1f} MB")
+
+    # Courses analyzed by an interrupted run are saved with the first batch
+    batch = {
+        course_id: checkpoint.get(course_id, "analyzed")
+        for course_id, _ in documents
+        if checkpoint.done(course_id, "analyzed")
+        and not checkpoint.done(course_id, "written")
+    }
+    pending = [
+        (course_id, path)
+        for course_id, path in documents
+        if checkpoint.done(course_id, "uploaded")
+        and not checkpoint.done(course_id, "analyzed")
+    ]
+
+    def flush():
+        flush_start = time.perf_counter()
+        write_batch(catalog, batch, checkpoint)
+        timer.add("write", time.perf_counter() - flush_start, len(batch))
+        batch.clear()
+
+    start = time.perf_counter()
+    if pending:
+        # The rate limits are shared by all the worker processes
+        with ProcessPoolExecutor(
+            max_workers=analysis_workers,
+            initializer=init_worker,
+            initargs=(
+                cache_path,
+                config.LLM_REQUESTS_PER_MINUTE / analysis_workers,
+                config.LLM_TOKENS_PER_MINUTE / analysis_workers,
+            ),
+        ) as executor:
+            futures = {
+                executor.submit(analyze_syllabus, course_id, path): course_id
+                for course_id, path in pending
+            }
+            for future in as_completed(futures):
+                course_id = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Analysis of {course_id} failed: {e}")
+                    continue
+                for stage, seconds in result.pop("timings").items():
+                    timer.add(f"{stage} (cpu)", seconds, 1)
+                checkpoint.record(course_id, "analyzed", result)
+                batch[course_id] = result
+                if len(batch) >= batch_size:
+                    flush()
+    timer.add("analysis", time.perf_counter() - start, len(pending))
+    if batch:
+        flush()
+    return timer
+
+
+def main():
+    from src import config
+    from src.course_catalog import CourseCatalog
+    from src.local_storage import create_s3_client
+    from src.syllabus_manifest import SyllabusManifest
+
+    parser = argparse.ArgumentParser(
+        description="Upload and analyze a directory or manifest of syllabuses"
+    )
+    parser.add_argument("source", help="Directory of PDFs or manifest CSV")
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file, defaults to .ingest-checkpoint.jsonl in the "
+        "source directory",
+    )
+    parser.add_argument("--upload-workers", type=int, default=8)
+    parser.add_argument(
+        "--analysis-workers",
+        type=int,
+        default=None,
+        help="Number of analysis processes, defaults to the number of CPUs",
+    )
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    source_directory = (
+        args.source
+        if os.path.isdir(args.source)
+        else os.path.dirname(os.path.abspath(args.source))
+    )
+    checkpoint = Checkpoint(
+        args.checkpoint
+        or os.path.join(source_directory, ".ingest-checkpoint.jsonl")
+    )
+    documents = discover(args.source)
+    s3 = create_s3_client(config)
+    manifest = SyllabusManifest(
+        s3, config.BUCKET_NAME, manifest_key=config.SYLLABUS_MANIFEST_KEY
+    )
+    catalog = CourseCatalog(
+        os.path.join(SRC_DIR, config.MOCK_COURSE_INFO_CSV),
+        os.path.join(SRC_DIR, config.COURSE_WORK_EXTRACTED_INFO),
+    )
+
+    start = time.perf_counter()
+    try:
+        timer = ingest(
+            documents,
+            s3,
+            config.BUCKET_NAME,
+            manifest,
+            catalog,
+            checkpoint,
+            upload_workers=args.upload_workers,
+            analysis_workers=args.analysis_workers,
+            batch_size=args.batch_size,
+            cache_path=os.path.join(SRC_DIR, config.LLM_CACHE_PATH),
+        )
+    finally:
+        checkpoint.close()
+    elapsed = time.perf_counter() - start
+
+    written = sum(
+        checkpoint.done(course_id, "written") for course_id, _ in documents
+    )
+    print(
+        f"Ingested {written}/{len(documents)} syllabuses in {elapsed:.2f}s "
+        f"({written / elapsed if elapsed else 0:.2f} syllabuses/s)"
+    )
+    timer.report()
+
+
+if __name__ == "__main__":
+    main()
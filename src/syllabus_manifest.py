@@ -0,0 +1,244 @@
+"""
+Filename: <syllabus_manifest.py>
+
+Description:
+    Manifest of the uploaded course syllabuses, mapping each course id to
+    the key, size, ETag and upload time of its PDF. The manifest is a small
+    JSON object in AWS S3 cached in memory and revalidated by ETag, so
+    checking whether courses have a syllabus takes no HEAD request per
+    course. Uploads and deletes keep it current with conditional writes
+    on its ETag, retried when another writer changed it first, so
+    concurrent updates never drop entries. If it is missing it is rebuilt
+    once from a paginated listing of the bucket.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import botocore
+
+try:
+    from src.local_storage import is_precondition_failed, write_conditions
+except ImportError:
+    from .local_storage import is_precondition_failed, write_conditions
+
+SYLLABUS_SUFFIX = "-syllabus.pdf"
+# Attempts of a manifest update that keeps losing to other writers
+MAX_WRITE_ATTEMPTS = 10
+
+
+def syllabus_key(course_id):
+    """
+    Key of the syllabus PDF of a course.
+    """
+    return f"{course_id}{SYLLABUS_SUFFIX}"
+
+
+def format_timestamp(value):
+    """
+    Format a LastModified value, a datetime from boto3 or a POSIX timestamp
+    from the local storage, as an ISO 8601 string.
+    """
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return datetime.fromtimestamp(value, tz=timezone.utc).isoformat()
+
+
+class SyllabusManifest:
+    """
+    Cached course id to syllabus index stored as a JSON object in S3.
+    """
+
+    def __init__(
+        self,
+        s3,
+        bucket_name,
+        manifest_key="syllabus_manifest.json",
+        refresh_interval=30,
+    ):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.manifest_key = manifest_key
+        # Minimum number of seconds between two ETag checks against S3
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._etag = None
+        self._checked_at = 0.0
+
+    def refresh(self, force=False):
+        """
+        Reload the manifest from S3 if it changed, or rebuild it from the
+        bucket listing if it does not exist yet.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (
+                not force
+                and self._etag is not None
+                and now - self._checked_at < self.refresh_interval
+            ):
+                return
+            kwargs = {"IfNoneMatch": self._etag} if self._etag else {}
+            try:
+                response = self.s3.get_object(
+                    Bucket=self.bucket_name, Key=self.manifest_key, **kwargs
+                )
+                self._entries = json.loads(response["Body"].read())
+                self._etag = response.get("ETag")
+            except botocore.exceptions.ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code in ("304", "NotModified"):
+                    pass
+                elif code in ("NoSuchKey", "404"):
+                    try:
+                        self._save(self._list_syllabuses(), None)
+                    except botocore.exceptions.ClientError as save_error:
+                        if not is_precondition_failed(save_error):
+                            raise save_error
+                        # Another process rebuilt it first, load that one
+                        self._etag = None
+                        self.refresh(force=True)
+                        return
+                else:
+                    raise e
+            self._checked_at = now
+
+    def _list_syllabuses(self):
+        """
+        Build the manifest entries from a paginated listing of the root of
+        the bucket. The delimiter rolls the other data, like the feedback
+        and focus session prefixes, up into one entry per prefix.
+        """
+        entries = {}
+        kwargs = {}
+        while True:
+            response = self.s3.list_objects_v2(
+                Bucket=self.bucket_name, Delimiter="/", **kwargs
+            )
+            for item in response.get("Contents", []):
+                key = item["Key"]
+                if not key.endswith(SYLLABUS_SUFFIX):
+                    continue
+                entries[key[: -len(SYLLABUS_SUFFIX)]] = {
+                    "key": key,
+                    "size": item["Size"],
+                    "etag": item["ETag"],
+                    "uploaded_at": format_timestamp(item["LastModified"]),
+                }
+            if not response.get("IsTruncated"):
+                return entries
+            kwargs = {"ContinuationToken": response["NextContinuationToken"]}
+
+    def _save(self, entries, etag):
+        """
+        Write the manifest if it still has the given ETag, or does not
+        exist yet if etag is None.
+        """
+        response = self.s3.put_object(
+            Bucket=self.bucket_name,
+            Key=self.manifest_key,
+            Body=json.dumps(entries, sort_keys=True),
+            ContentType="application/json",
+            **write_conditions(etag),
+        )
+        self._entries = entries
+        self._etag = response.get("ETag")
+
+    def _update(self, change):
+        """
+        Apply change(entries) to the latest manifest and write it back
+        conditionally, retrying when another writer changed it first.
+        change returns False to skip the write. Returns what change
+        returned.
+        """
+        with self._lock:
+            for _ in range(MAX_WRITE_ATTEMPTS):
+                self.refresh(force=True)
+                entries = dict(self._entries)
+                result = change(entries)
+                if result is False:
+                    return result
+                try:
+                    self._save(entries, self._etag)
+                    return result
+                except botocore.exceptions.ClientError as e:
+                    if not is_precondition_failed(e):
+                        raise e
+            raise RuntimeError(
+                f"Could not update {self.manifest_key}, too many writers"
+            )
+
+    def get(self, course_id):
+        """
+        Return the manifest entry of the syllabus of a course, or None.
+        """
+        self.refresh()
+        with self._lock:
+            entry = self._entries.get(course_id)
+            return dict(entry) if entry else None
+
+    def statuses(self, course_ids):
+        """
+        Return the manifest entries (or None) of several courses at once.
+        """
+        self.refresh()
+        with self._lock:
+            return {
+                course_id: self._entries.get(course_id)
+                for course_id in course_ids
+            }
+
+    def describe(self, course_id):
+        """
+        Build the manifest entry of the syllabus stored for a course from a
+        HEAD request, or return None if there is none.
+        """
+        key = syllabus_key(course_id)
+        try:
+            head = self.s3.head_object(Bucket=self.bucket_name, Key=key)
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                return None
+            raise e
+        return {
+            "key": key,
+            "size": head["ContentLength"],
+            "etag": head["ETag"],
+            "uploaded_at": format_timestamp(head["LastModified"]),
+        }
+
+    def add_entries(self, entries):
+        """
+        Add the entries of several courses with a single manifest write.
+        """
+        self._update(lambda current: current.update(entries))
+
+    def record_upload(self, course_id):
+        """
+        Record the syllabus just uploaded for a course. Returns its entry,
+        or None if the upload did not reach S3.
+        """
+        entry = self.describe(course_id)
+        if entry is not None:
+            self.add_entries({course_id: entry})
+        return entry
+
+    def remove(self, course_id):
+        """
+        Delete the syllabus of a course and its manifest entry. Returns
+        True if there was a syllabus.
+        """
+        removed = self._update(
+            lambda current: current.pop(course_id, None) or False
+        )
+        if removed is False:
+            return False
+        self.s3.delete_object(Bucket=self.bucket_name, Key=removed["key"])
+        return True
@@ -0,0 +1,328 @@
+"""
+Filename: <syllabus_rules.py>
+
+Description:
+    Deterministic extraction of course works and course information from
+    syllabus text using regular expressions, grading table rows and date
+    parsing. Every result comes with a confidence score between 0 and 1 so
+    that OpenAI is only asked for what the rules could not find reliably.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import re
+from collections import Counter
+from datetime import date
+
+try:
+    from config import TITLE_TO_COLUMN_MAPPING
+except ImportError:
+    from .config import TITLE_TO_COLUMN_MAPPING
+
+try:
+    from src.syllabus_chunker import GRADING_HEADINGS, split_sections
+except ImportError:
+    from .syllabus_chunker import GRADING_HEADINGS, split_sections
+
+NOT_FOUND = "Not Found"
+
+MONTHS = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+
+# "October 6, 2024", "Oct. 6th", "6 October 2024" and "2024-10-06"
+DATE_PATTERNS = (
+    (
+        re.compile(
+            MONTH + r"\s+(\d{1,2})(?:st|nd|rd|th)?\b(?:,?\s+(\d{4}))?",
+            re.IGNORECASE,
+        ),
+        ("month", "day", "year"),
+    ),
+    (
+        re.compile(
+            r"\b(\d{1,2})(?:st|nd|rd|th)?\s+" + MONTH + r"(?:,?\s+(\d{4}))?",
+            re.IGNORECASE,
+        ),
+        ("day", "month", "year"),
+    ),
+    (
+        re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b"),
+        ("year", "month", "day"),
+    ),
+)
+PERCENTAGE = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%")
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+YEAR = re.compile(r"\b(20\d\d)\b")
+
+# Leading bullets and list numbers of table rows
+ROW_PREFIX = re.compile(r"^\s*(?:[-*•●▪]|\d+[.)])\s*")
+# Words around the course work name that are not part of it
+FILLER_WORDS = re.compile(
+    r"\b(due|deadline|weight|worth|on|by|date|dates|of|final grade)\b",
+    re.IGNORECASE,
+)
+# Policy sentences that mention percentages but are not course works
+POLICY_WORDS = re.compile(
+    r"late|penalt|per day|deduct|bonus|grade scale|\bto\b\s*\d+\s*%",
+    re.IGNORECASE,
+)
+
+INSTRUCTOR_LINE = re.compile(
+    r"^\s*(?:course\s+)?(?:instructor|professor|lecturer)(?:\s+name)?"
+    r"\s*[:\-]\s*(.+)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+EMAIL_LINE = re.compile(
+    r"^\s*(?:instructor\s+)?e-?mail\s*[:\-]\s*(" + EMAIL.pattern + ")",
+    re.IGNORECASE | re.MULTILINE,
+)
+OFFICE_HOURS_LINE = re.compile(
+    r"^\s*office\s+hours?\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE
+)
+TA_HEADING = re.compile(r"teaching assistant|\bTAs?\b", re.IGNORECASE)
+
+# Course info columns filled with the body of a section with such a heading
+SECTION_FIELDS = {
+    "textbooks": re.compile(
+        r"textbook|required reading|course materials", re.IGNORECASE
+    ),
+    "lecture_schedule": re.compile(r"lecture", re.IGNORECASE),
+    "tutorial_schedule": re.compile(r"tutorial|lab schedule", re.IGNORECASE),
+    "course_introduction": re.compile(
+        r"course (description|introduction|overview)|calendar description",
+        re.IGNORECASE,
+    ),
+    "goal_mission": re.compile(
+        r"objective|learning outcome|goal|mission", re.IGNORECASE
+    ),
+    "MSAF": re.compile(r"msaf|missed (term )?work|absence", re.IGNORECASE),
+}
+SECTION_FIELD_MAX_LENGTH = 1000
+
+# Words a syllabus uses when it has a course info column. When none of them
+# occurs the column is taken to be absent instead of uncertain.
+COLUMN_MENTIONS = {
+    "instructor_name": re.compile(
+        r"instructor|professor|lecturer|\bprof\b|\bdr\b", re.IGNORECASE
+    ),
+    "instructor_email": re.compile(r"@|e-?mail", re.IGNORECASE),
+    "instructor_office_hour_list": re.compile(
+        r"office\s+hours?|consultation|by appointment", re.IGNORECASE
+    ),
+    "textbooks": re.compile(
+        r"textbook|\bbook|reading|course materials", re.IGNORECASE
+    ),
+    "lecture_schedule": re.compile(r"lecture|class(es)? meet", re.IGNORECASE),
+    "tutorial_schedule": re.compile(r"tutorial|\blabs?\b", re.IGNORECASE),
+    "TAs": re.compile(r"teaching assistant|\bTAs?\b"),
+    "course_introduction": re.compile(
+        r"description|introduction|overview|this course", re.IGNORECASE
+    ),
+    "goal_mission": re.compile(
+        r"objective|outcome|goal|mission|students will", re.IGNORECASE
+    ),
+    "MSAF": re.compile(r"msaf|missed|absence", re.IGNORECASE),
+}
+# Confidence that a column the syllabus never mentions is really absent
+ABSENT_CONFIDENCE = 0.9
+
+
+def find_dates(line, default_year):
+    """
+    Return the (position, yyyy-mm-dd) dates found in a line, in order.
+    """
+    dates = []
+    taken = []
+    for pattern, fields in DATE_PATTERNS:
+        for match in pattern.finditer(line):
+            # Skip matches inside a date found by an earlier pattern
+            overlaps = [
+                span
+                for span in taken
+                if span[0] < match.end() and match.start() < span[1]
+            ]
+            if overlaps:
+                continue
+            values = dict(zip(fields, match.groups()))
+            month = values["month"]
+            month = MONTHS[month[:3].lower()] if month.isalpha() else month
+            year = int(values["year"]) if values["year"] else default_year
+            try:
+                parsed = date(year, int(month), int(values["day"]))
+            except ValueError:
+                continue
+            taken.append(match.span())
+            dates.append((match.start(), parsed.isoformat(), match.span()))
+    return sorted(dates)
+
+
+def guess_year(text):
+    """
+    The most frequent year in the syllabus, used for dates without one.
+    """
+    years = Counter(YEAR.findall(text))
+    if not years:
+        return date.today().year
+    return int(years.most_common(1)[0][0])
+
+
+def parse_course_work_row(line, default_year):
+    """
+    Parse one grading table row such as "Assignment 1 ... 10% ... Oct 6"
+    into a course work dictionary, or None if it is not one.
+    """
+    if len(line) > 120 or POLICY_WORDS.search(line):
+        return None
+    percentage = PERCENTAGE.search(line)
+    if not percentage:
+        return None
+    weight = float(percentage.group(1))
+    if not 0 < weight <= 100:
+        return None
+
+    dates = find_dates(line, default_year)
+    # The name is what is left after removing the weight and the dates
+    name = line
+    spans = [span for _, _, span in dates] + [percentage.span()]
+    for start, end in sorted(spans, reverse=True):
+        name = name[:start] + " " + name[end:]
+    name = ROW_PREFIX.sub("", name)
+    name = FILLER_WORDS.sub(" ", name)
+    name = re.sub(r"[|:()\[\],\-–—]", " ", name)
+    name = " ".join(name.split())
+    if not name or len(name) > 60 or not re.search(r"[A-Za-z]", name):
+        return None
+
+    return {
+        "Course Work Name": name,
+        "Start Date": dates[0][1] if len(dates) > 1 else NOT_FOUND,
+        "Due Date": dates[-1][1] if dates else NOT_FOUND,
+        "Score Distribution": int(weight) if weight.is_integer() else weight,
+    }
+
+
+def extract_course_works_by_rules(text):
+    """
+    Extract the course works of a syllabus from its grading table rows.
+    Returns the list of course works and a confidence score, which is high
+    when the weights add up to 100% and the course works have due dates.
+    """
+    sections = split_sections(text)
+    grading_bodies = [
+        body for heading, body in sections if GRADING_HEADINGS.search(heading)
+    ]
+    lines = "\n".join(grading_bodies or [text]).splitlines()
+
+    default_year = guess_year(text)
+    course_works = []
+    for line in lines:
+        course_work = parse_course_work_row(line, default_year)
+        if course_work is not None:
+            course_works.append(course_work)
+    if not course_works:
+        return [], 0.0
+
+    total_weight = sum(item["Score Distribution"] for item in course_works)
+    if abs(total_weight - 100) <= 1:
+        weight_score = 1.0
+    else:
+        weight_score = max(0.0, 1 - abs(total_weight - 100) / 100) * 0.8
+    dated = sum(item["Due Date"] != NOT_FOUND for item in course_works)
+    confidence = weight_score * (0.7 + 0.3 * dated / len(course_works))
+    return course_works, round(confidence, 3)
+
+
+def extract_ta_list(sections):
+    """
+    Return "Name: email; Name: email" for the TAs listed in a TA section.
+    """
+    tas = []
+    for heading, body in sections:
+        if not TA_HEADING.search(heading):
+            continue
+        for line in body.splitlines():
+            email = EMAIL.search(line)
+            if not email:
+                continue
+            name = line[: email.start()] + line[email.end():]
+            name = " ".join(re.sub(r"[:,;()<>\-]", " ", name).split())
+            address = email.group(0)
+            tas.append(f"{name}: {address}" if name else address)
+    return "; ".join(tas)
+
+
+def extract_course_info_by_rules(text):
+    """
+    Extract the course information columns of TITLE_TO_COLUMN_MAPPING from
+    labeled lines and section bodies. Returns the values and a dictionary
+    of confidence scores per column. Missing columns are "Not Found", with
+    a high confidence when the syllabus never mentions them and 0 when it
+    does, so only those are worth asking OpenAI about.
+    """
+    info = {}
+    confidence = {}
+
+    def found(column, value, score):
+        info[column] = value
+        confidence[column] = score
+
+    instructor = INSTRUCTOR_LINE.search(text)
+    if instructor:
+        value = instructor.group(1)
+        email = EMAIL.search(value)
+        if email:
+            found("instructor_email", email.group(0), 0.9)
+            value = value[: email.start()] + value[email.end():]
+        name = " ".join(re.sub(r"[,;()<>|]", " ", value).split())
+        if name:
+            found("instructor_name", name, 0.9)
+
+    if "instructor_email" not in info:
+        email_line = EMAIL_LINE.search(text)
+        if email_line:
+            found("instructor_email", email_line.group(1), 0.9)
+        else:
+            # The first address is usually the instructor, but not always
+            email = EMAIL.search(text)
+            if email:
+                found("instructor_email", email.group(0), 0.5)
+
+    office_hours = OFFICE_HOURS_LINE.search(text)
+    if office_hours:
+        office_hour_list = office_hours.group(1).strip()
+        found("instructor_office_hour_list", office_hour_list, 0.9)
+
+    sections = split_sections(text)
+    tas = extract_ta_list(sections)
+    if tas:
+        found("TAs", tas, 0.85)
+
+    for column, heading_pattern in SECTION_FIELDS.items():
+        for heading, body in sections:
+            body = " ".join(body.split())
+            if body and heading_pattern.search(heading):
+                found(column, body[:SECTION_FIELD_MAX_LENGTH], 0.8)
+                break
+
+    for column in TITLE_TO_COLUMN_MAPPING.values():
+        if column in info:
+            continue
+        mentions = COLUMN_MENTIONS.get(column)
+        absent = mentions is not None and not mentions.search(text)
+        found(column, NOT_FOUND, ABSENT_CONFIDENCE if absent else 0.0)
+    return info, confidence
@@ -336,3 +336,1355 @@ def test_pomodoro_page(client):
 def test_get_weekly_data(client):
     response = client.get("/get_weekly_data")
     assert response.status_code == 200
+
+
+def test_user_directory_resolve_and_rename():
+    from botocore.exceptions import ClientError
+    from src.user_directory import UserDirectory
+
+    s3 = MagicMock()
+    s3.get_object.return_value = {
+        "Body": io.BytesIO(b"userId,username\n1,Jane\n2,Katrina\n"),
+        "ETag": '"v1"',
+    }
+    directory = UserDirectory(s3, "bucket", "user_data.csv")
+
+    assert directory.resolve([2, "1", 3.0]) == ["Katrina", "Jane", None]
+    assert directory.get_user_id("Jane") == 1
+
+    # Unchanged ETag keeps the cached maps without downloading again
+    s3.get_object.side_effect = ClientError(
+        {"Error": {"Code": "304"}}, "GetObject"
+    )
+    directory.refresh(force=True)
+    assert s3.get_object.call_args.kwargs["IfNoneMatch"] == '"v1"'
+    assert directory.get_username(1) == "Jane"
+
+    directory.rename(1, "Janet")
+    assert directory.get_username(1) == "Janet"
+    assert directory.get_user_id("Janet") == 1
+    assert directory.get_user_id("Jane") is None
+    s3.put_object.assert_called_once()
+
+
+def test_presigned_url_cache_signs_each_key_once():
+    from src.presigned_urls import PresignedUrlCache, object_key_from_url
+
+    s3 = MagicMock()
+    s3.generate_presigned_url.side_effect = (
+        lambda op, Params, ExpiresIn: f"https://signed/{Params['Key']}"
+    )
+    url_cache = PresignedUrlCache(s3, "bucket", expiration=3600)
+
+    urls = url_cache.get_urls(["uploads/a.png", "uploads/b.png"])
+    assert urls["uploads/a.png"] == "https://signed/uploads/a.png"
+    url_cache.get_urls(["uploads/a.png", "uploads/b.png"])
+    assert s3.generate_presigned_url.call_count == 2
+
+    assert (
+        object_key_from_url(
+            "https://bucket.s3.amazonaws.com/uploads/a.png?X-Amz-Expires=1",
+            "bucket",
+        )
+        == "uploads/a.png"
+    )
+
+
+def test_image_store_deduplicates_by_content_hash():
+    from botocore.exceptions import ClientError
+    from PIL import Image
+    from src.image_store import ImageStore, display_key
+
+    png = io.BytesIO()
+    Image.new("RGB", (1600, 400)).save(png, format="PNG")
+    s3 = MagicMock()
+    s3.head_object.side_effect = ClientError(
+        {"Error": {"Code": "404"}}, "HeadObject"
+    )
+    s3.get_object.return_value = {"Body": io.BytesIO(png.getvalue())}
+    image_store = ImageStore(s3, "bucket", display_size=400)
+
+    first_key = image_store.store(io.BytesIO(png.getvalue()), "image.png")
+    second_key = image_store.store(io.BytesIO(png.getvalue()), "a.PNG")
+    image_store.shutdown()
+
+    assert first_key == second_key
+    assert first_key.startswith("uploads/") and first_key.endswith(".png")
+    s3.upload_fileobj.assert_called_once()
+    variant = s3.put_object.call_args.kwargs
+    assert variant["Key"] == display_key(first_key)
+    assert Image.open(io.BytesIO(variant["Body"])).size == (400, 100)
+
+
+def test_image_store_recreates_missing_display_variant(tmp_path):
+    from PIL import Image
+    from src.image_store import ImageStore, display_key
+    from src.local_storage import LocalS3Client
+
+    png = io.BytesIO()
+    Image.new("RGB", (1600, 400)).save(png, format="PNG")
+    local_s3 = LocalS3Client(str(tmp_path), "secret")
+    first_store = ImageStore(local_s3, "bucket", display_size=400)
+    image_key = first_store.store(io.BytesIO(png.getvalue()), "image.png")
+    first_store.shutdown()
+    local_s3.delete_object(Bucket="bucket", Key=display_key(image_key))
+
+    # A new process uploading the same image recreates the variant
+    image_store = ImageStore(local_s3, "bucket", display_size=400)
+    assert image_store.store(io.BytesIO(png.getvalue()), "a.png") == image_key
+    image_store.shutdown()
+
+    variant = local_s3.get_object(Bucket="bucket", Key=display_key(image_key))
+    assert Image.open(io.BytesIO(variant["Body"].read())).size == (400, 100)
+
+
+def test_local_storage_direct_upload(tmp_path):
+    from src.direct_uploads import create_upload_policy
+    from src.local_storage import LocalS3Client
+
+    local_s3 = LocalS3Client(str(tmp_path), "secret")
+    policy = create_upload_policy(
+        local_s3,
+        "bucket",
+        "uploads/a.png",
+        "image/png",
+        max_size=16,
+        key_prefix="uploads/",
+    )
+    original_client = app.config["S3_CLIENT"]
+    app.config["S3_CLIENT"] = local_s3
+    try:
+        with app.test_client() as client:
+            too_big = client.post(
+                policy["url"],
+                data={**policy["fields"], "file": (io.BytesIO(b"x" * 17), "")},
+            )
+            uploaded = client.post(
+                policy["url"],
+                data={**policy["fields"], "file": (io.BytesIO(b"png"), "a")},
+            )
+    finally:
+        app.config["S3_CLIENT"] = original_client
+
+    assert too_big.status_code == 403
+    assert uploaded.status_code == 204
+    body = local_s3.get_object(Bucket="bucket", Key="uploads/a.png")["Body"]
+    assert body.read() == b"png"
+
+
+def test_topic_index_intersects_tag_postings():
+    from src.topic_index import TopicIndex
+
+    s3 = MagicMock()
+    csv_files = {
+        "topic_data.csv": b"id,title,userId,tag\n"
+        b"1,a,1,Advice\n2,b,2,\"Advice, Career\"\n3,c,1,Career\n",
+        "comment_data.csv": b"id,text,topicId,userId\n1,x,2,1\n2,y,2,3\n",
+    }
+    s3.get_object.side_effect = lambda Bucket, Key, **kwargs: {
+        "Body": io.BytesIO(csv_files[Key]),
+        "ETag": Key,
+    }
+    topic_index = TopicIndex(
+        s3, "bucket", "topic_data.csv", "comment_data.csv"
+    )
+
+    assert [t["id"] for t in topic_index.query()] == [1, 2, 3]
+    assert [t["id"] for t in topic_index.query(["Career"])] == [2, 3]
+    both = topic_index.query(["Advice", "Career"])
+    assert [(t["id"], t["comment_count"]) for t in both] == [(2, 2)]
+
+    topic_index.add_topic({"id": 4, "title": "d", "tag": "Career"})
+    assert [t["id"] for t in topic_index.query(["Career"])] == [2, 3, 4]
+
+
+def test_pdf_text_extractor_parallel_matches_serial_and_caches():
+    from src.pdf_extraction_benchmark import generate_pdf, previous_extraction
+    from src.pdf_text import PdfTextExtractor
+
+    pdf_bytes = generate_pdf(6, lines_per_page=3)
+    extractor = PdfTextExtractor(max_workers=2, parallel_threshold=4)
+    try:
+        pages = extractor.extract_pages(pdf_bytes)
+        with patch("src.pdf_text.pypdf.PdfReader") as reader:
+            assert extractor.extract_text(pdf_bytes) == "".join(pages)
+            reader.assert_not_called()
+    finally:
+        extractor.shutdown()
+
+    assert len(pages) == 6
+    assert "".join(pages) == previous_extraction(pdf_bytes)
+
+
+def test_llm_segments_run_concurrently_in_order_against_fake_server():
+    import threading
+    import time
+    from werkzeug.serving import make_server
+    from src.course_page import process_text_in_segments
+    from src.fake_llm_server import create_fake_llm_app
+    from src.llm_executor import LLMExecutor
+
+    server = make_server(
+        "127.0.0.1", 0, create_fake_llm_app(latency=0.2), threaded=True
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    executor = LLMExecutor(max_workers=4)
+    text = "".join(f"segment-{i:02d}".ljust(40, ".") for i in range(8))
+    try:
+        with patch(
+            "openai.api_base", f"http://127.0.0.1:{server.port}/v1"
+        ), patch("openai.api_key", "test"):
+            start = time.monotonic()
+            output = process_text_in_segments(text, 10, executor=executor)
+            elapsed = time.monotonic() - start
+    finally:
+        server.shutdown()
+        executor.shutdown()
+
+    replies = [word for word in output.split() if word.startswith("segm")]
+    assert [reply[:10] for reply in replies] == [
+        f"segment-{i:02d}" for i in range(8)
+    ]
+    # Eight 0.2 s calls on four workers take about two rounds, not eight
+    assert elapsed < 1.2
+
+
+def test_llm_executor_retries_rate_limited_calls():
+    import openai
+    from src.llm_executor import LLMExecutor
+
+    failures = {"b": 2}
+
+    def flaky(segment):
+        if failures.get(segment, 0):
+            failures[segment] -= 1
+            raise openai.error.RateLimitError("slow down")
+        return segment.upper()
+
+    executor = LLMExecutor(max_workers=2, base_delay=0.01)
+    try:
+        result = executor.map(flaky, ["a", "b", "c"], [1, 1, 1])
+    finally:
+        executor.shutdown()
+    assert result == ["A", "B", "C"]
+    assert failures["b"] == 0
+
+
+def test_llm_cache_serves_repeat_segments_without_api_calls(tmp_path):
+    from src.course_page import process_course_work_with_openai
+    from src.llm_cache import LLMCache
+
+    cache = LLMCache(str(tmp_path / "llm.sqlite3"), max_entries=2)
+    reply = {"choices": [{"message": {"content": " [] "}}]}
+    with patch(
+        "src.course_page.openai.ChatCompletion.create", return_value=reply
+    ) as create:
+        assert process_course_work_with_openai("syllabus", cache) == "[]"
+        assert process_course_work_with_openai("syllabus", cache) == "[]"
+        process_course_work_with_openai("other", cache)
+        process_course_work_with_openai("third", cache)
+    assert create.call_count == 3
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 3}
+
+    cache.ttl = -1
+    assert cache.purge(expired_only=True) == 2
+
+
+def test_extract_course_work_details_merges_segments_in_one_pass():
+    from src.course_page import extract_course_work_details
+    from src.llm_executor import LLMExecutor
+
+    replies = iter(
+        [
+            '[{"Course Work Name": "Test 1", "Start Date": "Not Found", '
+            '"Due Date": "2024-10-06", "Score Distribution": 25}, '
+            '{"Course Work Name": "Lab", "Start Date": "2024-09-30", '
+            '"Due Date": "2024-09-01", "Score Distribution": "10%"}]',
+            "Here you go: [{'Course Work Name': 'test  1', "
+            "'Start Date': '2024-09-29', 'Due Date': 'Not Found', "
+            "'Score Distribution': 25}, {'Course Work Name': 'Exam', "
+            "'Start Date': 'Not Found', 'Due Date': '2024-13-40', "
+            "'Score Distribution': 40}, {'Course Work Name': 'Bonus', "
+            "'Due Date': '2024-11-01', 'Score Distribution': 'Not Found'}]",
+        ]
+    )
+    executor = LLMExecutor(max_workers=1)
+    try:
+        with patch(
+            "src.course_page.process_course_work_with_openai",
+            side_effect=lambda text, cache=None: next(replies),
+        ) as process:
+            course_works = extract_course_work_details(
+                "x" * 80, max_tokens=10, executor=executor
+            )
+    finally:
+        executor.shutdown()
+
+    assert process.call_count == 2
+    assert course_works == [
+        {
+            "Course Work Name": "Test 1",
+            "Start Date": "2024-09-29",
+            "Due Date": "2024-10-06",
+            "Score Distribution": 25,
+        },
+        {
+            "Course Work Name": "Lab",
+            "Start Date": "Not Found",
+            "Due Date": "2024-09-01",
+            "Score Distribution": 10,
+        },
+        {
+            "Course Work Name": "Exam",
+            "Start Date": "Not Found",
+            "Due Date": "Not Found",
+            "Score Distribution": 40,
+        },
+    ]
+
+
+def test_parse_course_work_list_rejects_malformed_responses():
+    from src.course_work_extraction import parse_course_work_list
+
+    assert parse_course_work_list("[{[1]: 2}]") == []
+    assert parse_course_work_list("[" * 100000 + "]" * 100000) == []
+    assert parse_course_work_list(
+        "[{'Course Work Name': 'Quiz', 'Score Distribution': 5}, "
+        "{'name': 'Quiz 2'}, 'text']"
+    ) == [{"Course Work Name": "Quiz", "Score Distribution": 5}]
+
+
+def test_syllabus_chunker_keeps_rows_and_prefers_grading_sections():
+    from src.syllabus_chunker import (
+        chunk_course_work_text,
+        chunk_text,
+        count_tokens,
+    )
+
+    rows = "\n".join(
+        f"Assignment {i} due October {i + 1}, 2024 weight 5%"
+        for i in range(1, 13)
+    )
+    text = (
+        "COURSE INTRODUCTION\n"
+        + "This course covers software design in depth. " * 30
+        + "\n\nGRADING\n"
+        + rows
+        + "\n\nACADEMIC INTEGRITY\n"
+        + "Academic dishonesty is a serious offence. " * 30
+    )
+
+    chunks = chunk_text(text, 250)
+    assert all(count_tokens(chunk) <= 250 for chunk in chunks)
+    # Every grading row ends up whole in exactly one chunk
+    for row in rows.splitlines():
+        assert sum(row in chunk.splitlines() for chunk in chunks) == 1
+
+    course_work_chunks = chunk_course_work_text(text, 250)
+    assert len(course_work_chunks) == 1
+    assert course_work_chunks[0] == "GRADING\n" + rows
+
+
+def test_course_work_chunks_fill_the_budget_with_schedule_sections():
+    from src.syllabus_chunker import chunk_course_work_text, count_tokens
+
+    text = (
+        "GRADING\nMidterm 30%\nFinal Exam 40%\nLabs 30%\n\n"
+        "Tentative Schedule\n"
+        + "\n".join(f"Week {i} Lab {i} due Oct {i + 1}" for i in range(1, 9))
+        + "\n\nACADEMIC INTEGRITY\n"
+        + "Academic dishonesty is a serious offence. " * 30
+    )
+
+    chunks = chunk_course_work_text(text, 250)
+    assert chunks[0].startswith("GRADING\nMidterm 30%")
+    assert "Week 8 Lab 8 due Oct 9" in chunks[0]
+    assert not any("dishonesty" in chunk for chunk in chunks)
+
+    # With a tight budget only the first schedule rows are kept
+    chunks = chunk_course_work_text(text, 250, budget_tokens=40)
+    assert "Week 1 Lab 1 due Oct 2" in chunks[0]
+    assert "Week 8" not in chunks[0]
+    assert sum(count_tokens(chunk) for chunk in chunks) <= 40
+
+
+def test_rule_based_extraction_skips_openai_for_plain_syllabus():
+    from src.course_page import (
+        extract_course_info,
+        extract_course_work_details,
+    )
+
+    syllabus = (
+        "SFWRENG 3A04 Software Design, Fall 2024\n"
+        "Instructor: Dr. Jane Smith (smithj@mcmaster.ca)\n"
+        "Office Hours: Tuesday 2-3pm, ITB 101\n\n"
+        "GRADING\n"
+        "1. Assignment 1 10% due Oct 6\n"
+        "Midterm Test | 40% | November 5, 2024\n"
+        "Project: 50%, Sept 9 - Dec 1\n\n"
+        "LATE POLICY\n"
+        "Late work loses 10% per day.\n"
+    )
+    with patch(
+        "src.course_page.process_course_work_with_openai"
+    ) as course_work_api, patch(
+        "src.course_page.analyze_course_content"
+    ) as course_info_api:
+        course_works = extract_course_work_details(syllabus)
+        course_info = extract_course_info(syllabus)
+
+    course_work_api.assert_not_called()
+    # Columns the syllabus never mentions are not asked for
+    course_info_api.assert_not_called()
+    assert [
+        (c["Course Work Name"], c["Start Date"], c["Due Date"])
+        for c in course_works
+    ] == [
+        ("Assignment 1", "Not Found", "2024-10-06"),
+        ("Midterm Test", "Not Found", "2024-11-05"),
+        ("Project", "2024-09-09", "2024-12-01"),
+    ]
+    assert course_info["instructor_name"] == "Dr. Jane Smith"
+    assert course_info["instructor_email"] == "smithj@mcmaster.ca"
+    assert course_info["MSAF"] == "Not Found"
+
+    # OpenAI is only asked for a column mentioned but not found
+    api_reply = "1. Instructor Name: Someone Else#\n1. MSAF Policy: Use MSAF#"
+    with patch(
+        "src.course_page.process_text_with_openai", return_value=api_reply
+    ) as course_info_api:
+        course_info = extract_course_info(
+            syllabus + "Missed work is handled case by case.\n"
+        )
+    course_info_api.assert_called_once()
+    assert course_info_api.call_args.args[2] == ["MSAF Policy"]
+    assert course_info["instructor_name"] == "Dr. Jane Smith"
+    assert course_info["MSAF"] == "Use MSAF"
+
+
+def test_job_queue_runs_jobs_left_by_a_previous_process(tmp_path):
+    import time
+    from src.job_queue import JobQueue
+
+    path = str(tmp_path / "jobs.sqlite3")
+    seen = []
+
+    def handler(payload, report):
+        report("working")
+        if payload["course_id"] == "flaky" and payload not in seen:
+            seen.append(payload)
+            raise RuntimeError("temporary")
+        seen.append(payload)
+        return f"done {payload['course_id']}"
+
+    # A process that queued one job and died in the middle of another
+    stopped = JobQueue(path, handler, lease_seconds=0)
+    queued_id = stopped.submit({"course_id": "A"})
+    flaky_id = stopped.submit({"course_id": "flaky"})
+    stopped._claim()
+    assert stopped.get(queued_id)["status"] == "running"
+
+    restarted = JobQueue(
+        path, handler, max_workers=1, lease_seconds=0, poll_interval=0.01
+    )
+    restarted.start()
+    try:
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and any(
+            restarted.get(job_id)["status"] != "done"
+            for job_id in (queued_id, flaky_id)
+        ):
+            time.sleep(0.01)
+    finally:
+        restarted.shutdown()
+
+    assert restarted.get(queued_id)["message"] == "done A"
+    flaky = restarted.get(flaky_id)
+    assert (flaky["status"], flaky["attempts"]) == ("done", 2)
+
+
+def test_job_queue_fails_jobs_whose_last_attempt_killed_the_worker(tmp_path):
+    from src.job_queue import JobQueue
+
+    handler = MagicMock()
+    queue = JobQueue(
+        str(tmp_path / "jobs.sqlite3"), handler, max_attempts=2
+    )
+    job_id = queue.submit({"course_id": "bad"})
+    # The worker died on every attempt, e.g. out of memory on a bad PDF
+    queue._update(job_id, status="running", attempts=5)
+    with queue._lock:
+        queue._connection.execute(
+            "UPDATE jobs SET updated_at = 0 WHERE id = ?", (job_id,)
+        )
+
+    assert queue._claim() is None
+    job = queue.get(job_id)
+    assert (job["status"], job["attempts"]) == ("failed", 5)
+    assert "Lease expired" in job["message"]
+    handler.assert_not_called()
+
+
+def test_job_heartbeat_and_task_dedup_make_retries_safe(tmp_path):
+    import threading
+    import time
+    from src.job_queue import JobQueue
+    from src.local_storage import LocalS3Client
+    from src.util import add_tasks_todo, get_df_from_csv_in_s3
+
+    # A job slower than its lease is not claimed by a second worker
+    release = threading.Event()
+    queue = JobQueue(
+        str(tmp_path / "jobs.sqlite3"),
+        lambda payload, report: release.wait(5),
+        max_workers=1,
+        lease_seconds=0.3,
+        poll_interval=0.01,
+    )
+    job_id = queue.submit({"course_id": "A"})
+    queue.start()
+    try:
+        time.sleep(1)
+        assert queue._claim() is None
+        assert queue.get(job_id)["attempts"] == 1
+    finally:
+        release.set()
+        queue.shutdown()
+
+    # Retrying the task step of a job adds every task once
+    s3 = LocalS3Client(str(tmp_path), "secret")
+    s3.put_object(
+        Bucket="bucket",
+        Key="tasks.csv",
+        Body="id,title,course,due_date,weight,est_time,priority,status\n"
+        "1,Lab 1,SFWRENG 3A04,2024-10-01,10,3,low,todo\n",
+    )
+    tasks = [
+        ("SFWRENG 3A04", "Lab 1", "2024-10-01", "10"),
+        ("SFWRENG 3A04", "Midterm", "Not Found", "40"),
+    ]
+    assert add_tasks_todo(tasks, 3, s3, "bucket", "tasks.csv") == 1
+    assert add_tasks_todo(tasks, 3, s3, "bucket", "tasks.csv") == 0
+    tasks_df = get_df_from_csv_in_s3(s3, "bucket", "tasks.csv")
+    assert list(tasks_df["title"]) == ["Lab 1", "Midterm"]
+    assert list(tasks_df["id"]) == [1, 2]
+
+
+def test_course_catalog_upserts_rows_and_reloads_on_mtime(tmp_path):
+    from src.course_catalog import CourseCatalog
+
+    info_path = tmp_path / "course_info.csv"
+    work_path = tmp_path / "course_works.csv"
+    info_path.write_text(
+        "course,course_syllabus,instructor_name\nA,A-syllabus.pdf,Ann\n"
+    )
+    work_path.write_text(
+        "course,course_work,start_date,due_date,score_distribution\n"
+        "A,Test 1,Not Found,2024-10-06,100\n"
+    )
+    catalog = CourseCatalog(str(info_path), str(work_path))
+    assert catalog.get_course_info("A")["instructor_name"] == "Ann"
+
+    # Steady state views do not read the files again
+    with patch("src.course_catalog.read_records") as read_records:
+        assert catalog.get_course_works("A")[0]["course_work"] == "Test 1"
+        assert catalog.get_course_info("B") is None
+        read_records.assert_not_called()
+
+    catalog.upsert_course_info("B", "B.pdf", {"instructor_name": "Bo"})
+    catalog.upsert_course_info("A", "A.pdf", {"instructor_name": "Al"})
+    catalog.replace_course_works(
+        "A",
+        [{"Course Work Name": "Exam", "Due Date": "2024-12-01",
+          "Score Distribution": 100}],
+    )
+    assert info_path.read_text().splitlines()[1:] == [
+        "A,A-syllabus.pdf,Al",
+        "B,B.pdf,Bo",
+    ]
+    assert work_path.read_text().splitlines()[1:] == [
+        "A,Exam,Not Found,2024-12-01,100"
+    ]
+
+    # Edits made by someone else are picked up through the mtime
+    work_path.write_text(
+        "course,course_work,start_date,due_date,score_distribution\n"
+        "C,Lab,Not Found,Not Found,5\n"
+    )
+    os.utime(work_path, ns=(0, 1))
+    assert catalog.get_course_works("A") == []
+    assert catalog.get_course_works("C")[0]["course_work"] == "Lab"
+
+
+def test_syllabus_manifest_replaces_per_course_head_requests(tmp_path):
+    from src.local_storage import LocalS3Client
+    from src.syllabus_manifest import SyllabusManifest
+
+    s3 = LocalS3Client(str(tmp_path), "secret")
+    for course_id in ("A", "B", "C"):
+        s3.put_object(
+            Bucket="bucket", Key=f"{course_id}-syllabus.pdf", Body=b"%PDF"
+        )
+    s3.put_object(Bucket="bucket", Key="user_data.csv", Body=b"id\n")
+    for number in range(6):
+        s3.put_object(
+            Bucket="bucket",
+            Key=f"feedback/users/{number}/records/x-syllabus.pdf",
+            Body=b"{}",
+        )
+
+    def list_two_keys(**kwargs):
+        return LocalS3Client.list_objects_v2(s3, MaxKeys=2, **kwargs)
+
+    # The first manifest is built from a paginated listing of the bucket
+    with patch.object(
+        s3, "list_objects_v2", side_effect=list_two_keys
+    ) as list_objects, patch.object(s3, "head_object") as head_object:
+        manifest = SyllabusManifest(s3, "bucket")
+        statuses = manifest.statuses(["A", "B", "C", "D"])
+        head_object.assert_not_called()
+    # Only the root of the bucket is paged, feedback/ is a single entry
+    assert list_objects.call_count == 3
+    assert {course for course, entry in statuses.items() if entry} == {
+        "A",
+        "B",
+        "C",
+    }
+    assert statuses["A"]["size"] == 4
+
+    s3.put_object(Bucket="bucket", Key="D-syllabus.pdf", Body=b"%PDF-1.7")
+    assert manifest.record_upload("D")["size"] == 8
+    assert manifest.record_upload("E") is None
+    assert manifest.remove("A") is True
+    assert not os.path.exists(s3.object_path("bucket", "A-syllabus.pdf"))
+
+    # Another worker reads the saved manifest instead of listing again
+    with patch.object(s3, "list_objects_v2") as list_objects:
+        other = SyllabusManifest(s3, "bucket")
+        assert other.get("A") is None
+        assert other.get("D")["key"] == "D-syllabus.pdf"
+        list_objects.assert_not_called()
+
+    # Two writers updating the manifest at the same time keep both entries
+    entry = manifest.describe("D")
+    put_object = s3.put_object
+
+    def put_after_other_writer(**kwargs):
+        if kwargs.get("Key") == "syllabus_manifest.json":
+            s3.put_object = put_object
+            other.add_entries({"F": dict(entry, key="F-syllabus.pdf")})
+        return put_object(**kwargs)
+
+    s3.put_object = put_after_other_writer
+    manifest.add_entries({"G": dict(entry, key="G-syllabus.pdf")})
+    s3.put_object = put_object
+    assert other.get("F") is not None
+    assert SyllabusManifest(s3, "bucket").statuses(["F", "G"]) == {
+        "F": dict(entry, key="F-syllabus.pdf"),
+        "G": dict(entry, key="G-syllabus.pdf"),
+    }
+
+
+def test_syllabus_ingest_resumes_from_checkpoint(tmp_path):
+    from src.course_catalog import CourseCatalog
+    from src.local_storage import LocalS3Client
+    from src import syllabus_ingest
+    from src.syllabus_ingest import Checkpoint, ingest, upload_all
+    from src.syllabus_manifest import SyllabusManifest
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    pdf = tmp_path / "C.pdf"
+    pdf.write_bytes(b"%PDF-1.7")
+    documents = [("A", "A.pdf"), ("B", "B.pdf"), ("C", str(pdf))]
+
+    # An interrupted run uploaded A and B and analyzed them, C was not
+    # uploaded and nothing was written
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    for course_id in ("A", "B"):
+        checkpoint.record(course_id, "uploaded", {"key": course_id})
+        checkpoint.record(
+            course_id,
+            "analyzed",
+            {
+                "course_info": {"instructor_name": course_id},
+                "course_works": [
+                    {"Course Work Name": "Exam", "Score Distribution": 100}
+                ],
+            },
+        )
+    checkpoint.close()
+
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    catalog = CourseCatalog(
+        str(tmp_path / "info.csv"), str(tmp_path / "works.csv")
+    )
+    manifest = SyllabusManifest(s3, "bucket")
+    with patch.object(
+        syllabus_ingest, "ProcessPoolExecutor"
+    ) as pool, patch.object(
+        syllabus_ingest, "write_batch", wraps=syllabus_ingest.write_batch
+    ) as write_batch:
+        ingest(documents[:2], s3, "bucket", manifest, catalog, checkpoint)
+        pool.assert_not_called()
+        write_batch.assert_called_once()
+    assert catalog.get_course_info("B")["instructor_name"] == "B"
+    assert len(catalog.get_course_works("A")) == 1
+    assert checkpoint.done("A", "written")
+
+    # The remaining PDF is uploaded and added to the manifest with the rest
+    assert upload_all(s3, "bucket", manifest, documents, checkpoint, 2) == (
+        1,
+        8,
+    )
+    checkpoint.close()
+    statuses = SyllabusManifest(s3, "bucket").statuses("ABC")
+    assert all(statuses.values())
+
+
+def test_focus_log_rollups_partitions_and_recovery(tmp_path):
+    from datetime import date, datetime, timezone
+    from src.focus_log import FocusSessionLog
+    from src.local_storage import LocalS3Client
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    wal_path = str(tmp_path / "focus.wal")
+    log = FocusSessionLog(s3, "bucket", "focus/", wal_path)
+
+    def at(*args):
+        return datetime(*args, tzinfo=timezone.utc)
+
+    with patch.object(s3, "put_object", wraps=s3.put_object) as put_object:
+        # Week 1 of 2027 starts on 2027-01-04, week 52 of 2026 before it
+        log.record("Jane", 7, at(2026, 12, 31, 9), 1500)
+        log.record("Jane", 7, at(2027, 1, 4, 9), 1500)
+        log.record("Jane", None, at(2027, 1, 4, 10), 600)
+        put_object.assert_not_called()
+        assert log.daily("Jane", date(2027, 1, 4), date(2027, 1, 4)) == [
+            {"date": "2027-01-04", "sessions": 2, "seconds": 2100}
+        ]
+        assert log.flush() is True
+        # Two monthly partitions and the rollups of the user
+        assert put_object.call_count == 3
+
+    weeks = log.weekly("Jane", date(2026, 12, 28), date(2027, 1, 10))
+    assert [(row["week"], row["sessions"]) for row in weeks] == [
+        ("2026-W53", 1),
+        ("2027-W01", 2),
+    ]
+
+    # A crash loses nothing logged, even with a batch being flushed
+    log.record("Jane", 7, at(2027, 1, 5, 9), 1500)
+    with patch.object(s3, "put_object", side_effect=OSError("offline")):
+        try:
+            log.flush()
+        except OSError:
+            pass
+    log.record("Jane", 8, at(2027, 1, 6, 9), 300)
+
+    # While the process runs, another one gets a log of its own
+    second = FocusSessionLog(s3, "bucket", "focus/", wal_path)
+    assert second.wal_path == wal_path + "-1" and not second._pending
+    second.shutdown()
+
+    # The process dies, releasing its log to the next one
+    log._wal_lock.close()
+    recovered = FocusSessionLog(s3, "bucket", "focus/", wal_path)
+    assert recovered.wal_path == wal_path
+    recovered.shutdown()
+    other = FocusSessionLog(s3, "bucket", "focus/", str(tmp_path / "o.wal"))
+    assert other.totals("Jane", date(2026, 12, 1), date(2027, 1, 31)) == {
+        "sessions": 5,
+        "seconds": 5400,
+    }
+    sessions = other.sessions("Jane", date(2027, 1, 1), date(2027, 1, 31))
+    assert sessions["task_id"].tolist() == [7, -1, 7, 8]
+    assert sessions["duration"].sum() == 3900
+
+
+def test_focus_log_sees_sessions_flushed_by_other_processes(tmp_path):
+    import threading
+    from datetime import date, datetime, timezone
+    from src.focus_log import FocusSessionLog
+    from src.local_storage import LocalS3Client
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    writer = FocusSessionLog(s3, "bucket", "focus/", str(tmp_path / "a.wal"))
+    reader = FocusSessionLog(
+        s3, "bucket", "focus/", str(tmp_path / "b.wal"), refresh_interval=0
+    )
+    day = date(2027, 1, 4)
+    start = datetime(2027, 1, 4, 9, tzinfo=timezone.utc)
+    assert reader.totals(1, day, day)["sessions"] == 0
+    writer.record(1, 7, start, 1500)
+    writer.flush()
+    # The cached rollups are revalidated by ETag
+    assert reader.totals(1, day, day) == {"sessions": 1, "seconds": 1500}
+
+    # A flush finishing between reading the rollups and the unflushed
+    # events does not hide its batch
+    reader.record(1, 8, start, 600)
+    user_events = reader._user_events
+    flusher = threading.Thread(target=reader.flush)
+
+    def events_after_flush(user_id):
+        if not flusher.is_alive() and flusher.ident is None:
+            flusher.start()
+            # The flush needs the lock this lookup holds
+            assert not reader._lock.acquire(timeout=0.2)
+        return user_events(user_id)
+
+    with patch.object(reader, "_user_events", events_after_flush):
+        assert reader.totals(1, day, day)["sessions"] == 2
+    flusher.join()
+    assert reader.totals(1, day, day)["sessions"] == 2
+
+
+def test_focus_log_concurrent_flushes_keep_every_session(tmp_path):
+    from datetime import date, datetime, timezone
+    from src.focus_log import FocusSessionLog
+    from src.local_storage import LocalS3Client
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    first = FocusSessionLog(s3, "bucket", "focus/", str(tmp_path / "a.wal"))
+    second = FocusSessionLog(s3, "bucket", "focus/", str(tmp_path / "b.wal"))
+    start = datetime(2027, 1, 4, 9, tzinfo=timezone.utc)
+    first.record(1, 7, start, 1500)
+    second.record(1, 8, start, 600)
+    first.flush()
+
+    # The second process reads the objects, then the first one writes
+    # them again before the second one does
+    put_object = s3.put_object
+
+    def put_after_other_flush(**kwargs):
+        s3.put_object = put_object
+        first.record(1, 9, start, 300)
+        first.flush()
+        return put_object(**kwargs)
+
+    s3.put_object = put_after_other_flush
+    second.flush()
+    s3.put_object = put_object
+
+    reader = FocusSessionLog(s3, "bucket", "focus/", str(tmp_path / "c.wal"))
+    assert reader.totals(1, date(2027, 1, 4), date(2027, 1, 4)) == {
+        "sessions": 3,
+        "seconds": 2400,
+    }
+    sessions = reader.sessions(1, date(2027, 1, 1), date(2027, 1, 31))
+    assert sorted(sessions["task_id"].tolist()) == [7, 8, 9]
+
+
+def test_focus_analytics_joins_sessions_with_tasks(tmp_path):
+    from datetime import date, datetime, timezone
+    from src.focus_analytics import FocusAnalytics
+    from src.focus_log import FocusSessionLog
+    from src.local_storage import LocalS3Client
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    s3.put_object(
+        Bucket="bucket",
+        Key="tasks.csv",
+        Body="id,title,course,due_date,weight,est_time,priority,status\n"
+        "1,A1,SE 3A04,2026-10-30,10%,1 hour,high,todo\n"
+        "2,Quiz,SE 3A04,2026-10-30,5%,30 minutes,low,todo\n"
+        "3,Lab,SE 3BB4,2026-10-30,5%,2,low,todo\n",
+    )
+    log = FocusSessionLog(s3, "bucket", "focus/", str(tmp_path / "f.wal"))
+    for day, hour, task_id, minutes in [
+        (16, 9, 1, 45),
+        (17, 9, 1, 45),
+        (18, 14, 2, 45),
+        (19, 9, None, 30),
+    ]:
+        start = datetime(2026, 10, day, hour, tzinfo=timezone.utc)
+        log.record("Jane", task_id, start, minutes * 60)
+
+    analytics = FocusAnalytics(log, s3, "bucket", "tasks.csv")
+    today = date(2026, 10, 19)
+    result = analytics.get("Jane", 30, today)
+    tasks = {task["id"]: task for task in result["tasks"]}
+    assert (tasks[1]["actual_hours"], tasks[1]["accuracy"]) == (1.5, 1.5)
+    assert (tasks[2]["est_hours"], tasks[2]["accuracy"]) == (0.5, 1.5)
+    assert result["unassigned_hours"] == 0.5
+    assert result["courses"][0]["actual_hours"] == 2.25
+    assert result["streaks"] == {"current": 4, "longest": 4}
+    assert result["hour_of_day"][9]["minutes"] == 120
+    assert result["estimate_accuracy"]["time_spent_hours"] == {
+        "1": 1.5,
+        "2": 0.75,
+    }
+
+    # Cached until a new session is recorded
+    with patch.object(log, "sessions", wraps=log.sessions) as sessions:
+        assert analytics.get("Jane", 30, today) is result
+        sessions.assert_not_called()
+        start = datetime(2026, 10, 19, 10, tzinfo=timezone.utc)
+        log.record("Jane", 3, start, 3600)
+        assert analytics.get("Jane", 30, today)["total_sessions"] == 5
+
+    # One entry per user, the least recently used users are evicted
+    analytics.cache_size = 2
+    for user_id in ("Jane", "Joe", "Ann"):
+        for days in (7, 30, 90):
+            analytics.get(user_id, days, today)
+    assert list(analytics._cache) == ["Joe", "Ann"]
+
+
+def test_parse_estimated_hours_sums_every_unit():
+    import math
+    import pandas as pd
+    from src.focus_analytics import parse_estimated_hours
+
+    hours = parse_estimated_hours(
+        pd.Series(
+            [
+                "45 mins",
+                "1h30m",
+                "1 hour 30 minutes",
+                "2 days",
+                "3",
+                2,
+                "2.5 hrs",
+                "5 weeks",
+                "soon",
+            ]
+        )
+    ).tolist()
+    assert hours[:7] == [0.75, 1.5, 1.5, 48.0, 3.0, 2.0, 2.5]
+    assert all(math.isnan(value) for value in hours[7:])
+
+
+def test_pomodoro_tracker_is_idempotent_and_pushes_changes():
+    import time
+    from src.pomodoro_tracker import PomodoroTracker
+
+    focus_log = MagicMock()
+    tracker = PomodoroTracker(focus_log)
+    subscriber = tracker.subscribe("Jane")
+    assert subscriber.get_nowait() == {"status": "idle", "duration": 1500}
+
+    first = tracker.start("Jane", task_id=4, duration=600)
+    # Reopening the page for the same task keeps the running session
+    assert tracker.start("Jane", task_id=4)["id"] == first["id"]
+    assert tracker.pause("Jane", first["id"])["status"] == "paused"
+    assert tracker.pause("Jane", first["id"])["version"] == 2
+    assert tracker.resume("Jane", "stale-tab")["status"] == "paused"
+    assert tracker.resume("Jane")["status"] == "running"
+    tracker.complete("Jane", first["id"])
+    assert tracker.complete("Jane", first["id"])["status"] == "completed"
+    focus_log.record.assert_not_called()  # Under a second of focus
+
+    pushed = [subscriber.get_nowait()["status"] for _ in range(4)]
+    assert pushed == ["running", "paused", "running", "completed"]
+    assert subscriber.empty()
+
+    # The server completes and records a session when its time is up
+    second = tracker.start("Jane", task_id=None, duration=1)
+    time.sleep(1.5)
+    assert tracker.state("Jane")["status"] == "completed"
+    username, task_id, started_at, elapsed = focus_log.record.call_args[0]
+    assert (username, task_id, elapsed) == ("Jane", None, 1)
+    assert started_at == pytest.approx(time.time() - 1.5, abs=1)
+    assert subscriber.get_nowait()["id"] == second["id"]
+
+
+def test_pomodoro_tracker_keeps_sessions_across_restarts(tmp_path):
+    import time
+    from src.local_storage import LocalS3Client
+    from src.pomodoro_tracker import PomodoroTracker
+    from src.user_kv import UserKeyValueStore
+
+    s3 = LocalS3Client(str(tmp_path), "secret")
+    store = UserKeyValueStore(s3, "bucket", write_delay=0)
+    focus_log = MagicMock()
+    tracker = PomodoroTracker(focus_log, store=store)
+    paused = tracker.start(1, task_id=4, duration=600)
+    tracker.pause(1)
+    running = tracker.start(2, task_id=5, duration=600)
+    expired = tracker.start(3, task_id=6, duration=600)
+
+    # The app restarts, user 3's session ran out meanwhile
+    saved = store.get(3, "pomodoro_session")
+    saved["resumed_at"] = saved["started_at"] = time.time() - 900
+    store.set(3, "pomodoro_session", saved)
+    restarted = PomodoroTracker(
+        focus_log, store=UserKeyValueStore(s3, "bucket")
+    )
+    assert restarted.state(1)["id"] == paused["id"]
+    assert restarted.state(1)["status"] == "paused"
+    assert restarted.state(2)["id"] == running["id"]
+    assert 0 < restarted.state(2)["remaining"] <= 600
+    assert restarted._timers[2].is_alive()
+    assert restarted.state(3)["id"] == expired["id"]
+    assert restarted.state(3)["status"] == "completed"
+    user_id, task_id, _, elapsed = focus_log.record.call_args[0]
+    assert (user_id, task_id, elapsed) == (3, 6, 600)
+    assert restarted.state(4) == {"status": "idle", "duration": 1500}
+
+
+def test_feedback_store_shards_records_by_user(tmp_path):
+    from src.feedback_store import FeedbackStore, PENDING, VIEWED
+    from src.local_storage import LocalS3Client
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    store = FeedbackStore(s3, "bucket")
+    with patch.object(s3, "put_object", wraps=s3.put_object) as put:
+        first = store.submit(1, "J", "j@x.ca", "website", "Slow page")
+        assert put.call_count == 2  # The record and its index entry
+    store.submit(1, "J", "j@x.ca", "course", "Add a course")
+    store.submit(2, "", "", "website", "Not Jane's")
+
+    jane = store.list_feedback(1)
+    assert [item["feedback"] for item in jane] == ["Slow page", "Add a course"]
+    assert {item["status"] for item in jane} == {PENDING}
+
+    store.update_index(
+        1,
+        {first["feedback_id"]: {"status": VIEWED, "developer_feedback": "Ok"}},
+    )
+    # A fresh store reads only Jane's index and her records
+    reader = FeedbackStore(s3, "bucket")
+    with patch.object(s3, "list_objects_v2", wraps=s3.list_objects_v2) as ls:
+        jane = reader.list_feedback(1)
+        assert ls.call_count == 0
+    assert (jane[0]["status"], jane[0]["developer_feedback"]) == (VIEWED, "Ok")
+    assert jane[1]["status"] == PENDING
+    with patch.object(s3, "get_object", wraps=s3.get_object) as get:
+        reader.list_feedback(1)
+        assert get.call_count == 1  # Index revalidated, records cached
+
+
+def test_feedback_store_import_is_idempotent_and_updates_race_safely(
+    tmp_path,
+):
+    from src.feedback_store import FeedbackStore, PENDING, VIEWED
+    from src.local_storage import LocalS3Client
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    store = FeedbackStore(s3, "bucket")
+    rows = [
+        {"feedback_id": "a", "user_id": 1, "feedback": "Slow", "status": 1},
+        {"feedback_id": "b", "user_id": 1, "feedback": "Typo", "status": 0},
+    ]
+    assert store.import_records(rows) == 2
+    store.update_index(1, {"a": {"status": PENDING}})
+    # Running the migration again adds nothing and keeps the triage
+    assert store.import_records(rows) == 0
+    items = FeedbackStore(s3, "bucket").list_feedback(1)
+    assert [item["feedback_id"] for item in items] == ["a", "b"]
+    assert items[0]["status"] == PENDING
+
+    # Another triage update lands between this one's read and write
+    other = FeedbackStore(s3, "bucket")
+    put_object = s3.put_object
+
+    def put_after_other_update(**kwargs):
+        s3.put_object = put_object
+        other.update_index(1, {"a": {"developer_feedback": "Fixed"}})
+        return put_object(**kwargs)
+
+    s3.put_object = put_after_other_update
+    store.update_index(1, {"b": {"status": VIEWED}})
+    s3.put_object = put_object
+    index = FeedbackStore(s3, "bucket").get_index(1)
+    assert index["a"]["developer_feedback"] == "Fixed"
+    assert index["b"]["status"] == VIEWED
+
+
+def test_feedback_triage_api(client, tmp_path):
+    import json
+    from src.feedback_store import FeedbackStore
+    from src.local_storage import LocalS3Client
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    store = FeedbackStore(s3, "bucket")
+    for user_id, feedback_type in [
+        (1, "website"),
+        (1, "course"),
+        (2, "website"),
+        (3, "website"),
+    ]:
+        store.submit(user_id, "", "", feedback_type, f"User {user_id} says")
+
+    user_directory = MagicMock()
+    user_directory.get_username.side_effect = {
+        1: "Jane",
+        2: "John",
+        3: "Mary",
+    }.get
+    config = {
+        "FEEDBACK_STORE": store,
+        "FEEDBACK_TRIAGE_TOKEN": "token",
+        "USER_DIRECTORY": user_directory,
+    }
+    headers = {"Authorization": "Bearer token"}
+    with patch.dict(app.config, config):
+        response = client.get("/feedback/triage/feedback")
+        assert response.status_code == 401
+
+        url = "/feedback/triage/feedback?feedback_type=website&limit=2"
+        page = client.get(url, headers=headers).get_json()
+        assert [item["username"] for item in page["items"]] == [
+            "Jane",
+            "John",
+        ]
+        page = client.get(
+            f"{url}&cursor={page['next_cursor']}", headers=headers
+        ).get_json()
+        assert [item["username"] for item in page["items"]] == ["Mary"]
+        assert page["next_cursor"] is None
+
+        updates = [
+            {
+                "user_id": item["user_id"],
+                "feedback_id": item["feedback_id"],
+                "status": 1,
+                "developer_feedback": "Thanks",
+            }
+            for item in store.list_feedback(1)
+        ]
+        updates.append({"user_id": 2, "feedback_id": "missing"})
+        with patch.object(s3, "put_object", wraps=s3.put_object) as put:
+            response = client.patch(
+                "/feedback/triage/feedback",
+                json={"updates": updates},
+                headers=headers,
+            )
+            assert put.call_count == 1  # One index write for Jane
+        assert response.get_json() == {"updated": 2, "unknown": ["missing"]}
+
+        pending = client.get("/feedback/triage/feedback", headers=headers)
+        assert len(pending.get_json()["items"]) == 2
+
+        # A page reads the indexes and only the records on the page
+        reader = {"FEEDBACK_STORE": FeedbackStore(s3, "bucket")}
+        with patch.dict(app.config, reader), patch.object(
+            s3, "get_object", wraps=s3.get_object
+        ) as get:
+            url = "/feedback/triage/feedback?status=all&limit=1"
+            page = client.get(url, headers=headers).get_json()
+            keys = [call[1]["Key"] for call in get.call_args_list]
+        assert len(page["items"]) == 1
+        assert page["next_cursor"] is not None
+        assert [key for key in keys if "/records/" in key] == [
+            page["next_cursor"]
+        ]
+
+        response = client.get("/feedback/triage/export", headers=headers)
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.data.splitlines()]
+        assert [line["status"] for line in lines] == [1, 1, 0, 0]
+        assert lines[0]["developer_feedback"] == "Thanks"
+
+
+def test_icon_order_is_a_cached_per_user_value(client, tmp_path):
+    from src.local_storage import LocalS3Client
+    from src.user_kv import UserKeyValueStore
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    store = UserKeyValueStore(s3, "bucket", write_delay=60)
+    with patch.dict(app.config, {"USER_KV": store, "userId": 1}):
+        with patch.object(s3, "put_object", wraps=s3.put_object) as put:
+            # Reading the default order does not write anything
+            response = client.get("/grid/get-order")
+            assert response.get_json() == app.config["ICON_ORDER_DEFAULT"]
+            for order in ([2, 1, 3], [3, 1, 2], [1, 3, 2]):
+                client.post("/grid/update-order", json=order)
+            assert client.get("/grid/get-order").get_json() == [1, 3, 2]
+            put.assert_not_called()
+            store.flush()
+            assert put.call_count == 1  # Quick drags coalesced
+
+        response = client.post("/grid/update-order", json="[1, 2]")
+        assert response.status_code == 400
+
+    reader = UserKeyValueStore(s3, "bucket")
+    assert reader.get(1, "icon_order") == [1, 3, 2]
+    assert reader.get(2, "icon_order") is None
+    with patch.object(s3, "get_object", wraps=s3.get_object) as get:
+        assert reader.get(1, "icon_order") == [1, 3, 2]
+        assert get.call_args[1]["IfNoneMatch"]  # Revalidated by ETag
+
+
+def test_user_kv_retries_failed_writes_with_backoff(tmp_path):
+    import time
+    from src.local_storage import LocalS3Client
+    from src.user_kv import UserKeyValueStore
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    store = UserKeyValueStore(s3, "bucket", write_delay=0, retry_delay=0.05)
+    put_object = s3.put_object
+    attempts = []
+
+    def flaky_put(**kwargs):
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise OSError("offline")
+        return put_object(**kwargs)
+
+    with patch.object(s3, "put_object", side_effect=flaky_put):
+        store.set(1, "icon_order", [2, 1])
+        deadline = time.monotonic() + 5
+        while len(attempts) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+    # Retried by timers without a flush, waiting longer each time
+    assert len(attempts) == 3
+    assert attempts[2] - attempts[1] > attempts[1] - attempts[0]
+    assert UserKeyValueStore(s3, "bucket").get(1, "icon_order") == [2, 1]
+
+
+def test_user_id_migration_moves_username_keyed_data(tmp_path):
+    import json
+    from src.feedback_store import FeedbackStore
+    from src.local_storage import LocalS3Client
+    from src.user_id_migration import (
+        migrate_profiles,
+        move_user_prefixes,
+        rewrite_feedback_record,
+    )
+
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    s3.put_object(
+        Bucket="bucket", Key="users.csv", Body="userId,username\n1,Jane\n"
+    )
+    s3.put_object(
+        Bucket="bucket",
+        Key="profiles.csv",
+        Body=",user_id,username,courses\n0,1,Jane,['A']\n1,1,John,['B']\n",
+    )
+    # A feedback record written before the migration
+    legacy = {"feedback_id": "f1", "username": "John", "feedback": "Hi"}
+    s3.put_object(
+        Bucket="bucket",
+        Key="feedback/users/John/records/20261019T000000000000Z-f1.json",
+        Body=json.dumps(legacy),
+    )
+
+    username_to_id = migrate_profiles(
+        s3, "bucket", "profiles.csv", "users.csv"
+    )
+    # John's profile id was taken by Jane, he gets the next free one
+    assert username_to_id == {"Jane": 1, "John": 2}
+    profiles = s3.get_object(Bucket="bucket", Key="profiles.csv")
+    assert profiles["Body"].read().decode() == (
+        "user_id,courses\n1,['A']\n2,['B']\n"
+    )
+
+    prefix = "feedback/users/"
+    moved = move_user_prefixes(
+        s3, "bucket", prefix, username_to_id, rewrite_feedback_record
+    )
+    assert moved == 1
+    store = FeedbackStore(s3, "bucket")
+    assert store.reindex(2) == 1
+    assert store.reindex(2) == 0
+    feedback = store.list_feedback(2)
+    assert [(item["user_id"], item["feedback"]) for item in feedback] == [
+        (2, "Hi")
+    ]
+    # Running the migration again changes nothing
+    assert migrate_profiles(s3, "bucket", "profiles.csv", "users.csv") == (
+        username_to_id
+    )
+    assert move_user_prefixes(s3, "bucket", prefix, username_to_id) == 0
+
+
+def test_transcript_gpa_is_parsed_in_memory_and_cached(client, tmp_path):
+    from src.local_storage import LocalS3Client
+    from src.transcript_gpa import TranscriptGpaParser, compute_gpa
+    from src.user_kv import UserKeyValueStore
+
+    assert compute_gpa(["No totals here"])["cgpa"] is None
+    pages = [
+        "Level 1\nTerm Totals 15.00 15.00 150.00 10.00\n",
+        "Term Totals 12.00 12.00 96.00 8.00",
+    ]
+    extractor = MagicMock()
+    extractor.extract_pages.return_value = pages
+    s3 = LocalS3Client(str(tmp_path / "storage"), "secret")
+    config = {
+        "USER_KV": UserKeyValueStore(s3, "bucket", write_delay=0),
+        "TRANSCRIPT_PARSER": TranscriptGpaParser(extractor),
+        "userId": 1,
+    }
+    with patch.dict(app.config, config):
+        for _ in range(2):
+            data = {"transcript": (io.BytesIO(b"%PDF-1"), "transcript.pdf")}
+            response = client.post(
+                "/profile/upload_transcript",
+                data=data,
+                content_type="multipart/form-data",
+            )
+            assert b"9.11" in response.data
+        # The same file of the same user is parsed once
+        assert extractor.extract_pages.call_count == 1
+        stored = config["USER_KV"].get(1, "transcript_gpa")
+        assert (stored["cgpa"], stored["terms"]) == (9.11, 2)
+        assert b"9.11" in client.get("/profile/profile_page").data
+
+        extractor.extract_pages.return_value = ["Unofficial transcript"]
+        data = {"transcript": (io.BytesIO(b"%PDF-2"), "empty.pdf")}
+        response = client.post(
+            "/profile/upload_transcript",
+            data=data,
+            content_type="multipart/form-data",
+        )
+        assert b"No term totals found" in response.data
+
+
+def test_metrics_tag_storage_and_llm_calls_with_the_route(tmp_path):
+    from flask import Flask
+    from src import metrics
+    from src.llm_executor import LLMExecutor
+    from src.local_storage import LocalS3Client
+
+    registry = metrics.MetricsRegistry()
+    test_app = Flask(__name__)
+    test_app.config["METRICS"] = registry
+    metrics.init_app(test_app, registry)
+    test_app.register_blueprint(metrics.metrics_blueprint)
+    s3 = metrics.InstrumentedS3Client(
+        LocalS3Client(str(tmp_path / "storage"), "secret"), registry
+    )
+    executor = LLMExecutor(max_workers=2)
+
+    def call_llm(segment):
+        with metrics.track_llm_call() as call:
+            call["usage"] = {"prompt_tokens": 10, "completion_tokens": 2}
+        return segment
+
+    @test_app.route("/courses/<int:count>")
+    def course_detail(count):
+        s3.put_object(Bucket="bucket", Key="a.txt", Body="hello")
+        for _ in range(count):
+            s3.get_object(Bucket="bucket", Key="a.txt")
+        executor.map(call_llm, ["x", "y"], [1, 1])
+        return "ok"
+
+    client = test_app.test_client()
+    client.get("/courses/3")
+    executor.shutdown()
+    route = ("", "course_detail")
+    assert registry.requests.get(route + ("GET", "200")) == 1
+    assert registry.request_storage_calls.get(route) == (4, 1)
+    assert registry.storage_calls.get(("get_object",) + route + ("ok",)) == 3
+    assert registry.storage_bytes.get(("get_object",) + route) == 15
+    assert registry.storage_bytes.get(("put_object",) + route) == 5
+    # LLM calls on the executor threads keep the route of the request
+    assert registry.llm_calls.get(route + ("ok",)) == 2
+    assert registry.llm_tokens.get(route + ("prompt_tokens",)) == 20
+
+    with pytest.raises(Exception):
+        s3.get_object(Bucket="bucket", Key="missing.txt")
+    assert registry.storage_calls.get(
+        ("get_object", "", "background", "NoSuchKey")
+    ) == 1
+
+    text = client.get("/metrics").data.decode()
+    assert "# TYPE app_request_duration_seconds histogram" in text
+    assert (
+        'app_request_storage_calls_bucket{blueprint="",'
+        'endpoint="course_detail",le="5"} 1'
+    ) in text
@@ -0,0 +1,200 @@
+"""
+Filename: <topic_index.py>
+
+Description:
+    In-memory index of forum topics. Topics are kept by id together with
+    their comment counts, and every tag has a sorted posting list of topic
+    ids, so a filtered forum view only touches the topics that match its
+    tags. Multi-tag filters intersect the posting lists. The topic and
+    comment CSVs in AWS S3 are reloaded only when their ETags change.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import bisect
+import threading
+import time
+
+import pandas as pd
+
+try:
+    from src.util import get_df_from_csv_in_s3_if_changed
+except ImportError:
+    from .util import get_df_from_csv_in_s3_if_changed
+
+
+def split_tags(tag_value):
+    """
+    Split the tag column of a topic into a list of tags. A topic may carry
+    several comma separated tags.
+    """
+    if not isinstance(tag_value, str):
+        return []
+    return [tag.strip() for tag in tag_value.split(",") if tag.strip()]
+
+
+def intersect_sorted(first, second):
+    """
+    Intersect two sorted lists of topic ids in linear time.
+    """
+    result = []
+    i = j = 0
+    while i < len(first) and j < len(second):
+        if first[i] == second[j]:
+            result.append(first[i])
+            i += 1
+            j += 1
+        elif first[i] < second[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class TopicIndex:
+    """
+    Tag partitioned index of forum topics with per-topic comment counts.
+    """
+
+    def __init__(
+        self, s3, bucket_name, topic_key, comment_key, refresh_interval=30
+    ):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.topic_key = topic_key
+        self.comment_key = comment_key
+        # Minimum number of seconds between two ETag checks against S3
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._topics = {}
+        self._all_ids = []
+        self._postings = {}
+        self._comment_counts = {}
+        self._topic_etag = None
+        self._comment_etag = None
+        self._checked_at = 0.0
+
+    def refresh(self, force=False):
+        """
+        Reload topics and comment counts from S3 if either CSV changed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (
+                not force
+                and self._topic_etag is not None
+                and now - self._checked_at < self.refresh_interval
+            ):
+                return
+
+            topics_df, self._topic_etag = get_df_from_csv_in_s3_if_changed(
+                self.s3, self.bucket_name, self.topic_key, self._topic_etag
+            )
+            if topics_df is not None:
+                self._load_topics(topics_df)
+
+            comments_df, self._comment_etag = (
+                get_df_from_csv_in_s3_if_changed(
+                    self.s3,
+                    self.bucket_name,
+                    self.comment_key,
+                    self._comment_etag,
+                )
+            )
+            if comments_df is not None:
+                counts = comments_df.groupby("topicId").size()
+                self._comment_counts = {
+                    int(topic_id): int(count)
+                    for topic_id, count in counts.items()
+                }
+            self._checked_at = now
+
+    def _load_topics(self, topics_df):
+        """
+        Rebuild the topic table and the tag posting lists.
+        """
+        topics_df = topics_df.astype(object).where(pd.notna(topics_df), "")
+        topics = {}
+        postings = {}
+        for topic in topics_df.to_dict(orient="records"):
+            topic_id = int(topic["id"])
+            topic["id"] = topic_id
+            topics[topic_id] = topic
+            for tag in split_tags(topic.get("tag")):
+                postings.setdefault(tag, []).append(topic_id)
+        for topic_ids in postings.values():
+            topic_ids.sort()
+        self._topics = topics
+        self._all_ids = sorted(topics)
+        self._postings = postings
+
+    def _with_count(self, topic_id):
+        topic = dict(self._topics[topic_id])
+        topic["comment_count"] = self._comment_counts.get(topic_id, 0)
+        return topic
+
+    def query(self, tags=None):
+        """
+        Return the topics (as dictionaries including "comment_count") that
+        carry every one of the given tags, in ascending id order. Without
+        tags all topics are returned.
+        """
+        self.refresh()
+        with self._lock:
+            if not tags:
+                topic_ids = self._all_ids
+            else:
+                # Start from the shortest posting list to keep it cheap
+                postings = sorted(
+                    (self._postings.get(tag, []) for tag in set(tags)),
+                    key=len,
+                )
+                topic_ids = postings[0]
+                for posting in postings[1:]:
+                    topic_ids = intersect_sorted(topic_ids, posting)
+            return [self._with_count(topic_id) for topic_id in topic_ids]
+
+    def get_topic(self, topic_id):
+        """
+        Return a single topic dictionary, or None if it does not exist.
+        """
+        self.refresh()
+        with self._lock:
+            try:
+                topic_id = int(topic_id)
+            except (TypeError, ValueError):
+                return None
+            if topic_id not in self._topics:
+                return None
+            return self._with_count(topic_id)
+
+    def add_topic(self, topic):
+        """
+        Insert a topic that was just written to S3 so it shows up without
+        waiting for the next refresh.
+        """
+        with self._lock:
+            topic = {
+                key: ("" if pd.isna(value) else value)
+                for key, value in topic.items()
+            }
+            topic_id = int(topic["id"])
+            topic["id"] = topic_id
+            if topic_id in self._topics:
+                return
+            self._topics[topic_id] = topic
+            bisect.insort(self._all_ids, topic_id)
+            for tag in split_tags(topic.get("tag")):
+                bisect.insort(self._postings.setdefault(tag, []), topic_id)
+
+    def add_comment(self, topic_id):
+        """
+        Count a comment that was just written to S3.
+        """
+        with self._lock:
+            topic_id = int(topic_id)
+            self._comment_counts[topic_id] = (
+                self._comment_counts.get(topic_id, 0) + 1
+            )
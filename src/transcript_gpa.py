@@ -0,0 +1,185 @@
+"""
+Filename: <transcript_gpa.py>
+
+Description:
+    Cumulative GPA of McMaster transcripts. The PDF is read from memory,
+    its "Term Totals" rows are extracted in a single pass over the text
+    and the cGPA is the sum of the grade points over the sum of the
+    units. Results are cached by the SHA-256 of the PDF.
+
+    Advisers can compute the cGPA of many transcripts in parallel with:
+        python -m src.transcript_gpa path/to/transcripts/ --output gpa.csv
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from src.pdf_text import extract_page_range
+except ImportError:
+    from .pdf_text import extract_page_range
+
+# "Term Totals ... <units> <grade points> <term GPA>"
+TERM_TOTALS = re.compile(
+    r"^Term Totals\b.*?(?<!\S)(\d+(?:\.\d+)?)[ \t]+(\d+(?:\.\d+)?)[ \t]+\S+"
+    r"[ \t]*$",
+    re.MULTILINE,
+)
+
+
+def parse_term_totals(pages):
+    """
+    Return the (units, grade points) of every Term Totals row.
+    """
+    return [
+        (float(units), float(points))
+        for units, points in TERM_TOTALS.findall("\n".join(pages))
+    ]
+
+
+def compute_gpa(pages):
+    """
+    Cumulative GPA of the page texts of a transcript. cgpa is None when
+    the transcript has no Term Totals rows or no units.
+    """
+    rows = parse_term_totals(pages)
+    units = sum(row[0] for row in rows)
+    points = sum(row[1] for row in rows)
+    return {
+        "cgpa": round(points / units, 2) if units else None,
+        "terms": len(rows),
+        "units": units,
+        "points": points,
+    }
+
+
+def gpa_from_pdf_bytes(pdf_bytes):
+    """
+    Cumulative GPA of a transcript PDF given as bytes. Module level so
+    that it can run in the worker processes of the batch mode.
+    """
+    return compute_gpa(extract_page_range(pdf_bytes, 0, None))
+
+
+class TranscriptGpaParser:
+    """
+    Transcript cGPA parser with a cache keyed by the SHA-256 of the PDF.
+    """
+
+    def __init__(self, extractor, cache_size=256):
+        # Shared PdfTextExtractor
+        self.extractor = extractor
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    def parse(self, pdf_bytes):
+        """
+        Return the cGPA of a transcript with the SHA-256 of the PDF.
+        """
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return dict(self._cache[digest])
+
+        result = compute_gpa(self.extractor.extract_pages(pdf_bytes))
+        result["sha256"] = digest
+        with self._lock:
+            self._cache[digest] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(result)
+
+
+def find_transcripts(paths):
+    """
+    PDF files given directly or found in the given directories.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.lower().endswith(".pdf")
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def parse_transcript_file(path):
+    """
+    Cumulative GPA of a transcript PDF file.
+    """
+    with open(path, "rb") as pdf_file:
+        return gpa_from_pdf_bytes(pdf_file.read())
+
+
+def parse_batch(paths, workers=None):
+    """
+    Yield (path, result or None, error or None) for every transcript,
+    parsed on a process pool.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (path, executor.submit(parse_transcript_file, path))
+            for path in paths
+        ]
+        for path, future in futures:
+            try:
+                yield path, future.result(), None
+            except Exception as e:
+                yield path, None, e
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute the cGPA of transcripts in parallel"
+    )
+    parser.add_argument("paths", nargs="+", help="PDF files or directories")
+    parser.add_argument("--output", help="CSV file, stdout by default")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.writer(output)
+    writer.writerow(["file", "cgpa", "terms", "units", "points", "error"])
+    failed = 0
+    for path, result, error in parse_batch(
+        find_transcripts(args.paths), args.workers
+    ):
+        if error is not None:
+            failed += 1
+            writer.writerow([path, "", "", "", "", error])
+            continue
+        writer.writerow(
+            [
+                path,
+                "" if result["cgpa"] is None else result["cgpa"],
+                result["terms"],
+                result["units"],
+                result["points"],
+                "",
+            ]
+        )
+    if output is not sys.stdout:
+        output.close()
+    if failed:
+        print(f"{failed} transcripts could not be read", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Filename: <user_directory.py>
+
+Description:
+    In-memory directory of users for the web application. Keeps an
+    id -> username map and a username -> id map built from the user data CSV
+    stored in AWS S3. The CSV is downloaded once and only fetched again when
+    its ETag changes, so resolving usernames is a dictionary lookup instead
+    of a DataFrame join on every request.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import threading
+import time
+from io import StringIO
+
+import pandas as pd
+
+try:
+    from src.util import get_df_from_csv_in_s3_if_changed
+except ImportError:
+    from .util import get_df_from_csv_in_s3_if_changed
+
+
+def normalize_user_id(user_id):
+    """
+    Normalize a user id read from any CSV (int, numpy int, float or str) so
+    that it can be used as a dictionary key.
+    """
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return str(user_id)
+
+
+class UserDirectory:
+    """
+    Cached two-way mapping between user ids and usernames.
+    """
+
+    def __init__(self, s3, bucket_name, key, refresh_interval=60):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.key = key
+        # Minimum number of seconds between two ETag checks against S3
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._id_to_username = {}
+        self._username_to_id = {}
+        self._etag = None
+        self._checked_at = 0.0
+
+    def refresh(self, force=False):
+        """
+        Reload the user data from S3 if it changed since the last load.
+        A conditional GET (If-None-Match) is used so an unchanged file costs
+        a single request and no download.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if (
+                not force
+                and self._etag is not None
+                and now - self._checked_at < self.refresh_interval
+            ):
+                return
+
+            users_df, self._etag = get_df_from_csv_in_s3_if_changed(
+                self.s3, self.bucket_name, self.key, self._etag
+            )
+            # None means not modified, keep the maps we already have
+            if users_df is not None:
+                self._load(users_df)
+            self._checked_at = now
+
+    def _load(self, users_df):
+        """
+        Rebuild both maps from a DataFrame with userId and username columns.
+        """
+        id_to_username = {}
+        username_to_id = {}
+        for user_id, username in zip(users_df["userId"], users_df["username"]):
+            user_id = normalize_user_id(user_id)
+            id_to_username[user_id] = username
+            username_to_id[username] = user_id
+        self._id_to_username = id_to_username
+        self._username_to_id = username_to_id
+
+    def get_username(self, user_id, default=None):
+        """
+        Return the username of a single user id.
+        """
+        self.refresh()
+        return self._id_to_username.get(normalize_user_id(user_id), default)
+
+    def get_user_id(self, username, default=None):
+        """
+        Return the user id of a single username.
+        """
+        self.refresh()
+        return self._username_to_id.get(username, default)
+
+    def resolve(self, user_ids, default=None):
+        """
+        Resolve a batch of user ids to usernames, preserving order.
+        """
+        self.refresh()
+        id_to_username = self._id_to_username
+        return [
+            id_to_username.get(normalize_user_id(user_id), default)
+            for user_id in user_ids
+        ]
+
+    def rename(self, user_id, new_username):
+        """
+        Change the username of a user in both maps and persist the user data
+        CSV back to S3.
+        """
+        self.refresh()
+        user_id = normalize_user_id(user_id)
+        with self._lock:
+            old_username = self._id_to_username.get(user_id)
+            if old_username is not None:
+                self._username_to_id.pop(old_username, None)
+            self._id_to_username[user_id] = new_username
+            self._username_to_id[new_username] = user_id
+
+            users_df = pd.DataFrame(
+                {
+                    "userId": list(self._id_to_username.keys()),
+                    "username": list(self._id_to_username.values()),
+                }
+            )
+            csv_buffer = StringIO()
+            users_df.to_csv(csv_buffer, index=False)
+            response = self.s3.put_object(
+                Bucket=self.bucket_name,
+                Key=self.key,
+                Body=csv_buffer.getvalue(),
+                ContentType="text/csv",
+            )
+            # Our own write is the latest version, no need to download it
+            self._etag = response.get("ETag")
+            self._checked_at = time.monotonic()
@@ -0,0 +1,184 @@
+"""
+Filename: <user_id_migration.py>
+
+Description:
+    One-off migration of the per-user data from username keys to the
+    integer user ids of the user directory (user_data.csv), so renaming a
+    user only changes the user's row in the directory. Run it once from
+    the repository root, with the app stopped:
+        python -m src.user_id_migration
+
+    - The user profiles CSV (mock_data_poc.csv) loses its username and
+      stray index columns and is keyed by user_id. Users missing from
+      user_data.csv are added to it.
+    - Icon orders, focus sessions and feedback stored under a username
+      are moved under the user id, and feedback records get a user_id
+      instead of a username and are added to their user's index.
+
+    Running it again does nothing.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import argparse
+import json
+from io import StringIO
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+try:
+    from src.util import get_df_from_csv_in_s3
+except ImportError:
+    from .util import get_df_from_csv_in_s3
+
+
+def put_csv(s3, bucket_name, key, df, index):
+    """
+    Upload a DataFrame as a CSV object.
+    """
+    csv_buffer = StringIO()
+    df.to_csv(csv_buffer, index=index)
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=key,
+        Body=csv_buffer.getvalue(),
+        ContentType="text/csv",
+    )
+
+
+def migrate_profiles(s3, bucket_name, profiles_key, users_key):
+    """
+    Key the user profiles CSV by user_id and make sure every user is in
+    the user directory CSV. Returns the username -> user id map.
+    """
+    users = get_df_from_csv_in_s3(s3, bucket_name, users_key)
+    username_to_id = {
+        username: int(user_id)
+        for user_id, username in zip(users["userId"], users["username"])
+    }
+    profiles = get_df_from_csv_in_s3(s3, bucket_name, profiles_key)
+    if "username" not in profiles.columns:
+        return username_to_id
+
+    used_ids = set(username_to_id.values())
+    for user_id, username in zip(profiles["user_id"], profiles["username"]):
+        if username in username_to_id:
+            if username_to_id[username] != int(user_id):
+                print(
+                    f"{username} is user {username_to_id[username]} in "
+                    f"{users_key}, not {user_id}; using "
+                    f"{username_to_id[username]}"
+                )
+            continue
+        # Keep the profile's id unless another user already has it
+        if int(user_id) in used_ids:
+            user_id = max(used_ids) + 1
+        username_to_id[username] = int(user_id)
+        used_ids.add(int(user_id))
+
+    profiles["user_id"] = [
+        username_to_id[username] for username in profiles["username"]
+    ]
+    columns = [
+        column
+        for column in profiles.columns
+        if column not in ("user_id", "username")
+        and not column.startswith("Unnamed")
+    ]
+    profiles = profiles.set_index("user_id")[columns]
+    put_csv(s3, bucket_name, profiles_key, profiles, index=True)
+
+    users = pd.DataFrame(
+        sorted((user_id, name) for name, user_id in username_to_id.items()),
+        columns=["userId", "username"],
+    )
+    put_csv(s3, bucket_name, users_key, users, index=False)
+    return username_to_id
+
+
+def rewrite_feedback_record(path, body, user_id):
+    """
+    Replace the username of a feedback record with its user id. Other
+    objects, like the status index, are kept as they are.
+    """
+    if not path.startswith("records/"):
+        return body
+    record = json.loads(body)
+    record.pop("username", None)
+    record["user_id"] = user_id
+    return json.dumps(record)
+
+
+def move_user_prefixes(s3, bucket_name, prefix, username_to_id, rewrite=None):
+    """
+    Move the objects under <prefix><username>/ to <prefix><user id>/,
+    passing their bodies through rewrite(path, body, user_id) if given.
+    Returns the number of moved objects.
+    """
+    keys = []
+    kwargs = {}
+    while True:
+        response = s3.list_objects_v2(
+            Bucket=bucket_name, Prefix=prefix, **kwargs
+        )
+        keys += [item["Key"] for item in response.get("Contents", [])]
+        if not response.get("IsTruncated"):
+            break
+        kwargs = {"ContinuationToken": response["NextContinuationToken"]}
+
+    moved = 0
+    for key in keys:
+        segment, _, path = key[len(prefix):].partition("/")
+        user_id = username_to_id.get(unquote(segment))
+        if user_id is None or not path:
+            continue
+        target = f"{prefix}{quote(str(user_id), safe='')}/{path}"
+        if target == key:
+            continue
+        body = s3.get_object(Bucket=bucket_name, Key=key)["Body"].read()
+        if rewrite is not None:
+            body = rewrite(path, body, user_id)
+        s3.put_object(Bucket=bucket_name, Key=target, Body=body)
+        s3.delete_object(Bucket=bucket_name, Key=key)
+        moved += 1
+    return moved
+
+
+def main():
+    from src import config
+    from src.feedback_store import FeedbackStore
+    from src.local_storage import create_s3_client
+
+    argparse.ArgumentParser(
+        description="Key the per-user data by user id instead of username"
+    ).parse_args()
+
+    s3 = create_s3_client(config)
+    bucket_name = config.BUCKET_NAME
+    username_to_id = migrate_profiles(
+        s3, bucket_name, config.MOCK_DATA_POC_NAME, config.USER_DATA_NAME
+    )
+    print(f"{len(username_to_id)} users in {config.USER_DATA_NAME}")
+    for prefix, rewrite in [
+        (config.USER_KV_PREFIX, None),
+        (config.FOCUS_LOG_PREFIX, None),
+        (f"{config.FEEDBACK_STORE_PREFIX}users/", rewrite_feedback_record),
+    ]:
+        moved = move_user_prefixes(
+            s3, bucket_name, prefix, username_to_id, rewrite
+        )
+        print(f"Moved {moved} objects under {prefix}")
+    store = FeedbackStore(
+        s3, bucket_name, prefix=config.FEEDBACK_STORE_PREFIX
+    )
+    indexed = sum(
+        store.reindex(user_id) for user_id in set(username_to_id.values())
+    )
+    print(f"Indexed {indexed} feedback records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Filename: <user_kv.py>
+
+Description:
+    Small per-user key-value store in AWS S3. Each value is its own JSON
+    object under the prefix of its user, so reading or writing the value
+    of one user never touches the data of the others. Values are cached
+    in memory and revalidated by ETag. Writes are debounced: a burst of
+    updates of the same value, like dragging several icons, is coalesced
+    into one write of the last value. A failed write is retried with an
+    exponential backoff until it succeeds or the value is set again.
+
+Author: All team members
+Created: 2026-10-19
+Last Modified: 2026-10-19
+"""
+
+import json
+import threading
+from urllib.parse import quote
+
+import botocore.exceptions
+
+
+class UserKeyValueStore:
+    """
+    Cached per-user JSON values with debounced, coalesced writes.
+    """
+
+    def __init__(
+        self,
+        s3,
+        bucket_name,
+        prefix="user_kv/",
+        write_delay=2,
+        retry_delay=1,
+        max_retry_delay=300,
+    ):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        # Seconds to wait for more updates before writing a value
+        self.write_delay = write_delay
+        # Seconds before the first retry of a failed write, doubled after
+        # each failure up to max_retry_delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._lock = threading.Lock()
+        # (user_id, name) -> (ETag, value) of the stored values
+        self._cache = {}
+        # (user_id, name) -> value not written yet
+        self._pending = {}
+        self._timers = {}
+        # (user_id, name) -> number of failed writes in a row
+        self._failures = {}
+
+    def _key(self, user_id, name):
+        return f"{self.prefix}{quote(str(user_id), safe='')}/{name}.json"
+
+    def get(self, user_id, name, default=None):
+        """
+        Return a value of a user, or `default` if it was never set.
+        """
+        cache_key = (user_id, name)
+        with self._lock:
+            if cache_key in self._pending:
+                return self._pending[cache_key]
+            etag, value = self._cache.get(cache_key, (None, default))
+        kwargs = {"IfNoneMatch": etag} if etag else {}
+        try:
+            response = self.s3.get_object(
+                Bucket=self.bucket_name,
+                Key=self._key(user_id, name),
+                **kwargs,
+            )
+        except botocore.exceptions.ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code in ("304", "NotModified"):
+                return value
+            if code in ("NoSuchKey", "404"):
+                return default
+            raise e
+        value = json.loads(response["Body"].read())
+        with self._lock:
+            # A set() while reading wins over the stored value
+            if cache_key in self._pending:
+                return self._pending[cache_key]
+            self._cache[cache_key] = (response.get("ETag"), value)
+        return value
+
+    def set(self, user_id, name, value):
+        """
+        Set a value of a user. It is written once no other update of the
+        same value arrived for `write_delay` seconds.
+        """
+        cache_key = (user_id, name)
+        with self._lock:
+            self._pending[cache_key] = value
+            timer = self._timers.pop(cache_key, None)
+            if timer is not None:
+                timer.cancel()
+            if self.write_delay <= 0:
+                timer = None
+            else:
+                timer = self._schedule(cache_key, self.write_delay)
+        if timer is None:
+            self._write(cache_key)
+
+    def _schedule(self, cache_key, delay):
+        # Called with the lock held
+        timer = threading.Timer(delay, self._write, args=(cache_key,))
+        timer.daemon = True
+        self._timers[cache_key] = timer
+        timer.start()
+        return timer
+
+    def _write(self, cache_key):
+        """
+        Write the pending value of (user_id, name), if there is one.
+        """
+        with self._lock:
+            if cache_key not in self._pending:
+                return
+            value = self._pending[cache_key]
+            self._timers.pop(cache_key, None)
+        try:
+            response = self.s3.put_object(
+                Bucket=self.bucket_name,
+                Key=self._key(*cache_key),
+                Body=json.dumps(value),
+                ContentType="application/json",
+            )
+        except Exception as e:
+            with self._lock:
+                failures = self._failures.get(cache_key, 0) + 1
+                self._failures[cache_key] = failures
+                delay = min(
+                    self.retry_delay * 2 ** (failures - 1),
+                    self.max_retry_delay,
+                )
+                # A set() during the write already scheduled the next one
+                if cache_key not in self._timers:
+                    self._schedule(cache_key, delay)
+            print(f"Failed to write {cache_key}, retrying in {delay}s: {e}")
+            return
+        with self._lock:
+            self._failures.pop(cache_key, None)
+            self._cache[cache_key] = (response.get("ETag"), value)
+            # Keep a newer value that arrived during the write pending
+            if self._pending.get(cache_key) is value:
+                del self._pending[cache_key]
+
+    def flush(self):
+        """
+        Write every pending value now.
+        """
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            pending = list(self._pending)
+        for cache_key in pending:
+            self._write(cache_key)
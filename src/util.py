@@ -10,13 +10,14 @@ Description:
 
 Author: All team members
 Created: 2024-02-14
-Last Modified: 2024-04-04
+Last Modified: 2026-10-19
 """
 
 # Helper functions that will be commonly used
 import pandas as pd
 import os
 import openai
+import botocore
 from io import StringIO
 from datetime import datetime
 from sklearn.base import TransformerMixin
@@ -24,6 +25,8 @@ from sklearn.base import TransformerMixin
 
 # Initialize OpenAI API with your API key
 openai.api_key = os.environ.get("OPENAI_API_KEY")
+# Allows pointing the app at a local API such as fake_llm_server.py
+openai.api_base = os.environ.get("OPENAI_API_BASE", openai.api_base)
 
 
 class SqueezeTransformer(TransformerMixin):
@@ -34,20 +37,10 @@ class SqueezeTransformer(TransformerMixin):
         return X.squeeze()
 
 
-def add_task_todo(
-    course_name,  # Name of the course
-    task_name,  # Task description
-    due_date,  # Task due date in YYYY-MM-DD format
-    weight,  # Importance of the task
-    est_hours,  # Estimated hours to complete the task
-    s3,  # S3 service client
-    bucket_name,  # S3 bucket name for storing task data
-    mock_tasks_data_file,  # File name for mock tasks data
-):
+def task_due_date_and_priority(due_date):
     """
-    This function adds a new task to a todo list for a course, considering the
-    task's due date, weight, estimated hours to complete, and priority, and
-    updates the task list in an S3 bucket.
+    Return the due date of a task, "0000-00-00" if it is missing or
+    invalid, and its priority based on the days until it is due.
     """
     try:
         # Convert due date to date object and calculate days until due
@@ -64,6 +57,25 @@ def add_task_todo(
         # Handle errors in due date format
         due_date = "0000-00-00"
         priority = "unknown"
+    return due_date, priority
+
+
+def add_task_todo(
+    course_name,  # Name of the course
+    task_name,  # Task description
+    due_date,  # Task due date in YYYY-MM-DD format
+    weight,  # Importance of the task
+    est_hours,  # Estimated hours to complete the task
+    s3,  # S3 service client
+    bucket_name,  # S3 bucket name for storing task data
+    mock_tasks_data_file,  # File name for mock tasks data
+):
+    """
+    This function adds a new task to a todo list for a course, considering the
+    task's due date, weight, estimated hours to complete, and priority, and
+    updates the task list in an S3 bucket.
+    """
+    due_date, priority = task_due_date_and_priority(due_date)
 
     # Fetch current tasks from S3
     tasks_df = get_df_from_csv_in_s3(s3, bucket_name, mock_tasks_data_file)
@@ -98,6 +110,62 @@ def add_task_todo(
     )
 
 
+def add_tasks_todo(
+    tasks,  # (course name, task name, due date, weight) of the tasks
+    est_hours,  # Estimated hours to complete each task
+    s3,  # S3 service client
+    bucket_name,  # S3 bucket name for storing task data
+    mock_tasks_data_file,  # File name for mock tasks data
+):
+    """
+    Add tasks to the todo list with a single read and write of the task
+    list. Tasks whose course already has a task with the same name are
+    skipped, so adding the same tasks again, like a retried syllabus job
+    does, adds nothing. Returns the number of added tasks.
+    """
+    if not tasks:
+        return 0
+    tasks_df = get_df_from_csv_in_s3(s3, bucket_name, mock_tasks_data_file)
+    existing = set()
+    if not tasks_df.empty:
+        existing = set(zip(tasks_df["course"], tasks_df["title"]))
+    next_id = tasks_df["id"].max() + 1 if not tasks_df.empty else 1
+
+    new_tasks = []
+    for course_name, task_name, due_date, weight in tasks:
+        if (course_name, task_name) in existing:
+            continue
+        existing.add((course_name, task_name))
+        due_date, priority = task_due_date_and_priority(due_date)
+        new_tasks.append(
+            {
+                "id": next_id + len(new_tasks),
+                "title": task_name,
+                "course": course_name,
+                "due_date": due_date,
+                "weight": weight,
+                "est_time": est_hours,
+                "priority": priority,
+                "status": "todo",
+            }
+        )
+    if not new_tasks:
+        return 0
+
+    tasks_df = pd.concat(
+        [tasks_df, pd.DataFrame(new_tasks)], ignore_index=True
+    )
+    csv_buffer = StringIO()
+    tasks_df.to_csv(csv_buffer, index=False)
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=mock_tasks_data_file,
+        Body=csv_buffer.getvalue(),
+        ContentType="text/csv",
+    )
+    return len(new_tasks)
+
+
 def get_df_from_csv_in_s3(s3, bucket_name, s3_csv_file_path):
     """
     This function retrieves a CSV file from an S3 bucket and returns it as a
@@ -112,6 +180,34 @@ def get_df_from_csv_in_s3(s3, bucket_name, s3_csv_file_path):
     return df
 
 
+def get_user_profiles_from_s3(s3, bucket_name, s3_csv_file_path):
+    """
+    Retrieve the user profiles CSV indexed by the integer user_id, so that
+    the row of a user is an index lookup. upload_df_to_s3 writes the index
+    back as the user_id column.
+    """
+    df = get_df_from_csv_in_s3(s3, bucket_name, s3_csv_file_path)
+    return df.set_index("user_id")
+
+
+def get_df_from_csv_in_s3_if_changed(s3, bucket_name, s3_csv_file_path, etag):
+    """
+    Conditionally retrieve a CSV file from an S3 bucket. Returns a tuple of
+    the DataFrame and the object's ETag, or (None, etag) if the object still
+    has the given ETag and therefore has not changed.
+    """
+    request_args = {"Bucket": bucket_name, "Key": s3_csv_file_path}
+    if etag is not None:
+        request_args["IfNoneMatch"] = etag
+    try:
+        s3_obj = s3.get_object(**request_args)
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("304", "NotModified"):
+            return None, etag
+        raise e
+    return pd.read_csv(s3_obj["Body"]), s3_obj.get("ETag")
+
+
 # Uploads a dataframe to AWS S3.
 def upload_df_to_s3(df, s3, bucket_name, s3_csv_file_path):
     """
@@ -125,24 +221,3 @@ def upload_df_to_s3(df, s3, bucket_name, s3_csv_file_path):
         s3_csv_file_path,  # Destination path in S3.
     )
     os.remove(new_csv_file_path)  # Remove temporary local CSV file.
-
-
-def write_order_csv_to_s3(s3, icon_order_path, df, bucket_name):
-    """
-    Writes DataFrame to a CSV file and uploads it to Amazon S3 bucket.
-    """
-    # Create a temporary CSV file path
-    new_csv_file_path = "poc-data/tmp.csv"
-
-    # Write DataFrame to the temporary CSV file
-    df.to_csv(new_csv_file_path, index=False)
-
-    # Upload the CSV file to S3
-    s3.upload_file(
-        new_csv_file_path,
-        bucket_name,
-        icon_order_path,
-    )
-
-    # Remove the temporary CSV file
-    os.remove(new_csv_file_path)